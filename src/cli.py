@@ -10,6 +10,8 @@ def start(script_number: None | int = None, search_conditions: SearchByCriteriaC
             "2 - Поиск купонов\n"
             "3 - Поиск новостей\n"
             "4 - Подсчет объемов покупки\n"
+            "5 - Сравнение объемов покупки для разных сумм\n"
+            "6 - Загрузка старых результатов поиска в историю снимков\n"
             "Выберите скрипт: "
         ))
 
@@ -24,8 +26,13 @@ def start(script_number: None | int = None, search_conditions: SearchByCriteriaC
         app.search_news()
     elif script_number == 4:
         app.calc_purchase_volume()
+    elif script_number == 5:
+        app.calc_purchase_volume_sweep()
+    elif script_number == 6:
+        app.import_snapshots()
     else:
         print("Выбран неверный номер скрипта.")
+    app.write_metrics()
 
     print("\nМихаил Шардин https://shardin.name/\n")
     input("Нажмите Enter для выхода...")
@@ -0,0 +1,140 @@
+from collections.abc import Sequence
+
+import numpy as np
+
+from moex_bond_search_and_analysis.schemas import Allocation
+
+# Допуск при сравнении денежных сумм, руб.
+MONEY_TOLERANCE = 1e-6
+
+
+def allocate(
+    costs: Sequence[float],
+    budgets: float | Sequence[float],
+    lots: Sequence[int] | None = None,
+    weights: Sequence[float] | None = None,
+    issuers: Sequence[str] | None = None,
+    issuer_min: float | dict[str, float] | None = None,
+    issuer_max: float | dict[str, float] | None = None,
+) -> Allocation:
+    """
+    Целочисленное распределение денег по облигациям сразу для вектора бюджетов.
+    costs - полная стоимость одной бумаги (цена + НКД), lots - бумаг в лоте,
+    weights - целевые веса (по умолчанию равные, бумаги с нулевым весом не покупаются),
+    issuer_min / issuer_max - доля бюджета на эмитента, одна на всех или словарь по эмитентам.
+
+    Целевые веса сначала подгоняются под ограничения по эмитентам, затем покупаются
+    целые лоты ниже цели, а остаток докупается жадно по одному лоту - тот, что меньше всего
+    увеличивает квадрат отклонения от цели. Докупка идёт, пока хватает денег хотя бы на один лот,
+    поэтому остаток меньше самого дешёвого доступного лота. Все бюджеты считаются одновременно.
+    """
+    costs = np.asarray(costs, dtype=float)
+    budgets = np.atleast_1d(np.asarray(budgets, dtype=float))
+    n = len(costs)
+    if np.any(costs <= 0) or np.any(budgets <= 0):
+        raise ValueError("Стоимость бумаг и бюджеты должны быть больше нуля")
+    lot_costs = costs * (np.ones(n) if lots is None else np.asarray(lots, dtype=float))
+    weights = np.ones(n) if weights is None else np.asarray(weights, dtype=float)
+    if np.any(weights < 0) or weights.sum() <= 0:
+        raise ValueError("Веса облигаций должны быть неотрицательны и не все нулевые")
+
+    # Без эмитентов каждая бумага - отдельный эмитент
+    names, group = np.unique(
+        np.arange(n) if issuers is None else np.asarray(issuers, dtype=str),
+        return_inverse=True,
+    )
+    min_share = _issuer_shares(issuer_min, names, 0.0)
+    max_share = _issuer_shares(issuer_max, names, 1.0)
+    weights = _target_weights(weights / weights.sum(), group, min_share, max_share)
+
+    onehot = np.zeros((n, len(names)))
+    onehot[np.arange(n), group] = 1
+    min_money = budgets[:, None] * min_share
+    max_money = budgets[:, None] * max_share + MONEY_TOLERANCE
+    targets = budgets[:, None] * weights
+
+    bought = np.floor(targets / lot_costs)
+    spent = bought * lot_costs
+    rows = np.arange(len(budgets))
+    while True:
+        remainder = budgets - spent.sum(axis=1)
+        issuer_spent = spent @ onehot
+        eligible = (
+            (weights > 0)
+            & (lot_costs <= remainder[:, None] + MONEY_TOLERANCE)
+            & (issuer_spent[:, group] + lot_costs <= max_money[:, group])
+        )
+        # Пока эмитент не добрал минимальную долю, докупаются только его бумаги
+        short = eligible & (issuer_spent < min_money - MONEY_TOLERANCE)[:, group]
+        eligible = np.where(short.any(axis=1, keepdims=True), short, eligible)
+        active = eligible.any(axis=1)
+        if not active.any():
+            break
+        # Изменение суммы квадратов отклонений от цели при покупке ещё одного лота
+        delta = lot_costs * (2 * (spent - targets) + lot_costs)
+        choice = np.where(eligible, delta, np.inf).argmin(axis=1)
+        bought[rows[active], choice[active]] += 1
+        spent[rows[active], choice[active]] += lot_costs[choice[active]]
+
+    remainder = budgets - spent.sum(axis=1)
+    return Allocation(
+        budgets=budgets,
+        quantities=(bought * (lot_costs / costs)).round().astype(int),
+        spent=spent,
+        remainder=remainder,
+        tracking_error=np.abs(spent / budgets[:, None] - weights).sum(axis=1) / 2,
+    )
+
+
+def _issuer_shares(
+    shares: float | dict[str, float] | None, names: np.ndarray, default: float
+) -> np.ndarray:
+    if shares is None:
+        return np.full(len(names), default)
+    if isinstance(shares, dict):
+        return np.array([shares.get(name, default) for name in names], dtype=float)
+    return np.full(len(names), float(shares))
+
+
+def _target_weights(
+    weights: np.ndarray,
+    group: np.ndarray,
+    min_share: np.ndarray,
+    max_share: np.ndarray,
+) -> np.ndarray:
+    """
+    Веса, подогнанные под доли эмитентов: эмитент, вышедший за границу, фиксируется на ней,
+    а разница пропорционально распределяется между остальными.
+    """
+    issuer_weights = np.bincount(group, weights, minlength=len(min_share))
+    # Минимальная доля действует только для эмитентов, которых вообще нужно покупать
+    min_share = np.where(issuer_weights > 0, min_share, 0.0)
+    if (
+        np.any(min_share > max_share)
+        or min_share.sum() > 1
+        or max_share[issuer_weights > 0].sum() < 1
+    ):
+        raise ValueError("Ограничения долей эмитентов несовместимы")
+
+    fixed = np.zeros(len(min_share), dtype=bool)
+    for _ in range(len(min_share)):
+        issuer_weights = np.bincount(group, weights, minlength=len(min_share))
+        violated = ~fixed & (
+            (issuer_weights > max_share + MONEY_TOLERANCE)
+            | (issuer_weights < min_share - MONEY_TOLERANCE)
+        )
+        if not violated.any():
+            break
+        fixed |= violated
+        bounded = np.clip(issuer_weights, min_share, max_share)
+        free_weight = issuer_weights[~fixed].sum()
+        if free_weight > 0:
+            bounded[~fixed] *= (1 - bounded[fixed].sum()) / free_weight
+        factor = np.divide(
+            bounded,
+            issuer_weights,
+            out=np.zeros_like(bounded),
+            where=issuer_weights > 0,
+        )
+        weights = weights * factor[group]
+    return weights
@@ -1,15 +1,23 @@
+import json
 from datetime import datetime
+from pathlib import Path
 from typing import Any
 
 import emoji
 import pandas as pd
 import time
 
+from moex_bond_search_and_analysis.allocation import allocate
+from moex_bond_search_and_analysis.cache import CacheMode, ResponseCache
+from moex_bond_search_and_analysis.checkpoint import ScanCheckpoint
+from moex_bond_search_and_analysis.history import HistoryStore
+from moex_bond_search_and_analysis.iss import ISSClient
 from moex_bond_search_and_analysis.moex import MOEX
 from moex_bond_search_and_analysis.news import google_search, write_to_file
 from moex_bond_search_and_analysis.plugins.excel import ExcelSource
 from moex_bond_search_and_analysis.logger import like_print_log
-from moex_bond_search_and_analysis.schemas import SearchByCriteriaConditions
+from moex_bond_search_and_analysis.schemas import Allocation, SearchByCriteriaConditions
+from moex_bond_search_and_analysis.snapshots import SnapshotStore
 from moex_bond_search_and_analysis.utils import (
     create_news_folder,
     measure_method_duration,
@@ -17,9 +25,32 @@ from moex_bond_search_and_analysis.utils import (
 
 
 class App:
-    def __init__(self) -> None:
+    # Метрики запуска сохраняются в moex_metrics.json и moex_metrics.prom
+    METRICS_PATH = "moex_metrics"
+    # Необязательная колонка листа "Исходные данные" bonds.xlsx с целевыми весами облигаций
+    WEIGHT_COLUMN = "Вес"
+    # Доли бюджета на одного эмитента при расчете объемов покупки, None - без ограничений
+    ISSUER_MIN_SHARE: float | None = None
+    ISSUER_MAX_SHARE: float | None = None
+    # Файл сравнения распределений для ряда сумм
+    SWEEP_FILENAME = "bonds_calculation purchase volume sweep.xlsx"
+
+    def __init__(self, cache_mode: CacheMode = "use", verbose: bool = False) -> None:
         self.log = like_print_log
-        self.moex = MOEX(log=self.log)
+        # Подробная трассировка по каждой бумаге выводится в консоль только в verbose режиме,
+        # на лист "Лог" она попадает всегда
+        self.log.verbose = verbose
+        # Справочные данные (купоны, описание бумаг) кэшируются на диске между запусками,
+        # история торгов копится локально, а прогресс поиска облигаций сохраняется
+        # в контрольной точке
+        self.moex = MOEX(
+            log=self.log,
+            client=ISSClient(cache=ResponseCache(mode=cache_mode)),
+            checkpoint=ScanCheckpoint(),
+            history=HistoryStore(),
+        )
+        # Вся выборка каждого поиска сохраняется в историю снимков по датам
+        self.snapshots = SnapshotStore()
 
     @measure_method_duration
     def search_by_criteria(self, search_conditions: SearchByCriteriaConditions | None = None):
@@ -29,17 +60,50 @@ class App:
             search_conditions = SearchByCriteriaConditions()
             
         moex_search_bonds_result = self.moex.search_bonds(conditions=search_conditions)
+        universe = self.moex.universe
+        if universe is not None and not universe.empty:
+            count = self.snapshots.save(universe)
+            self.log.info(f"🗄️ Снимок выборки сохранен в историю: {count} бумаг.")
+            self.__write_snapshot_diff()
         if moex_search_bonds_result:
             output_source = ExcelSource(
                 filename=f"bond_search_{datetime.now().strftime('%Y-%m-%d')}.xlsx"
             )
-            output_source.write_search_by_criteria(
-                moex_search_bonds_result, search_conditions, self.moex.log
-            )
+            with self.moex.client.metrics.stage("export"):
+                output_source.write_search_by_criteria(
+                    moex_search_bonds_result, search_conditions, self.moex.log
+                )
             self.log.info(
                 f"\n💾 Результаты записаны в Excel файл: {output_source.filename}"
             )
 
+    def __write_snapshot_diff(self) -> None:
+        """Что вошло в результаты поиска, выпало из них и изменилось с прошлого снимка."""
+        diff = self.snapshots.diff()
+        if diff is None:
+            return
+        filename = f"bond_search_diff_{diff.current_date}.json"
+        with open(filename, "w", encoding="utf-8") as file:
+            json.dump(diff.as_dict, file, ensure_ascii=False, indent=1)
+        self.log.info(
+            f"🔀 Изменения с {diff.previous_date}: вошли {len(diff.added)}, "
+            f"выпали {len(diff.removed)}, изменились {diff.changed['secid'].nunique()} бумаг. "
+            f"Подробности в файле: {filename}"
+        )
+
+    @measure_method_duration
+    def import_snapshots(self, pattern: str = "bond_search_*.xlsx") -> None:
+        """Загрузка старых результатов поиска из Excel в историю снимков."""
+        imported = self.snapshots.import_xlsx(sorted(Path().glob(pattern)))
+        for scan_date, count in imported.items():
+            self.log.info(f"🗄️ Снимок за {scan_date}: {count} бумаг.")
+        self.log.info(f"✅ Загружено файлов: {len(imported)}")
+
+    def write_metrics(self) -> None:
+        """Метрики запросов к API и этапов обработки за весь запуск."""
+        files = self.moex.client.metrics.write(self.METRICS_PATH)
+        self.log.info(f"📈 Метрики запуска записаны в файлы: {', '.join(files)}")
+
     @measure_method_duration
     def search_coupons(self):
         bounds_source = ExcelSource(filename="bonds.xlsx")
@@ -50,8 +114,10 @@ class App:
         bonds = [row for row in data_iterator if row[0] and row[1]]
         self.log.info(f"Считано {len(bonds)} облигаций для обработки.")
         cash_flow = self.moex.process_bonds(bonds=bonds)
+        # Лист "По эмитентам" группируется по эмитенту из описания бумаги
+        issuers = self.moex.issuers([ID for ID, _ in bonds])
         bounds_source.write_bonds(
-            sheets=bond_sheets, cache_flow=cash_flow, log=self.log
+            sheets=bond_sheets, cache_flow=cash_flow, log=self.log, issuers=issuers
         )
 
     @measure_method_duration
@@ -83,23 +149,81 @@ class App:
             self.log.info(f"Всего потрачено: {total_spent:.2f} руб.")
             self.log.info(f"Остаток: {(available_money - total_spent):.2f} руб.")
 
-    def _calculate_bonds_distribution(
-        self, available_money: int
-    ) -> list[dict[str, Any]]:
+    @measure_method_duration
+    def calc_purchase_volume_sweep(
+        self,
+        budget_from: int = 100_000,
+        budget_to: int = 10_000_000,
+        budget_step: int = 100_000,
+    ) -> pd.DataFrame:
         """
-        # Расчет равномерного распределения средств между облигациями
+        # Сравнение распределений для ряда сумм от budget_from до budget_to
+        # Цены и НКД загружаются один раз, все суммы считаются одним вызовом allocate
+        """
+        budgets = list(range(budget_from, budget_to + 1, budget_step))
+        self.log.info(
+            f"💵 Суммы: от {budget_from} до {budget_to} руб. с шагом {budget_step} руб. "
+            f"({len(budgets)} вариантов)"
+        )
+        valid_bonds = self._purchase_candidates()
+        if not valid_bonds or not budgets:
+            self.log.info("❌ Нет доступных облигаций для покупки")
+            return pd.DataFrame()
+
+        allocation = self._allocate(valid_bonds, budgets)
+        if allocation is None:
+            return pd.DataFrame()
+
+        total_spent = allocation.spent.sum(axis=1)
+        comparison_df = pd.concat(
+            [
+                pd.DataFrame(
+                    {
+                        "Сумма, руб.": allocation.budgets,
+                        "Всего потрачено, руб.": total_spent,
+                        "Остаток, руб.": allocation.remainder,
+                        "Вложено, %": total_spent / allocation.budgets * 100,
+                        "Отклонение от целевых весов, %": allocation.tracking_error
+                        * 100,
+                    }
+                ),
+                pd.DataFrame(
+                    allocation.quantities,
+                    columns=[f"{b['bond']}, шт." for b in valid_bonds],
+                ),
+            ],
+            axis=1,
+        )
+
+        self.log.info("\n📝 Запись сравнения в Excel...")
+        comparison_df.to_excel(
+            self.SWEEP_FILENAME, sheet_name="Сравнение сумм", index=False
+        )
+        self.log.info(f"✅ Результаты сохранены в файл '{self.SWEEP_FILENAME}'")
+        return comparison_df
+
+    def _purchase_candidates(self) -> list[dict[str, Any]]:
+        """
+        # Облигации из bonds.xlsx с ценой, НКД, лотом, эмитентом и целевым весом
         """
         self.log.info("📊 Чтение списка облигаций из файла Excel...")
-        df = pd.read_excel("bonds.xlsx", sheet_name="Исходные данные", usecols="A")
+        df = pd.read_excel("bonds.xlsx", sheet_name="Исходные данные")
         bonds_list = df.iloc[:, 0].tolist()
+        # Без колонки весов деньги делятся поровну, пустой вес - бумага не покупается
+        if self.WEIGHT_COLUMN in df.columns:
+            weights = pd.to_numeric(df[self.WEIGHT_COLUMN], errors="coerce").fillna(0)
+        else:
+            weights = pd.Series(1.0, index=df.index)
 
         # Собираем информацию о всех облигациях
         valid_bonds = []
-        for bond in bonds_list:
-            self.log.info(f"\n🔍 Получение данных для облигации {bond}...")
-            price, nkd, date = self.moex.get_bond_price(bond)
+        self.log.info(f"\n🔍 Получение цен и НКД для {len(bonds_list)} облигаций...")
+        prices = self.moex.get_bond_prices(bonds_list)
+        for bond, weight in zip(bonds_list, weights.tolist()):
+            price, nkd, date = prices[bond]
 
             if price is not None and nkd is not None:
+                info = self.moex.security_info(bond)
                 valid_bonds.append(
                     {
                         "bond": bond,
@@ -107,27 +231,58 @@ class App:
                         "nkd": nkd,
                         "total_cost": price + nkd,
                         "price_date": date,
+                        "lot_size": self.moex.lot_size(bond),
+                        "issuer": info.issuer if info and info.issuer else bond,
+                        "weight": weight,
                     }
                 )
+        return valid_bonds
+
+    def _allocate(
+        self, valid_bonds: list[dict[str, Any]], budgets: int | list[int]
+    ) -> Allocation | None:
+        try:
+            return allocate(
+                costs=[b["total_cost"] for b in valid_bonds],
+                budgets=budgets,
+                lots=[b["lot_size"] for b in valid_bonds],
+                weights=[b["weight"] for b in valid_bonds],
+                issuers=[b["issuer"] for b in valid_bonds],
+                issuer_min=self.ISSUER_MIN_SHARE,
+                issuer_max=self.ISSUER_MAX_SHARE,
+            )
+        except ValueError as e:
+            self.log.info(f"❌ Не удалось распределить средства: {e}")
+            return None
 
+    def _calculate_bonds_distribution(
+        self, available_money: int
+    ) -> list[dict[str, Any]]:
+        """
+        # Расчет распределения средств между облигациями
+        # Целые лоты по целевым весам с минимальным остатком, см. allocation.allocate
+        """
+        valid_bonds = self._purchase_candidates()
         if not valid_bonds:
             self.log.info("❌ Нет доступных облигаций для покупки")
             return []
 
-        # Расчет равного распределения денег
         num_bonds = len(valid_bonds)
-        money_per_bond = available_money / num_bonds
         self.log.info(
             f"\n💰 Распределение {available_money} руб. между {num_bonds} облигациями"
         )
-        self.log.info(f"💵 Сумма на каждую облигацию: {money_per_bond:.2f} руб.")
+        allocation = self._allocate(valid_bonds, available_money)
+        if allocation is None:
+            return []
+        self.log.info(
+            f"🎯 Отклонение от целевых весов: {allocation.tracking_error[0]:.2%}"
+        )
 
         # Расчет количества каждой облигации
         results = []
-        for bond_info in valid_bonds:
-            num_bonds = int(money_per_bond // bond_info["total_cost"])
-            actual_money = num_bonds * bond_info["total_cost"]
-
+        for bond_info, num_bonds, actual_money in zip(
+            valid_bonds, allocation.quantities[0].tolist(), allocation.spent[0].tolist()
+        ):
             results.append(
                 {
                     "bond": bond_info["bond"],
@@ -135,6 +290,7 @@ class App:
                     "price": bond_info["price"],
                     "nkd": bond_info["nkd"],
                     "total_cost": bond_info["total_cost"],
+                    "lot_size": bond_info["lot_size"],
                     "money_spent": actual_money,
                     "price_date": bond_info["price_date"],
                 }
@@ -160,6 +316,7 @@ class App:
                 "Полная стоимость одной облигации, руб.": [
                     r["total_cost"] for r in results
                 ],
+                "Лот, шт.": [r["lot_size"] for r in results],
                 "Количество к покупке, шт.": [r["quantity"] for r in results],
                 "Сумма к расходу, руб.": [r["money_spent"] for r in results],
             }
@@ -0,0 +1,154 @@
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import ClassVar, Literal
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from moex_bond_search_and_analysis.storage import SQLiteStore
+
+# use - читать и записывать кэш
+# bypass - не использовать кэш совсем
+# warm - всегда скачивать заново и обновлять кэш (прогрев)
+CacheMode = Literal["use", "bypass", "warm"]
+
+
+@dataclass
+class CachedResponse:
+    body: str
+    etag: str | None
+    last_modified: str | None
+    fresh: bool
+
+    @property
+    def validators(self) -> dict[str, str]:
+        """Заголовки для условного запроса, если сервер их поддерживает."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def normalize_url(url: str) -> str:
+    """Ключ кэша: схема и хост в нижнем регистре, параметры запроса отсортированы."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)), safe=",")
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path, query, "")
+    )
+
+
+class ResponseCache(SQLiteStore):
+    """
+    Кэш ответов ISS API на диске (SQLite).
+    Время жизни задаётся для каждого класса запросов, рыночные данные не кэшируются.
+    """
+
+    # Время жизни записей в секундах по классам запросов
+    TTL: ClassVar[dict[str, int]] = {
+        "bondization": 24 * 60 * 60,  # графики купонов и амортизаций
+        "securities": 7 * 24 * 60 * 60,  # описание бумаги, режимы торгов, эмитент
+    }
+    MAX_BYTES = 200 * 1024 * 1024
+
+    def __init__(
+        self,
+        path: str = ".moex_iss_cache.sqlite",
+        mode: CacheMode = "use",
+        max_bytes: int = MAX_BYTES,
+    ):
+        super().__init__(path)
+        self.mode = mode
+        self.max_bytes = max_bytes
+
+    def _create_schema(self, connection: sqlite3.Connection) -> None:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, body TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+        )
+
+    def is_cacheable(self, family: str) -> bool:
+        return self.mode != "bypass" and self.TTL.get(family, 0) > 0
+
+    def lookup(self, url: str, family: str) -> CachedResponse | None:
+        if self.mode != "use" or not self.is_cacheable(family):
+            return None
+        key = normalize_url(url)
+        now = time.time()
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self.connection.commit()
+        body, etag, last_modified, stored_at = row
+        return CachedResponse(
+            body=body,
+            etag=etag,
+            last_modified=last_modified,
+            fresh=now - stored_at < self.TTL[family],
+        )
+
+    def store(
+        self,
+        url: str,
+        family: str,
+        body: str,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> None:
+        if not self.is_cacheable(family):
+            return
+        now = time.time()
+        size = len(body.encode("utf-8"))
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (normalize_url(url), body, etag, last_modified, now, now, size),
+            )
+            self.__evict()
+            self.connection.commit()
+
+    def refresh(self, url: str) -> None:
+        """Сервер подтвердил, что ответ не изменился (304) - продлеваем срок жизни."""
+        now = time.time()
+        with self._lock:
+            self.connection.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, normalize_url(url)),
+            )
+            self.connection.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.connection.execute("DELETE FROM responses")
+            self.connection.commit()
+
+    def __evict(self) -> None:
+        # Удаляем давно не использованные записи, пока кэш не уложится в лимит
+        total = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.connection.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall()
+        stale_keys = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale_keys.append((key,))
+            total -= size
+        self.connection.executemany("DELETE FROM responses WHERE key = ?", stale_keys)
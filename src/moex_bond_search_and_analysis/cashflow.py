@@ -0,0 +1,128 @@
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from moex_bond_search_and_analysis.consts import DATE_FORMAT
+from moex_bond_search_and_analysis.schemas import CashFlowSummary
+
+# Подписи выплат в листе "Ден.поток"
+COUPON_KIND = "купон 🏷️"
+PAYMENT_KIND = "номинал 💯"
+FLOW_COLUMNS = ["name", "isin", "date", "value_rub", "number", "kind"]
+
+
+def payment_flows(
+    table: dict[str, Any], date_column: str, kind: str, number: float
+) -> list[tuple[Any, ...]]:
+    """
+    Выплаты одной бумаги из таблицы ответа bondization (купоны или амортизации)
+    в колонках FLOW_COLUMNS. Колонки ответа ищутся по имени, строки не разбираются -
+    даты и суммы считаются потом сразу для всего портфеля в future_cash_flow.
+    """
+    data = table.get("data") or []
+    if not data:
+        return []
+    columns = table["columns"]
+    name, isin, date, value_rub = (
+        columns.index(column) for column in ("name", "isin", date_column, "value_rub")
+    )
+    return [
+        (row[name], row[isin], row[date], row[value_rub], number, kind) for row in data
+    ]
+
+
+def future_cash_flow(
+    flows: list[tuple[Any, ...]], now: datetime | None = None
+) -> list[list[Any]]:
+    """
+    Будущие выплаты по всему портфелю одной операцией над таблицей:
+    строки с датой позже now, сумма = value_rub (неизвестная - 0) × количество бумаг.
+    Порядок строк сохраняется. Возвращает строки листа "Ден.поток".
+    """
+    if not flows:
+        return []
+    table = pd.DataFrame(flows, columns=FLOW_COLUMNS)
+    dates = pd.to_datetime(
+        table["date"].astype(str), format=DATE_FORMAT, errors="coerce"
+    )
+    table = table[dates > (now or datetime.now())].assign(date=dates)
+
+    names = (
+        table["name"].astype(str).str.replace(r"[\"'\\]", "", regex=True)
+        + " ("
+        + table["kind"]
+        + ")"
+    )
+    value_rub = pd.to_numeric(table["value_rub"], errors="coerce").fillna(0)
+    values = value_rub * pd.to_numeric(table["number"])
+    return [
+        [name, isin, date, value]
+        for name, isin, date, value in zip(
+            names.tolist(),
+            table["isin"].tolist(),
+            table["date"].dt.to_pydatetime().tolist(),
+            values.astype(float).tolist(),
+        )
+    ]
+
+
+def issuer_names(names: pd.Series) -> pd.Series:
+    """
+    Эмитент по наименованию выпуска из листа "Ден.поток": без подписи выплаты и без
+    номера серии в конце ("Интерскол КЛС БО-03 (купон 🏷️)" -> "Интерскол КЛС").
+    Только запасной вариант для бумаг, эмитент которых не известен из описания бумаги.
+    """
+    issue = names.str.replace(r"\s*\([^()]*\)$", "", regex=True)
+    issuer = issue.str.replace(r"(\s+\S*\d\S*)+$", "", regex=True)
+    return issuer.where(issuer != "", issue)
+
+
+def summarize_cash_flow(
+    cash_flow: list[list[Any]], issuers: dict[str, str] | None = None
+) -> CashFlowSummary:
+    """
+    Сводки денежного потока портфеля: по месяцам (все месяцы подряд), по годам,
+    по эмитентам и нарастающий итог. Купоны и выплаты номинала считаются раздельно.
+    issuers - словарь ISIN -> эмитент (MOEX.issuers), для остальных бумаг эмитент
+    определяется по наименованию выпуска (issuer_names).
+    """
+    flows = pd.DataFrame(cash_flow, columns=["name", "isin", "date", "value"])
+    flows["date"] = pd.to_datetime(flows["date"])
+    flows["value"] = pd.to_numeric(flows["value"]).fillna(0)
+    flows["kind"] = np.where(
+        flows["name"].str.endswith(f"({COUPON_KIND})"), "coupons", "payments"
+    )
+
+    monthly = _by_kind(flows, flows["date"].dt.to_period("M").dt.to_timestamp())
+    if not monthly.empty:
+        monthly = monthly.reindex(
+            pd.date_range(monthly.index.min(), monthly.index.max(), freq="MS"),
+            fill_value=0,
+        )
+    monthly.index.name = "month"
+    yearly = _by_kind(flows, flows["date"].dt.year.rename("year"))
+    issuer = flows["isin"].map(issuers or {}).fillna(issuer_names(flows["name"]))
+    issuers = _by_kind(flows, issuer.rename("issuer"))
+    cumulative = pd.DataFrame(
+        {"total": monthly["total"], "cumulative": monthly["total"].cumsum()}
+    )
+    return CashFlowSummary(
+        monthly=monthly.reset_index(),
+        yearly=yearly.reset_index(),
+        issuers=issuers.sort_values("total", ascending=False).reset_index(),
+        cumulative=cumulative.reset_index(),
+    )
+
+
+def _by_kind(flows: pd.DataFrame, key: pd.Series) -> pd.DataFrame:
+    table = (
+        flows.groupby([key, flows["kind"]])["value"]
+        .sum()
+        .unstack(fill_value=0)
+        .reindex(columns=["coupons", "payments"], fill_value=0)
+    )
+    table.columns.name = None
+    table["total"] = table["coupons"] + table["payments"]
+    return table
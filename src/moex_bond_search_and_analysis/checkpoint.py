@@ -0,0 +1,83 @@
+import hashlib
+import json
+import sqlite3
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any
+
+from moex_bond_search_and_analysis.consts import DATE_FORMAT
+from moex_bond_search_and_analysis.schemas import Bond, SearchByCriteriaConditions
+from moex_bond_search_and_analysis.storage import SQLiteStore
+
+# Рыночные данные бумаги, при изменении которых она проверяется заново
+MARKET_FIELDS = ("price", "yield_", "duration", "board_id")
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha1(
+        json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode()
+    ).hexdigest()
+
+
+class ScanCheckpoint(SQLiteStore):
+    """
+    Контрольная точка поиска облигаций (SQLite).
+    Для каждой проверенной бумаги хранится результат дообогащения: облигация или отказ.
+    В тот же день результат берётся повторно без условий, в другие дни - только если
+    рыночные данные бумаги не изменились. Смена условий поиска сбрасывает всё.
+    """
+
+    def __init__(self, path: str = ".moex_scan_checkpoint.sqlite"):
+        super().__init__(path)
+
+    def _create_schema(self, connection: sqlite3.Connection) -> None:
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS scan_results ("
+            "secid TEXT PRIMARY KEY, scan_date TEXT NOT NULL, conditions_key TEXT NOT NULL, "
+            "market_key TEXT NOT NULL, bond TEXT)"
+        )
+
+    def load(
+        self, candidates: list[dict[str, Any]], conditions: SearchByCriteriaConditions
+    ) -> dict[str, Bond | None]:
+        """Результаты, которые можно взять повторно: secid -> облигация или None (отказ)."""
+        today = datetime.now().strftime(DATE_FORMAT)
+        conditions_key = _digest(asdict(conditions))
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT secid, scan_date, market_key, bond FROM scan_results WHERE conditions_key = ?",
+                (conditions_key,),
+            ).fetchall()
+        stored = {row[0]: row[1:] for row in rows}
+
+        results = {}
+        for candidate in candidates:
+            row = stored.get(candidate["secid"])
+            if row is None:
+                continue
+            scan_date, market_key, bond = row
+            if scan_date == today or market_key == self.market_key(candidate):
+                results[candidate["secid"]] = Bond(**json.loads(bond)) if bond else None
+        return results
+
+    def save(
+        self,
+        candidate: dict[str, Any],
+        conditions: SearchByCriteriaConditions,
+        bond: Bond | None,
+    ) -> None:
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO scan_results VALUES (?, ?, ?, ?, ?)",
+                (
+                    candidate["secid"],
+                    datetime.now().strftime(DATE_FORMAT),
+                    _digest(asdict(conditions)),
+                    self.market_key(candidate),
+                    json.dumps(asdict(bond), ensure_ascii=False) if bond else None,
+                ),
+            )
+            self.connection.commit()
+
+    def market_key(self, candidate: dict[str, Any]) -> str:
+        return _digest([candidate.get(field) for field in MARKET_FIELDS])
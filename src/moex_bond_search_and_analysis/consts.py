@@ -1,6 +1,9 @@
 DATETIME_FORMAT = "%d.%m.%Y %H:%M:%S"
 DATE_FORMAT = "%Y-%m-%d"
 
+# Адрес ISS API Мосбиржи, для нагрузочных тестов подменяется локальным mock_iss
+ISS_BASE_URL = "https://iss.moex.com"
+
 MONTH_NAMES_RU_FULL = [
     "Январь",
     "Февраль",
@@ -0,0 +1,112 @@
+import sqlite3
+from collections.abc import Iterable, Sequence
+from datetime import datetime
+
+from moex_bond_search_and_analysis.consts import DATE_FORMAT
+from moex_bond_search_and_analysis.storage import SQLiteStore
+
+
+class HistoryStore(SQLiteStore):
+    """
+    Локальная история торгов облигаций (SQLite), только дописывается.
+    Строки хранятся по режиму торгов, бумаге и дате в колонках liquidity.HISTORY_COLUMNS.
+    Отдельно запоминаются дни, история режима за которые загружена целиком (в том числе
+    выходные без торгов), - такие дни повторно не запрашиваются. Сегодняшний день полным
+    не считается: история за него появляется только после окончания торгов.
+    """
+
+    def __init__(self, path: str = ".moex_history.sqlite"):
+        super().__init__(path)
+
+    def _create_schema(self, connection: sqlite3.Connection) -> None:
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            "board_id TEXT NOT NULL, secid TEXT NOT NULL, trade_date TEXT NOT NULL, "
+            "volume INTEGER, numtrades INTEGER, value REAL, "
+            "PRIMARY KEY (board_id, secid, trade_date)) WITHOUT ROWID"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS board_days ("
+            "board_id TEXT NOT NULL, trade_date TEXT NOT NULL, "
+            "PRIMARY KEY (board_id, trade_date)) WITHOUT ROWID"
+        )
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(history)")}
+        if "value" not in columns:
+            # Хранилище без оборота: дни загружаются заново, чтобы оборот появился
+            connection.execute("ALTER TABLE history ADD COLUMN value REAL")
+            connection.execute("DELETE FROM board_days")
+
+    def missing_days(self, board: str, dates: Sequence[str]) -> list[str]:
+        """Дни из dates, история режима за которые ещё не загружена целиком."""
+        if not dates:
+            return []
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT trade_date FROM board_days WHERE board_id = ? AND trade_date BETWEEN ? AND ?",
+                (board, min(dates), max(dates)),
+            ).fetchall()
+        stored = {row[0] for row in rows}
+        return [date for date in dates if date not in stored]
+
+    def append(
+        self,
+        rows: Iterable[Sequence],
+        complete_days: Iterable[tuple[str, str]] = (),
+    ) -> None:
+        """
+        Дописывает строки (BOARDID, SECID, TRADEDATE, VOLUME, NUMTRADES, VALUE).
+        complete_days - пары (режим, дата), история за которые загружена полностью.
+        """
+        today = datetime.now().strftime(DATE_FORMAT)
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO history VALUES (?, ?, ?, ?, ?, ?)",
+                (tuple(row) for row in rows),
+            )
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO board_days VALUES (?, ?)",
+                (day for day in complete_days if day[1] < today),
+            )
+
+    def rows(
+        self, securities: dict[str, str], date_from: str, date_till: str
+    ) -> list[tuple]:
+        """
+        История бумаг за период: securities - словарь secid -> boardid,
+        для каждой бумаги берутся только строки её режима торгов.
+        """
+        if not securities:
+            return []
+        with self._lock:
+            # Список бумаг передаётся временной таблицей, чтобы не упираться в лимит параметров
+            with self.connection:
+                self.connection.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS wanted (board_id TEXT, secid TEXT)"
+                )
+                self.connection.execute("DELETE FROM wanted")
+                self.connection.executemany(
+                    "INSERT INTO wanted VALUES (?, ?)",
+                    ((board, secid) for secid, board in securities.items()),
+                )
+            return self.connection.execute(
+                "SELECT h.board_id, h.secid, h.trade_date, h.volume, h.numtrades, h.value "
+                "FROM wanted w JOIN history h ON h.board_id = w.board_id AND h.secid = w.secid "
+                "WHERE h.trade_date BETWEEN ? AND ? ORDER BY h.secid, h.trade_date",
+                (date_from, date_till),
+            ).fetchall()
+
+    def trading_days(
+        self, boards: Iterable[str], date_from: str, date_till: str
+    ) -> list[str]:
+        """Дни периода, за которые в истории режимов boards есть хотя бы одна строка."""
+        boards = list(boards)
+        if not boards:
+            return []
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT DISTINCT trade_date FROM history "
+                f"WHERE board_id IN ({', '.join('?' * len(boards))}) "
+                "AND trade_date BETWEEN ? AND ? ORDER BY trade_date",
+                (*boards, date_from, date_till),
+            ).fetchall()
+        return [row[0] for row in rows]
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import threading
+import time
+from collections.abc import Iterable
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+import requests.adapters
+
+from moex_bond_search_and_analysis.cache import CachedResponse, ResponseCache
+from moex_bond_search_and_analysis.metrics import Metrics
+from moex_bond_search_and_analysis.retry import CircuitBreaker, ErrorStats, RetryPolicy
+
+
+class RateLimiter:
+    """
+    Token bucket: общий лимит запросов к API Мосбиржи для всех потоков и корутин.
+    Токен резервируется до отправки запроса, поэтому время ответа сервера
+    перекрывается с ожиданием следующего токена, а не добавляется к нему.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate  # токенов в секунду
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Резервирует токен и возвращает, сколько секунд нужно подождать до его выдачи."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Следующий токен будет выдан не раньше чем через seconds секунд (ответ 429)."""
+        with self._lock:
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+# Лимит Мосбиржи - 50 запросов в минуту, один лимитер на весь процесс
+RATE_LIMIT_PER_MINUTE = 50
+iss_rate_limiter = RateLimiter(rate=RATE_LIMIT_PER_MINUTE / 60)
+
+
+class ISSClient:
+    """
+    Клиент ISS API Мосбиржи.
+    Все запросы проходят через общий RateLimiter, синхронные методы нужны для
+    одиночных запросов, асинхронные - для параллельной загрузки пачки ссылок.
+    Редко меняющиеся справочные данные берутся из кэша на диске, если он задан.
+    Время ответа, объём, повторы и ожидание лимитера учитываются в metrics.
+    """
+
+    # Сколько запросов может одновременно ожидать ответа сервера
+    MAX_IN_FLIGHT = 8
+    # Таймауты (подключение, чтение) в секундах
+    TIMEOUT = (5, 30)
+
+    def __init__(
+        self,
+        limiter: RateLimiter = iss_rate_limiter,
+        pool_size: int = MAX_IN_FLIGHT,
+        timeout: tuple[float, float] = TIMEOUT,
+        cache: ResponseCache | None = None,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        metrics: Metrics | None = None,
+    ):
+        self.limiter = limiter
+        self.timeout = timeout
+        self.cache = cache
+        # Одна политика повторов для всех запросов к ISS и общие счётчики ошибок
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.errors = ErrorStats()
+        self.metrics = metrics or Metrics()
+        self.session = self.__create_session(pool_size)
+
+    def __create_session(self, pool_size: int) -> requests.Session:
+        # Одна сессия с keep-alive: TCP и TLS соединения переиспользуются между запросами
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, pool_block=True
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(
+            {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+        )
+        return session
+
+    def close(self) -> None:
+        self.session.close()
+        if self.cache:
+            self.cache.close()
+
+    def get_json(self, url: str) -> Any:
+        family = endpoint_family(url)
+        cached = self._lookup(url, family)
+        if cached and cached.fresh:
+            return self._parse_json(cached.body)
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                self.circuit_breaker.before_request()
+                self.metrics.observe_rate_limit_wait(family, self.limiter.acquire())
+                response = self._fetch(url, family, cached)
+                break
+            except requests.exceptions.RequestException as e:
+                time.sleep(self._retry_delay(attempt, e, family))
+        return self._accept(url, family, cached, response)
+
+    async def get_json_async(self, url: str) -> Any:
+        family = endpoint_family(url)
+        cached = self._lookup(url, family)
+        if cached and cached.fresh:
+            return self._parse_json(cached.body)
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                self.circuit_breaker.before_request()
+                self.metrics.observe_rate_limit_wait(
+                    family, await self.limiter.acquire_async()
+                )
+                response = await asyncio.to_thread(self._fetch, url, family, cached)
+                break
+            except requests.exceptions.RequestException as e:
+                await asyncio.sleep(self._retry_delay(attempt, e, family))
+        return self._accept(url, family, cached, response)
+
+    async def gather_json(self, urls: Iterable[str]) -> list[Any | Exception]:
+        """
+        Параллельно загружает все ссылки с учётом общего лимита.
+        Порядок результатов совпадает с порядком ссылок, ошибки возвращаются на месте результата.
+        """
+        semaphore = asyncio.Semaphore(self.MAX_IN_FLIGHT)
+
+        async def fetch(url: str) -> Any:
+            async with semaphore:
+                return await self.get_json_async(url)
+
+        return await asyncio.gather(
+            *(fetch(url) for url in urls), return_exceptions=True
+        )
+
+    def fetch_all_json(self, urls: Iterable[str]) -> list[Any | Exception]:
+        """Синхронная обёртка над gather_json."""
+        return asyncio.run(self.gather_json(urls))
+
+    def _parse_json(self, text: str) -> Any:
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            self.errors.add("invalid_responses")
+            # Ошибка разбора остаётся RequestException, как у response.json()
+            raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos)
+
+    def _lookup(self, url: str, family: str) -> CachedResponse | None:
+        if not self.cache:
+            return None
+        cached = self.cache.lookup(url, family)
+        # Попадания и промахи считаются только для классов ссылок, которые кэшируются
+        if self.cache.is_cacheable(family):
+            self.metrics.observe_cache(family, hit=bool(cached and cached.fresh))
+        return cached
+
+    def _retry_delay(self, attempt: int, error: Exception, family: str) -> float:
+        """
+        Учитывает ошибку и возвращает паузу перед следующей попыткой.
+        Если ошибка не временная или попытки закончились - пробрасывает её дальше.
+        """
+        counter = self.retry_policy.classify(error)
+        self.errors.add(counter)
+        retryable = self.retry_policy.is_retryable(error)
+        if retryable:
+            self.circuit_breaker.record_failure()
+        if not retryable or attempt >= self.retry_policy.max_attempts:
+            self.errors.add("failed")
+            self.metrics.observe_error(family, retried=False)
+            raise error
+
+        self.metrics.observe_error(family, retried=True)
+
+        self.errors.add("retries")
+        delay = self.retry_policy.delay(attempt, error)
+        if counter == "rate_limited":
+            # Сервер просит снизить темп - притормаживаем общий лимитер для всех потоков
+            self.limiter.pause(delay)
+            return 0.0
+        return delay
+
+    def _fetch(
+        self, url: str, family: str, cached: CachedResponse | None
+    ) -> requests.Response:
+        # Устаревшую запись кэша проверяем условным запросом (ETag / Last-Modified)
+        headers = cached.validators if cached else {}
+        start = time.monotonic_ns()
+        response = self.session.get(url, timeout=self.timeout, headers=headers)
+        self.metrics.observe_request(
+            family,
+            time.monotonic_ns() - start,
+            len(response.content),
+            response.status_code,
+        )
+        if response.status_code < 500 and response.status_code != 429:
+            self.circuit_breaker.record_success()
+        if not (cached and response.status_code == 304):
+            response.raise_for_status()
+        return response
+
+    def _accept(
+        self,
+        url: str,
+        family: str,
+        cached: CachedResponse | None,
+        response: requests.Response,
+    ) -> Any:
+        """
+        Разбор ответа сервера. В кэш попадает только ответ, который удалось разобрать:
+        страница техработ с кодом 200 не должна отдаваться из кэша весь срок его жизни.
+        """
+        if cached and response.status_code == 304:
+            self.cache.refresh(url)
+            return self._parse_json(cached.body)
+        data = self._parse_json(response.text)
+        if self.cache:
+            self.cache.store(
+                url,
+                family,
+                response.text,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        return data
+
+
+def endpoint_family(url: str) -> str:
+    """Класс запроса к ISS: от него зависят время жизни кэша и учёт статистики."""
+    path = urlsplit(url).path
+    if path.startswith("/iss/history/"):
+        return "history"
+    if "/bondization/" in path:
+        return "bondization"
+    if "/boardgroups/" in path:
+        return "boardgroups"
+    if path.startswith("/iss/securities"):
+        return "securities"
+    return "marketdata"
@@ -0,0 +1,138 @@
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from moex_bond_search_and_analysis.schemas import SearchByCriteriaConditions
+
+HISTORY_COLUMNS = ["BOARDID", "SECID", "TRADEDATE", "VOLUME", "NUMTRADES", "VALUE"]
+# Меньше этого числа торговых дней в окне - бумага считается неликвидной
+MIN_TRADING_DAYS = 6
+# Перцентиль дневного объёма для условия percentile_volume_more
+VOLUME_PERCENTILE = 25
+# Скользящее окно для условия rolling_volume_more, торговых дней
+ROLLING_DAYS = 5
+
+
+def build_history_matrices(
+    history_rows: Sequence[Sequence],
+    securities: dict[str, str],
+    dates: Sequence[str] = (),
+) -> dict[str, pd.DataFrame]:
+    """
+    Матрицы (secid × дата) объёма, числа сделок и оборота из истории торгов по режимам.
+    securities - словарь secid -> boardid: для каждой бумаги берутся только строки её режима торгов.
+    Колонки - торговые дни dates (trading_days), по умолчанию - дни, в которые по бумагам
+    были торги. Общий список торговых дней нужен, чтобы дни без сделок по бумаге считались
+    одинаково и по истории всего режима, и по истории одной бумаги.
+    У всех матриц одинаковые строки и колонки, бумаги без торгов в окне - строки из NaN.
+    """
+    history = pd.DataFrame(list(history_rows), columns=HISTORY_COLUMNS)
+    boards = pd.Series(securities, name="BOARDID").rename_axis("SECID").reset_index()
+    history = history.merge(boards, on=["BOARDID", "SECID"], how="inner")
+    matrices = history.pivot_table(
+        index="SECID",
+        columns="TRADEDATE",
+        values=["VOLUME", "NUMTRADES", "VALUE"],
+        aggfunc="sum",
+    )
+    dates = sorted(dates or set(history["TRADEDATE"]))
+    return {
+        column: matrices[column]
+        .reindex(index=list(securities), columns=dates)
+        .astype(float)
+        if column in matrices
+        else pd.DataFrame(np.nan, index=list(securities), columns=dates)
+        for column in ("VOLUME", "NUMTRADES", "VALUE")
+    }
+
+
+def trading_days(history_rows: Sequence[Sequence], boards: Iterable[str]) -> list[str]:
+    """
+    Торговые дни режимов boards: дни, за которые в истории режима есть хотя бы одна строка
+    (ISS отдаёт строки и по бумагам без сделок, с нулевым объёмом).
+    """
+    boards = set(boards)
+    return sorted({row[2] for row in history_rows if row[0] in boards})
+
+
+def build_volume_matrix(
+    history_rows: Sequence[Sequence], securities: dict[str, str]
+) -> pd.DataFrame:
+    """Матрица объёмов (secid × дата), см. build_history_matrices."""
+    return build_history_matrices(history_rows, securities)["VOLUME"]
+
+
+def liquidity_flags(matrix: pd.DataFrame, threshold_value: int) -> pd.DataFrame:
+    """
+    Признак низкой ликвидности и суммарный объём сразу для всех бумаг матрицы.
+    low_liquid = 1, если хотя бы в один торговый день объём меньше порога
+    или торговых дней в окне меньше MIN_TRADING_DAYS.
+    """
+    volumes = matrix.to_numpy(dtype=float)
+    traded = ~np.isnan(volumes)
+    days = traded.sum(axis=1)
+    below_threshold = np.any(traded & (volumes < threshold_value), axis=1)
+    low_liquid = below_threshold | (days < MIN_TRADING_DAYS)
+    return pd.DataFrame(
+        {
+            "low_liquid": low_liquid.astype(int),
+            "value": np.nansum(volumes, axis=1).astype(int),
+            "days": days,
+        },
+        index=matrix.index,
+    )
+
+
+def rolling_volume(matrix: pd.DataFrame, days: int = ROLLING_DAYS) -> pd.DataFrame:
+    """
+    Объём за каждые days торговых дней подряд (скользящая сумма по строкам матрицы,
+    дни без сделок - 0). Колонка - последний день окна, первые days - 1 колонок отбрасываются.
+    """
+    volumes = np.nan_to_num(matrix.to_numpy(dtype=float))
+    totals = np.cumsum(volumes, axis=1)
+    totals[:, days:] = totals[:, days:] - totals[:, :-days]
+    return pd.DataFrame(
+        totals[:, days - 1 :], index=matrix.index, columns=matrix.columns[days - 1 :]
+    )
+
+
+def liquidity_metrics(matrices: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Метрики ликвидности сразу для всех бумаг по матрицам build_history_matrices.
+    Дни окна без сделок по бумаге считаются днями с нулевым объёмом.
+    """
+    volumes = np.nan_to_num(matrices["VOLUME"].to_numpy(dtype=float))
+    rolling = rolling_volume(matrices["VOLUME"]).to_numpy()
+    has_days = volumes.shape[1] > 0
+    return pd.DataFrame(
+        {
+            "numtrades": np.nansum(
+                matrices["NUMTRADES"].to_numpy(dtype=float), axis=1
+            ).astype(int),
+            "median_volume": np.median(volumes, axis=1) if has_days else 0.0,
+            "percentile_volume": (
+                np.percentile(volumes, VOLUME_PERCENTILE, axis=1) if has_days else 0.0
+            ),
+            "rolling_volume": rolling.min(axis=1) if rolling.shape[1] else 0.0,
+            "zero_volume_days": (volumes == 0).sum(axis=1),
+            "turnover": np.nansum(matrices["VALUE"].to_numpy(dtype=float), axis=1),
+        },
+        index=matrices["VOLUME"].index,
+    )
+
+
+def liquidity_conditions_mask(
+    metrics: pd.DataFrame, conditions: SearchByCriteriaConditions
+) -> pd.Series:
+    """Дополнительные условия ликвидности сразу для всех бумаг (по умолчанию проходят все)."""
+    mask = (
+        (metrics["numtrades"] >= conditions.numtrades_more)
+        & (metrics["median_volume"] >= conditions.median_volume_more)
+        & (metrics["percentile_volume"] >= conditions.percentile_volume_more)
+        & (metrics["rolling_volume"] >= conditions.rolling_volume_more)
+        & (metrics["turnover"] >= conditions.turnover_more)
+    )
+    if conditions.zero_volume_days_max is not None:
+        mask &= metrics["zero_volume_days"] <= conditions.zero_volume_days_max
+    return mask
@@ -1,11 +1,47 @@
 import logging
 import sys
+from collections import deque
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(slots=True)
+class LogRecord:
+    """
+    Запись лога. Текст собирается только при выводе (message % args),
+    поэтому трассировка, которая не выводится в консоль, почти ничего не стоит.
+    """
+
+    level: int
+    message: str
+    args: tuple[Any, ...] = ()
+    event: str | None = None  # тип события, например "volume" или "payments"
+    secid: str | None = None
+
+    @property
+    def text(self) -> str:
+        return self.message % self.args if self.args else self.message
 
 
 class Logger:
-    def __init__(self, name: str, format: str, store: bool = True):
+    # Сколько последних записей хранится для листа "Лог", более ранние вытесняются
+    MAX_RECORDS = 50_000
+
+    def __init__(
+        self,
+        name: str,
+        format: str,
+        store: bool = True,
+        max_records: int = MAX_RECORDS,
+        verbose: bool = False,
+    ):
         self.log = self.__get_logger(name, format)
-        self.messages = [] if store else None
+        self.records: deque[LogRecord] | None = (
+            deque(maxlen=max_records) if store else None
+        )
+        self.dropped = 0
+        self.verbose = verbose
 
     def __get_logger(self, name: str, format: str) -> logging.Logger:
         handler = logging.StreamHandler(sys.stdout)
@@ -17,15 +53,53 @@ class Logger:
         log.addHandler(handler)
         return log
 
-    def info(self, message: str):
-        if self.messages is not None:
+    @property
+    def verbose(self) -> bool:
+        return self.log.isEnabledFor(logging.DEBUG)
+
+    @verbose.setter
+    def verbose(self, value: bool) -> None:
+        # В подробном режиме в консоль выводится и трассировка по каждой бумаге (уровень DEBUG),
+        # в записи для листа "Лог" она попадает всегда
+        self.log.setLevel(logging.DEBUG if value else logging.INFO)
+
+    @property
+    def messages(self) -> None | list[str]:
+        if self.records is None:
+            return None
+        return list(self.__iter_messages())
+
+    def info(self, message: str, *args: Any, **context: Any) -> None:
+        self.__emit(logging.INFO, message, args, **context)
+
+    def debug(self, message: str, *args: Any, **context: Any) -> None:
+        self.__emit(logging.DEBUG, message, args, **context)
+
+    def __emit(
+        self,
+        level: int,
+        message: str,
+        args: tuple[Any, ...],
+        event: str | None = None,
+        secid: str | None = None,
+    ) -> None:
+        if self.records is not None:
+            if len(self.records) == self.records.maxlen:
+                self.dropped += 1
+            self.records.append(LogRecord(level, message, args, event, secid))
+        if self.log.isEnabledFor(level):
+            self.log.log(level, message, *args)
+
+    def __iter_messages(self) -> Iterator[str]:
+        if self.dropped:
+            yield f"... пропущено ранних записей: {self.dropped}"
+        for record in self.records or ():
+            message = record.text
             if message.startswith("\n"):
-                self.messages.append("")
-            self.messages.append(message)
+                yield ""
+            yield message
             if message.endswith("\n"):
-                self.messages.append("")
-
-        self.log.info(message)
+                yield ""
 
 
 # main_log = Logger(name="main", format="%(asctime)s - %(levelname)s - %(message)s", store=True)
@@ -0,0 +1,174 @@
+import bisect
+import json
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+# Верхние границы корзин гистограммы времени ответа ISS, секунды
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+@dataclass
+class EndpointMetrics:
+    """Счётчики запросов к одному классу ссылок ISS (history, bondization, ...)."""
+
+    requests: int = 0  # ответы сервера, включая 304 и ошибки HTTP
+    not_modified: int = 0  # ответы 304 на условный запрос
+    bytes: int = 0  # размер тел ответов (после распаковки gzip)
+    retries: int = 0
+    errors: int = 0  # ошибки запросов, в том числе потом повторённые
+    cache_hits: int = 0  # ответ взят из кэша без запроса к серверу
+    cache_misses: int = 0
+    rate_limit_wait_ns: int = 0  # ожидание токена лимитера, включая паузы после 429
+    latency_ns: int = 0  # суммарное время ответа сервера
+    latency_buckets: list[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+    )
+
+    @property
+    def cache_hit_rate(self) -> float | None:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else None
+
+
+class Metrics:
+    """
+    Метрики одного запуска: запросы к ISS по классам ссылок и длительность этапов обработки.
+    В конце запуска сохраняются в JSON и в текстовом формате Prometheus.
+    """
+
+    def __init__(self):
+        self.endpoints: dict[str, EndpointMetrics] = defaultdict(EndpointMetrics)
+        self.stages_ns: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def observe_request(
+        self, family: str, latency_ns: int, size: int, status_code: int
+    ) -> None:
+        with self._lock:
+            endpoint = self.endpoints[family]
+            endpoint.requests += 1
+            endpoint.not_modified += status_code == 304
+            endpoint.bytes += size
+            endpoint.latency_ns += latency_ns
+            endpoint.latency_buckets[
+                bisect.bisect_left(LATENCY_BUCKETS, latency_ns / 1e9)
+            ] += 1
+
+    def observe_cache(self, family: str, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.endpoints[family].cache_hits += 1
+            else:
+                self.endpoints[family].cache_misses += 1
+
+    def observe_error(self, family: str, retried: bool) -> None:
+        with self._lock:
+            self.endpoints[family].errors += 1
+            self.endpoints[family].retries += retried
+
+    def observe_rate_limit_wait(self, family: str, seconds: float) -> None:
+        if not seconds:
+            return
+        with self._lock:
+            self.endpoints[family].rate_limit_wait_ns += int(seconds * 1e9)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Замер этапа обработки (fetch, pricing, filter, enrich, export), повторные замеры суммируются."""
+        start = time.monotonic_ns()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic_ns() - start
+            with self._lock:
+                self.stages_ns[name] += elapsed
+
+    def as_dict(self) -> dict[str, Any]:
+        with self._lock:
+            endpoints = {
+                family: {
+                    **asdict(endpoint),
+                    "cache_hit_rate": endpoint.cache_hit_rate,
+                    "latency_buckets": dict(
+                        zip(
+                            [*map(str, LATENCY_BUCKETS), "+Inf"],
+                            endpoint.latency_buckets,
+                        )
+                    ),
+                }
+                for family, endpoint in sorted(self.endpoints.items())
+            }
+            return {"endpoints": endpoints, "stages_ns": dict(self.stages_ns)}
+
+    def to_prometheus(self) -> str:
+        data = self.as_dict()
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        counters = {
+            "requests": "Ответы сервера ISS",
+            "not_modified": "Ответы 304 на условный запрос",
+            "bytes": "Размер тел ответов, байт",
+            "retries": "Повторные попытки запросов",
+            "errors": "Ошибки запросов",
+            "cache_hits": "Ответы из кэша без запроса к серверу",
+            "cache_misses": "Промахи кэша",
+        }
+        for counter, help_text in counters.items():
+            name = f"moex_iss_{counter}_total"
+            metric(name, "counter", help_text)
+            for family, endpoint in data["endpoints"].items():
+                lines.append(f'{name}{{family="{family}"}} {endpoint[counter]}')
+
+        metric(
+            "moex_iss_rate_limit_wait_seconds_total",
+            "counter",
+            "Ожидание лимитера запросов, секунд",
+        )
+        for family, endpoint in data["endpoints"].items():
+            lines.append(
+                f'moex_iss_rate_limit_wait_seconds_total{{family="{family}"}} '
+                f"{endpoint['rate_limit_wait_ns'] / 1e9:.6f}"
+            )
+
+        metric(
+            "moex_iss_request_duration_seconds", "histogram", "Время ответа сервера ISS"
+        )
+        for family, endpoint in data["endpoints"].items():
+            cumulative = 0
+            for bound, count in endpoint["latency_buckets"].items():
+                cumulative += count
+                lines.append(
+                    f'moex_iss_request_duration_seconds_bucket{{family="{family}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'moex_iss_request_duration_seconds_sum{{family="{family}"}} '
+                f"{endpoint['latency_ns'] / 1e9:.6f}"
+            )
+            lines.append(
+                f'moex_iss_request_duration_seconds_count{{family="{family}"}} {endpoint["requests"]}'
+            )
+
+        metric("moex_stage_duration_seconds", "gauge", "Длительность этапа обработки")
+        for stage, elapsed in data["stages_ns"].items():
+            lines.append(
+                f'moex_stage_duration_seconds{{stage="{stage}"}} {elapsed / 1e9:.6f}'
+            )
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> list[str]:
+        """Сохраняет метрики в path.json и path.prom, возвращает имена файлов."""
+        json_path, prom_path = f"{path}.json", f"{path}.prom"
+        with open(json_path, "w", encoding="utf-8") as file:
+            json.dump(self.as_dict(), file, ensure_ascii=False, indent=2)
+        with open(prom_path, "w", encoding="utf-8") as file:
+            file.write(self.to_prometheus())
+        return [json_path, prom_path]
@@ -0,0 +1,694 @@
+import argparse
+import gzip
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Self
+from urllib.parse import parse_qs, urlsplit
+
+from moex_bond_search_and_analysis.consts import DATE_FORMAT
+
+# Группы режимов торгов (как в MOEX.BOARD_GROUPS) и режим торгов каждой группы
+GROUP_BOARDS = {
+    58: "TQCB",
+    193: "TQOB",
+    105: "TQIR",
+    77: "TQOD",
+    207: "TQOE",
+    167: "TQOY",
+    245: "TQRD",
+}
+SECURITIES_COLUMNS = [
+    "SECID",
+    "BOARDID",
+    "SHORTNAME",
+    "PREVWAPRICE",
+    "YIELDATPREVWAPRICE",
+    "COUPONVALUE",
+    "NEXTCOUPON",
+    "ACCRUEDINT",
+    "PREVPRICE",
+    "LOTSIZE",
+    "FACEVALUE",
+    "STATUS",
+    "MATDATE",
+    "COUPONPERIOD",
+    "PREVLEGALCLOSEPRICE",
+    "SECNAME",
+    "ISIN",
+    "FACEUNIT",
+    "COUPONPERCENT",
+    "PREVDATE",
+]
+MARKETDATA_COLUMNS = ["SECID", "BOARDID", "LAST", "YIELD", "DURATION", "NUMTRADES"]
+HISTORY_COLUMNS = [
+    "BOARDID",
+    "TRADEDATE",
+    "SHORTNAME",
+    "SECID",
+    "NUMTRADES",
+    "VALUE",
+    "CLOSE",
+    "LEGALCLOSEPRICE",
+    "ACCINT",
+    "WAPRICE",
+    "VOLUME",
+    "YIELDCLOSE",
+    "DURATION",
+    "FACEVALUE",
+    "FACEUNIT",
+]
+CURSOR_COLUMNS = ["INDEX", "TOTAL", "PAGESIZE"]
+COUPON_COLUMNS = [
+    "isin",
+    "name",
+    "issuevalue",
+    "coupondate",
+    "recorddate",
+    "startdate",
+    "initialfacevalue",
+    "facevalue",
+    "faceunit",
+    "value",
+    "valueprc",
+    "value_rub",
+    "secid",
+    "primary_boardid",
+]
+AMORTIZATION_COLUMNS = [
+    "isin",
+    "name",
+    "issuevalue",
+    "amortdate",
+    "facevalue",
+    "initialfacevalue",
+    "faceunit",
+    "valueprc",
+    "value",
+    "value_rub",
+    "data_source",
+    "secid",
+    "primary_boardid",
+]
+DESCRIPTION_COLUMNS = ["name", "title", "value", "type", "sort_order", "is_hidden"]
+BOARDS_COLUMNS = [
+    "secid",
+    "boardid",
+    "title",
+    "board_group_id",
+    "market",
+    "engine",
+    "is_traded",
+    "is_primary",
+    "currencyid",
+]
+SEARCH_COLUMNS = [
+    "id",
+    "secid",
+    "shortname",
+    "regnumber",
+    "name",
+    "isin",
+    "is_traded",
+    "emitent_id",
+    "emitent_title",
+    "emitent_inn",
+    "type",
+    "group",
+    "primary_boardid",
+]
+# Размер страницы истории торгов в ISS
+HISTORY_PAGE_SIZE = 100
+# Сколько купонов отдаёт bondization без параметра limit
+BONDIZATION_PAGE_SIZE = 20
+
+
+@dataclass
+class SyntheticBond:
+    secid: str
+    name: str
+    group: int
+    board: str
+    price: float
+    yield_: float
+    duration_days: int
+    face_value: float
+    accrued_interest: float
+    daily_volume: int
+    qualified: bool
+    coupon_dates: list[str] = field(default_factory=list)
+    coupon_value: float | None = None
+
+    @property
+    def isin(self) -> str:
+        return f"RU{self.secid[2:]}"
+
+    @property
+    def issuer(self) -> str:
+        return self.name.split(" БО-")[0]
+
+    @property
+    def maturity(self) -> str:
+        return self.coupon_dates[-1]
+
+
+class ISSCorpus:
+    """
+    Синтетические данные в формате ISS API: группы режимов торгов, история торгов по дням
+    и по бумаге, купоны и амортизации, описание и поиск бумаг.
+    Ответы учитывают iss.only, <блок>.columns, start/limit, iss.json=extended и callback.
+    Данные детерминированы seed и отсчитываются от текущей даты.
+    """
+
+    def __init__(self, bonds: int = 10_000, coupons_per_bond: int = 20, seed: int = 1):
+        rng = random.Random(seed)
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.trading_days = [
+            day.strftime(DATE_FORMAT)
+            for day in (today - timedelta(days=i) for i in range(30, -1, -1))
+            if day.weekday() < 5
+        ]
+        # Предыдущий торговый день - дата PREVPRICE в списке бумаг режима
+        self.previous_day = [
+            day for day in self.trading_days if day < today.strftime(DATE_FORMAT)
+        ][-1]
+        self.bonds: dict[str, SyntheticBond] = {}
+        self.by_board: dict[str, list[SyntheticBond]] = {}
+        groups = list(GROUP_BOARDS)
+        for i in range(bonds):
+            group = groups[i % len(groups)]
+            period = rng.choice([30, 91, 182])
+            first_coupon = today + timedelta(days=rng.randint(1, period))
+            bond = SyntheticBond(
+                secid=f"RU000A{i:06d}",
+                name=f'ООО "Эмитент {i // 3}" БО-{i % 3 + 1:02d}',
+                group=group,
+                board=GROUP_BOARDS[group],
+                price=round(rng.uniform(60, 125), 2),
+                yield_=round(rng.uniform(5, 45), 2),
+                duration_days=rng.randint(30, 900),
+                face_value=1000.0,
+                accrued_interest=round(rng.uniform(0, 40), 2),
+                # Примерно половина бумаг проходит фильтр оборота по умолчанию
+                daily_volume=int(rng.lognormvariate(8.5, 1.5)),
+                qualified=rng.random() < 0.2,
+                # Два купона уже выплачены, остальные в будущем
+                coupon_dates=[
+                    (first_coupon + timedelta(days=period * n)).strftime(DATE_FORMAT)
+                    for n in range(-2, coupons_per_bond - 2)
+                ],
+                coupon_value=None
+                if rng.random() < 0.1
+                else round(rng.uniform(5, 60), 2),
+            )
+            self.bonds[bond.secid] = bond
+            self.by_board.setdefault(bond.board, []).append(bond)
+
+    def respond(self, url: str) -> tuple[int, str]:
+        """Статус и тело ответа для ссылки ISS (полной или только пути с параметрами)."""
+        parts = urlsplit(url)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        for pattern, handler in ROUTES:
+            match = pattern.fullmatch(parts.path)
+            if match:
+                blocks = handler(self, query, **match.groupdict())
+                if blocks is None:
+                    return 404, "{}"
+                return 200, _render(blocks, query)
+        return 404, "{}"
+
+    def board_group(self, query: dict, group: str) -> dict | None:
+        if int(group) not in GROUP_BOARDS:
+            return None
+        bonds = self.by_board[GROUP_BOARDS[int(group)]]
+        return {
+            "securities": _table(
+                SECURITIES_COLUMNS, [self.__securities_row(b) for b in bonds]
+            ),
+            "marketdata": _table(
+                MARKETDATA_COLUMNS,
+                [
+                    [b.secid, b.board, b.price, b.yield_, b.duration_days, 10]
+                    for b in bonds
+                ],
+            ),
+        }
+
+    def board_history(self, query: dict, board: str) -> dict:
+        date = query.get("date", self.trading_days[-1])
+        rows = []
+        if date in self.trading_days:
+            rows = [self.__history_row(b, date) for b in self.by_board.get(board, [])]
+        return _page("history", HISTORY_COLUMNS, rows, query, HISTORY_PAGE_SIZE)
+
+    def security_history(self, query: dict, board: str, secid: str) -> dict | None:
+        bond = self.bonds.get(secid)
+        if bond is None:
+            return None
+        date_from = query.get("from", "")
+        date_till = query.get("till", "9999-12-31")
+        rows = [
+            self.__history_row(bond, date)
+            for date in self.trading_days
+            # Бумага торгуется только в своём режиме
+            if bond.board == board and date_from <= date <= date_till
+        ]
+        return _page("history", HISTORY_COLUMNS, rows, query, HISTORY_PAGE_SIZE)
+
+    def bondization(self, query: dict, secid: str) -> dict | None:
+        bond = self.bonds.get(secid)
+        if bond is None:
+            return None
+        coupons = [
+            [
+                bond.isin,
+                bond.name,
+                1_000_000,
+                date,
+                date,
+                date,
+                bond.face_value,
+                bond.face_value,
+                "SUR",
+                bond.coupon_value,
+                None,
+                bond.coupon_value,
+                secid,
+                bond.board,
+            ]
+            for date in bond.coupon_dates
+        ]
+        amortizations = [
+            [
+                bond.isin,
+                bond.name,
+                1_000_000,
+                bond.maturity,
+                bond.face_value,
+                bond.face_value,
+                "SUR",
+                100,
+                bond.face_value,
+                bond.face_value,
+                "maturity",
+                secid,
+                bond.board,
+            ]
+        ]
+        start = int(query.get("start", 0))
+        limit = min(int(query.get("limit", BONDIZATION_PAGE_SIZE)), 100)
+        return {
+            "coupons": _table(COUPON_COLUMNS, coupons[start : start + limit]),
+            "amortizations": _table(
+                AMORTIZATION_COLUMNS, amortizations[start : start + limit]
+            ),
+        }
+
+    def security(self, query: dict, secid: str) -> dict | None:
+        bond = self.bonds.get(secid)
+        if bond is None:
+            return None
+        description = [
+            ["SECID", "Код ценной бумаги", secid, "string", 1, 0],
+            ["NAME", "Полное наименование", bond.name, "string", 2, 0],
+            ["ISIN", "ISIN код", bond.isin, "string", 3, 0],
+            [
+                "FACEVALUE",
+                "Номинальная стоимость",
+                str(bond.face_value),
+                "number",
+                4,
+                0,
+            ],
+            ["MATDATE", "Дата погашения", bond.maturity, "date", 5, 0],
+            ["EMITENT_TITLE", "Эмитент", bond.issuer, "string", 6, 0],
+            [
+                "ISQUALIFIEDINVESTORS",
+                "Бумаги для квалифицированных инвесторов",
+                str(int(bond.qualified)),
+                "boolean",
+                7,
+                0,
+            ],
+        ]
+        if bond.qualified:
+            description.append(
+                [
+                    "QUALINVESTORGROUP",
+                    "Требуется квалификация",
+                    "Облигации со структурным доходом",
+                    "string",
+                    8,
+                    0,
+                ]
+            )
+        boards = [
+            [
+                secid,
+                bond.board,
+                "Т+: Облигации",
+                bond.group,
+                "bonds",
+                "stock",
+                1,
+                1,
+                "SUR",
+            ],
+            [secid, "PACT", "Адресные сделки", 9, "bonds", "stock", 1, 0, "SUR"],
+        ]
+        return {
+            "description": _table(DESCRIPTION_COLUMNS, description),
+            "boards": _table(BOARDS_COLUMNS, boards),
+        }
+
+    def search(self, query: dict) -> dict:
+        text = query.get("q", "").upper()
+        found = [
+            bond
+            for bond in self.bonds.values()
+            if text in bond.secid or text in bond.name.upper()
+        ][: min(int(query.get("limit", 100)), 100)]
+        return {
+            "securities": _table(
+                SEARCH_COLUMNS,
+                [
+                    [
+                        i,
+                        b.secid,
+                        b.name[:20],
+                        None,
+                        b.name,
+                        b.isin,
+                        1,
+                        i // 3,
+                        b.issuer,
+                        None,
+                        "corporate_bond",
+                        "stock_bonds",
+                        b.board,
+                    ]
+                    for i, b in enumerate(found)
+                ],
+            )
+        }
+
+    def market_securities(self, query: dict, board: str, secid: str) -> dict | None:
+        bond = self.bonds.get(secid)
+        if bond is None:
+            return None
+        rows = [self.__securities_row(bond)] if bond.board == board else []
+        return {"securities": _table(SECURITIES_COLUMNS, rows)}
+
+    def board_securities(self, query: dict, board: str) -> dict:
+        bonds = self.by_board.get(board, [])
+        if "securities" in query:
+            secids = set(query["securities"].split(","))
+            bonds = [b for b in bonds if b.secid in secids]
+        return {
+            "securities": _table(
+                SECURITIES_COLUMNS, [self.__securities_row(b) for b in bonds]
+            )
+        }
+
+    def __securities_row(self, bond: SyntheticBond) -> list[Any]:
+        return [
+            bond.secid,
+            bond.board,
+            bond.name[:20],
+            bond.price,
+            bond.yield_,
+            bond.coupon_value,
+            bond.coupon_dates[2],
+            bond.accrued_interest,
+            bond.price,
+            1,
+            bond.face_value,
+            "A",
+            bond.maturity,
+            30,
+            bond.price,
+            bond.name,
+            bond.isin,
+            "SUR",
+            None,
+            self.previous_day,
+        ]
+
+    def __history_row(self, bond: SyntheticBond, date: str) -> list[Any]:
+        numtrades = max(1, bond.daily_volume // 500)
+        value = bond.daily_volume * bond.face_value * bond.price / 100
+        return [
+            bond.board,
+            date,
+            bond.name[:20],
+            bond.secid,
+            numtrades,
+            value,
+            bond.price,
+            bond.price,
+            bond.accrued_interest,
+            bond.price,
+            bond.daily_volume,
+            bond.yield_,
+            bond.duration_days,
+            bond.face_value,
+            "SUR",
+        ]
+
+
+BONDS = "/iss/engines/stock/markets/bonds"
+HISTORY = "/iss/history/engines/stock/markets/bonds"
+ROUTES: list[tuple[re.Pattern, Callable[..., dict | None]]] = [
+    (
+        re.compile(rf"{BONDS}/boardgroups/(?P<group>\d+)/securities\.json"),
+        ISSCorpus.board_group,
+    ),
+    (
+        re.compile(rf"{HISTORY}/boards/(?P<board>\w+)/securities\.json"),
+        ISSCorpus.board_history,
+    ),
+    (
+        re.compile(rf"{HISTORY}/boards/(?P<board>\w+)/securities/(?P<secid>\w+)\.json"),
+        ISSCorpus.security_history,
+    ),
+    (
+        re.compile(
+            r"/iss/statistics/engines/stock/markets/bonds/bondization/(?P<secid>\w+)\.json"
+        ),
+        ISSCorpus.bondization,
+    ),
+    (re.compile(r"/iss/securities/(?P<secid>\w+)\.json"), ISSCorpus.security),
+    (re.compile(r"/iss/securities\.json"), ISSCorpus.search),
+    (
+        re.compile(rf"{BONDS}/boards/(?P<board>\w+)/securities\.json"),
+        ISSCorpus.board_securities,
+    ),
+    (
+        re.compile(rf"{BONDS}/boards/(?P<board>\w+)/securities/(?P<secid>\w+)\.json"),
+        ISSCorpus.market_securities,
+    ),
+]
+
+
+def _table(columns: list[str], data: list[list[Any]]) -> dict[str, list]:
+    return {"columns": columns, "data": data}
+
+
+def _page(
+    block: str,
+    columns: list[str],
+    rows: list[list[Any]],
+    query: dict,
+    page_size: int,
+) -> dict:
+    # Как в ISS: не больше page_size строк за запрос, общее число строк - в блоке cursor
+    start = int(query.get("start", 0))
+    limit = min(int(query.get("limit", page_size)), page_size)
+    return {
+        block: _table(columns, rows[start : start + limit]),
+        f"{block}.cursor": _table(CURSOR_COLUMNS, [[start, len(rows), limit]]),
+    }
+
+
+def _render(blocks: dict[str, dict], query: dict) -> str:
+    if query.get("iss.only"):
+        only = query["iss.only"].split(",")
+        blocks = {name: table for name, table in blocks.items() if name in only}
+    for name, table in blocks.items():
+        selected = query.get(f"{name}.columns")
+        if selected:
+            index = {column.upper(): i for i, column in enumerate(table["columns"])}
+            positions = [index[column.upper()] for column in selected.split(",")]
+            blocks[name] = _table(
+                [table["columns"][i] for i in positions],
+                [[row[i] for i in positions] for row in table["data"]],
+            )
+
+    if query.get("iss.json") == "extended":
+        payload: Any = [
+            {"charsetinfo": {"name": "utf-8"}},
+            {
+                name: [dict(zip(table["columns"], row)) for row in table["data"]]
+                for name, table in blocks.items()
+            },
+        ]
+    else:
+        payload = blocks
+    body = json.dumps(payload, ensure_ascii=False)
+    if query.get("callback"):
+        body = f"{query['callback']}({body})"
+    return body
+
+
+class MockISSServer:
+    """
+    Локальный HTTP сервер с ответами ISSCorpus для нагрузочных тестов без сети.
+    Эмулирует задержку ответа, ответы 429 с Retry-After и зависшие запросы (таймауты).
+    Сбои детерминированы: 429 отдаётся каждому rate_limit_every-му запросу,
+    зависает каждый timeout_every-й.
+    """
+
+    def __init__(
+        self,
+        corpus: ISSCorpus | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit_every: int = 0,
+        retry_after: int = 1,
+        timeout_every: int = 0,
+        timeout_delay: float = 35.0,
+    ):
+        self.corpus = corpus or ISSCorpus()
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.timeout_every = timeout_every
+        self.timeout_delay = timeout_delay
+        self.requests = 0
+        self._counter = itertools.count(1)
+        self._httpd = ThreadingHTTPServer((host, port), self.__handler())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> Self:
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> Self:
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def respond(self, path: str) -> tuple[int, dict[str, str], str]:
+        number = next(self._counter)
+        self.requests = number
+        delay = self.latency
+        if self.jitter:
+            delay += random.Random(number).uniform(0, self.jitter)
+        if self.timeout_every and number % self.timeout_every == 0:
+            delay += self.timeout_delay
+        time.sleep(delay)
+        if self.rate_limit_every and number % self.rate_limit_every == 0:
+            return 429, {"Retry-After": str(self.retry_after)}, "{}"
+        status_code, body = self.corpus.respond(path)
+        return status_code, {}, body
+
+    def __handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, как у iss.moex.com
+
+            def do_GET(self):
+                status_code, headers, body = server.respond(self.path)
+                content = body.encode()
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    content = gzip.compress(content, compresslevel=1)
+                    headers["Content-Encoding"] = "gzip"
+                try:
+                    self.send_response(status_code)
+                    self.send_header("Content-Type", "application/json; charset=utf-8")
+                    self.send_header("Content-Length", str(len(content)))
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(content)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # клиент не дождался ответа (таймаут)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Локальный сервер ISS API Мосбиржи с синтетическими данными"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--bonds", type=int, default=10_000, help="число облигаций")
+    parser.add_argument("--coupons", type=int, default=20, help="купонов на облигацию")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="задержка ответа, сек"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="разброс задержки, сек"
+    )
+    parser.add_argument(
+        "--rate-limit-every", type=int, default=0, help="429 каждому N-му запросу"
+    )
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument(
+        "--timeout-every", type=int, default=0, help="зависает каждый N-й запрос"
+    )
+    parser.add_argument("--timeout-delay", type=float, default=35.0)
+    args = parser.parse_args()
+
+    server = MockISSServer(
+        corpus=ISSCorpus(
+            bonds=args.bonds, coupons_per_bond=args.coupons, seed=args.seed
+        ),
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit_every=args.rate_limit_every,
+        retry_after=args.retry_after,
+        timeout_every=args.timeout_every,
+        timeout_delay=args.timeout_delay,
+    )
+    print(f"🧪 Mock ISS: {server.url} ({args.bonds} облигаций)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,108 @@
 import json
-import time
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Any
 
 import pandas as pd
 import requests
 
-from moex_bond_search_and_analysis.consts import DATE_FORMAT, MONTH_NAMES_RU_SHORT
+from moex_bond_search_and_analysis.cashflow import (
+    COUPON_KIND,
+    PAYMENT_KIND,
+    future_cash_flow,
+    payment_flows,
+)
+from moex_bond_search_and_analysis.checkpoint import ScanCheckpoint
+from moex_bond_search_and_analysis.consts import (
+    DATE_FORMAT,
+    ISS_BASE_URL,
+    MONTH_NAMES_RU_SHORT,
+)
+from moex_bond_search_and_analysis.history import HistoryStore
+from moex_bond_search_and_analysis.iss import ISSClient
+from moex_bond_search_and_analysis.liquidity import (
+    HISTORY_COLUMNS,
+    build_history_matrices,
+    liquidity_conditions_mask,
+    liquidity_flags,
+    liquidity_metrics,
+    trading_days,
+)
 from moex_bond_search_and_analysis.logger import Logger
+from moex_bond_search_and_analysis.pricing import (
+    bond_flows,
+    build_schedule,
+    price_bonds,
+)
+from moex_bond_search_and_analysis.screening import (
+    MARKETDATA_COLUMNS,
+    SECURITIES_COLUMNS,
+    base_conditions_mask,
+    build_universe,
+)
 from moex_bond_search_and_analysis.schemas import (
+    CashFlowSchedule,
     MonthsOfPayments,
     SearchByCriteriaConditions,
+    SecurityInfo,
     Bond,
 )
 
+# Поля описания бумаги, в которых ISS отдаёт наименование эмитента
+ISSUER_FIELDS = ("EMITENT_TITLE", "EMITTER_TITLE")
+
 
 class MOEX:
 
     BOARD_GROUPS = [58, 193, 105, 77, 207, 167, 245]
-    # Переменная для задержки API запросов, лимит в 50 запросов в минуту
-    API_DELAY = 1.2
-
-    def __init__(self, log: Logger):
+    # Глубина проверки ликвидности, дней
+    LIQUIDITY_DAYS = 15
+    # Ликвидность всех кандидатов по общей истории торгов за каждый день,
+    # а не отдельным запросом истории для каждой бумаги
+    BATCH_LIQUIDITY = True
+    # Сколько облигаций дообогащается одновременно (объём, выплаты, квалификация)
+    ENRICH_WORKERS = ISSClient.MAX_IN_FLIGHT
+    # Окно поиска последней цены закрытия, дней
+    PRICE_DAYS = 10
+    # Сколько бумаг перечисляется в одной ссылке securities=...
+    SECURITIES_BATCH = 100
+    # Доходность и дюрация бумаг, для которых ISS их не отдаёт, считаются по графику выплат.
+    # Включается явно: для каждой такой бумаги нужен отдельный запрос графика выплат
+    # (ответы bondization кэшируются ResponseCache на сутки)
+    OWN_PRICING = False
+    # Больше строк каждого блока bondization (купоны, амортизации, оферты) ISS за запрос не отдаёт
+    BONDIZATION_PAGE = 100
+
+    def __init__(
+        self,
+        log: Logger,
+        client: ISSClient | None = None,
+        checkpoint: ScanCheckpoint | None = None,
+        base_url: str = ISS_BASE_URL,
+        history: HistoryStore | None = None,
+    ):
         self.log = log
+        # Адрес ISS можно заменить локальным сервером (mock_iss) для тестов без сети
+        self.base_url = base_url.rstrip("/")
+        # Все запросы к API идут через клиент с общим лимитом 50 запросов в минуту
+        # и один пул соединений с таймаутами
+        self.client = client or ISSClient()
+        self.checkpoint = checkpoint
+        # С локальной историей торгов загружаются только дни, которых в ней ещё нет
+        self.history = history
+        self._security_info: dict[str, SecurityInfo] = {}
+        # Размер лота запоминается вместе с НКД в get_bond_prices
+        self._lot_sizes: dict[str, int] = {}
+        # Вся выборка последнего search_bonds с результатами проверки (для SnapshotStore)
+        self.universe: pd.DataFrame | None = None
+
+    def close(self) -> None:
+        self.client.close()
+        if self.checkpoint:
+            self.checkpoint.close()
+        if self.history:
+            self.history.close()
 
     def search_bonds(self, conditions: SearchByCriteriaConditions) -> None | list[Bond]:
         """
@@ -32,29 +112,33 @@ class MOEX:
         """
         foo_name = "moex_search_bonds"
         bonds = []
-        count = 0
         moex_error_counter = 0
 
+        urls = []
         for t in self.BOARD_GROUPS:
             url = (
-                f"https://iss.moex.com/iss/engines/stock/markets/bonds/boardgroups/{t}/securities.json"
+                f"{self.base_url}/iss/engines/stock/markets/bonds/boardgroups/{t}/securities.json"
                 "?iss.dp=comma&iss.meta=off&iss.only=securities,marketdata&"
-                "securities.columns=SECID,SECNAME,PREVLEGALCLOSEPRICE&marketdata.columns=SECID,YIELD,DURATION"
+                f"securities.columns={','.join(SECURITIES_COLUMNS)}&marketdata.columns={','.join(MARKETDATA_COLUMNS)}"
             )
             self.log.info(
                 f"🔗 {foo_name}. Ссылка поиска всех доступных облигаций группы: {url}."
             )
+            urls.append(url)
 
-            time.sleep(self.API_DELAY)
+        metrics = self.client.metrics
+        # Все группы загружаются параллельно, в пределах общего лимита запросов
+        with metrics.stage("fetch"):
+            group_responses = self.client.fetch_all_json(urls)
 
-            try:
-                response = requests.get(url)
-                response.raise_for_status()
-                json_data = response.json()
-            except requests.exceptions.RequestException as e:
+        payloads = []
+        for t, json_data in zip(self.BOARD_GROUPS, group_responses):
+            if isinstance(json_data, requests.exceptions.RequestException):
                 moex_error_counter += 1
-                self.log.info(f"⚠️ Ошибка при запросе к API: {e}")
+                self.log.info(f"⚠️ Ошибка при запросе к API: {json_data}")
                 continue
+            if isinstance(json_data, Exception):
+                raise json_data
 
             if (
                 not json_data
@@ -66,141 +150,77 @@ class MOEX:
                 )
                 continue
 
-            bond_list = json_data["securities"]["data"]
-            count = len(bond_list)
+            count = len(json_data["securities"]["data"])
             self.log.info(f"📃 {foo_name}. Всего в списке группы {t}: {count} бумаг.\n")
+            payloads.append(json_data)
+
+        # Базовый фильтр по доходности, цене и дюрации - сразу по всей таблице
+        with metrics.stage("filter"):
+            universe = build_universe(payloads)
+        if self.OWN_PRICING:
+            with metrics.stage("pricing"):
+                universe = self.__fill_market_data(universe, conditions)
+        with metrics.stage("filter"):
+            candidate_mask = base_conditions_mask(universe, conditions)
+            candidates = universe[candidate_mask]
+        self.log.info(
+            f"🔎 {foo_name}. Всего бумаг: {len(universe)}, "
+            f"без данных о доходности и дюрации: {int((~universe['has_market_data']).sum())}, "
+            f"прошли условие доходности ({conditions.yield_more}% - {conditions.yield_less}%), "
+            f"цены ({conditions.price_more}% - {conditions.price_less}%) и "
+            f"дюрации ({conditions.duration_more} - {conditions.duration_less} мес.): {len(candidates)}.\n"
+        )
+
+        candidate_records = candidates.to_dict("records")
+        with metrics.stage("enrich"):
+            # Бумаги, уже проверенные в прерванном или предыдущем запуске, берём из контрольной точки
+            results = (
+                self.checkpoint.load(candidate_records, conditions)
+                if self.checkpoint
+                else {}
+            )
+            pending = [c for c in candidate_records if c["secid"] not in results]
+            if results:
+                self.log.info(
+                    f"♻️ {foo_name}. Из контрольной точки взято {len(results)} бумаг, "
+                    f"осталось проверить {len(pending)}."
+                )
 
-            market_data = json_data["marketdata"]["data"]
-            market_data_dict = {
-                item[0]: item for item in market_data if item
-            }  # Создаем словарь для быстрого доступа к данным marketdata по SECID
-
-            for i in range(count):
-                # если из-за сетевой ошибки цикл прервался, тогда повтор
-                retry_count = 0  # Счётчик попыток
-                while retry_count < 5:  # Лимит перезапуска до 5 раз
-                    try:
-                        bond_name = bond_list[i][1].replace('"', "").replace("'", "")
-                        secid = bond_list[i][0]
-                        bond_price = bond_list[i][2]
-
-                        bond_market_data = market_data_dict.get(secid)
-                        if not bond_market_data:
-                            self.log.info(
-                                f"❌ {foo_name} в {datetime.now().strftime('%H:%M:%S')}. "
-                                f"Строка {i + 1} из {count}: {bond_name} ({secid}): "
-                                "Данные о доходности и дюрации отсутствуют."
-                            )
-                            break
-
-                        bond_yield = bond_market_data[1]
-                        # кол-во оставшихся месяцев, делим на 30 если есть значение, иначе 0
-                        bond_duration = (
-                            bond_market_data[2] / 30 if bond_market_data[2] else 0
-                        )
-                        bond_duration = round(bond_duration * 100) / 100
-
-                        self.log.info(
-                            f"🔎 {foo_name} в {datetime.now().strftime('%H:%M:%S')}. "
-                            f"Строка {i + 1} из {count}: {bond_name} ({secid}): "
-                            f"цена={bond_price}%, доходность={bond_yield}%, дюрация={bond_duration} мес."
-                        )
-
-                        condition = (
-                            bond_yield is not None
-                            and conditions.yield_more
-                            <= bond_yield
-                            <= conditions.yield_less
-                            and bond_price is not None
-                            and conditions.price_more
-                            <= bond_price
-                            <= conditions.price_less
-                            and conditions.duration_more
-                            < bond_duration
-                            < conditions.duration_less
-                        )
-                        if condition:
-                            self.log.info(
-                                f"✅ {foo_name}.   \\-> Условие "
-                                f"доходности ({conditions.yield_more} < {bond_yield}% < {conditions.yield_less}), "
-                                f"цены ({conditions.price_more} < {bond_price}% < {conditions.price_less}) и "
-                                f"дюрации ({conditions.duration_more} < {bond_duration} мес. < {conditions.duration_less}) "
-                                f"для {bond_name} прошло."
-                            )
-                            volume_data = self.search_volume(
-                                secid, conditions.volume_more
-                            )
-                            bond_volume = volume_data["value"]
-                            self.log.info(
-                                f"📊 {foo_name}. \\-> "
-                                f"Совокупный объем сделок за n дней: {bond_volume}, а "
-                                f"условие {conditions.bond_volume_more} шт."
-                            )
-                            # lowLiquid: 0 и 1 - переключатели.
-                            # ❗ 0 - чтобы оборот был строго больше заданного
-                            # ❗ 1 - фильтр оборота не учитывается, в выборку попадают все бумаги, подходящие по остальным параметрам
-                            if (
-                                volume_data["low_liquid"] == 0
-                                and bond_volume > conditions.bond_volume_more
-                            ):
-                                payments_data = self.search_months_of_payments(secid)
-                                is_qualified_investors = (
-                                    self.search_is_qualified_investors(secid)
-                                )
-                                bond_instance = Bond(
-                                    name=bond_name,
-                                    secid=secid,
-                                    is_qualified_investors=is_qualified_investors,
-                                    price=bond_price,
-                                    volume=bond_volume,
-                                    yield_=bond_yield,
-                                    duration=bond_duration,
-                                    payments_data=payments_data.months_payment_marks,  # XXX: похоже тут надо распаковать словарь
-                                )
-                                if (
-                                    conditions.offer_yes_no == "ДА"
-                                    and payments_data.value_rub_null == 0
-                                ):
-                                    bonds.append(bond_instance)
-                                    self.log.info(
-                                        f"🗓️ {foo_name}. Для {bond_name} ({secid}) все даты будущих платежей с известным значением выплат."
-                                    )
-                                    self.log.info(
-                                        f"⭐ {foo_name}. Результат № {len(bonds)}: {bonds[-1]}."
-                                    )
-                                elif conditions.offer_yes_no == "НЕТ":
-                                    bonds.append(bond_instance)
-                                    self.log.info(
-                                        f"⭐ {foo_name}. Результат № {len(bonds)}: {bonds[-1]}.\n"
-                                    )
-                                else:
-                                    self.log.info(
-                                        f"🚫 {foo_name}. Облигация {bond_name} ({secid}) в выборку не попадает из-за того, что есть даты когда значения выплат неизвестны.\n"
-                                    )
-                            else:
-                                self.log.info(
-                                    f"💧 {foo_name}. Облигация {bond_name} ({secid}) в выборку не попадает из-за малых оборотов или доступно мало торговых дней.\n"
-                                )
-                        else:
-                            self.log.info(
-                                f"⏭️ {foo_name} Пропуск {secid}: не соответствует базовым параметрам.\n"
-                            )
-                        break
-
-                    except requests.exceptions.RequestException as e:
-                        retry_count += 1
-                        moex_error_counter += 1
-                        self.log.info(
-                            f"\n⚠️ Ошибка при обработке строки {i + 1}: {e}.\n🔄 Попытка {retry_count} из 5. Ожидание 60 секунд.\n"
-                        )
-                        time.sleep(60)
-                    except Exception as e:
-                        retry_count += 1
-                        moex_error_counter += 1
-                        self.log.info(
-                            f"\n🔥 Непредвиденная ошибка при обработке строки {i + 1}: {e}.\n🔄 Попытка {retry_count} из 5. Ожидание 60 секунд.\n"
-                        )
-                        time.sleep(60)
+            # Объёмы торгов для всех кандидатов сразу: запросов столько, сколько дней, а не бумаг
+            volumes = {}
+            if self.BATCH_LIQUIDITY and pending:
+                volumes = self.search_volume_batch(
+                    {c["secid"]: c["board_id"] for c in pending},
+                    conditions.volume_more,
+                    conditions,
+                )
+
+            # Кандидаты дообогащаются параллельно: лимит запросов общий для всех потоков,
+            # а результаты возвращаются в порядке кандидатов
+            with ThreadPoolExecutor(max_workers=self.ENRICH_WORKERS) as executor:
+                enriched = executor.map(
+                    lambda candidate: self.__process_candidate(
+                        candidate, volumes.get(candidate["secid"]), conditions
+                    ),
+                    pending,
+                )
+                for candidate, (bond_instance, errors) in zip(pending, enriched):
+                    moex_error_counter += errors
+                    results[candidate["secid"]] = bond_instance
+
+        for candidate in candidate_records:
+            bond_instance = results.get(candidate["secid"])
+            if bond_instance:
+                bonds.append(bond_instance)
+                self.log.info(f"⭐ {foo_name}. Результат № {len(bonds)}: {bonds[-1]}.")
+
+        checked_volumes = {secid: data["value"] for secid, data in volumes.items()}
+        checked_volumes.update({bond.secid: bond.volume for bond in bonds})
+        self.universe = universe.assign(
+            candidate=candidate_mask,
+            volume=universe["secid"].map(checked_volumes),
+            passed=universe["secid"].isin([bond.secid for bond in bonds]),
+        )
 
         if not bonds:
             self.log.info(f"📭 {foo_name}. В массиве нет строк.")
@@ -209,269 +229,686 @@ class MOEX:
         bonds.sort(key=lambda x: x.volume, reverse=True)
         self.log.info(f"📊 {foo_name}. Начало выборки: {bonds[0]}, ...")
         self.log.info(
-            f"🐞 {foo_name}. Количество ошибок в соединении с Московской биржей: {moex_error_counter}, все данные получены."
+            f"🐞 {foo_name}. Количество ошибок в соединении с Московской биржей: {moex_error_counter}, "
+            + (
+                "бумаги с ошибками пропущены и будут проверены при следующем запуске."
+                if moex_error_counter
+                else "все данные получены."
+            )
+        )
+        self.log.info(
+            f"🐞 {foo_name}. Статистика ошибок запросов к API: "
+            f"{json.dumps(self.client.errors.as_dict(), ensure_ascii=False)}"
         )
         return bonds
 
-    def search_volume(self, security_id: str, threshold_value: int) -> dict[str, int]:
+    def __fill_market_data(
+        self, universe: pd.DataFrame, conditions: SearchByCriteriaConditions
+    ) -> pd.DataFrame:
+        """
+        Доходность и дюрация бумаг, у которых в ISS их нет, по собственному расчёту от цены
+        и графика выплат (pricing). Считаются только бумаги, подходящие по условию цены.
+        """
+        foo_name = "moex_search_bonds"
+        missing = universe["price"].between(
+            conditions.price_more, conditions.price_less
+        ) & (
+            ~universe["has_market_data"]
+            | universe["yield_"].isna()
+            | (universe["duration"] <= 0)
+        )
+        if not missing.any():
+            return universe
+
+        schedule = self.bond_schedules(universe.loc[missing, "secid"].tolist())
+        prices = universe.set_index("secid")["price"]
+        priced = (
+            price_bonds(schedule, prices.reindex(schedule.secids).to_numpy())
+            .dropna(subset=["yield_", "duration"])
+            .set_index("secid")
+        )
+        filled = missing & universe["secid"].isin(priced.index)
+        universe = universe.copy()
+        secids = universe.loc[filled, "secid"]
+        universe.loc[filled, "yield_"] = secids.map(priced["yield_"]).round(2)
+        universe.loc[filled, "duration"] = secids.map(priced["duration"]).round(2)
+        universe.loc[filled, "has_market_data"] = True
+        self.log.info(
+            f"🧮 {foo_name}. Без доходности или дюрации в ISS: {int(missing.sum())} бумаг, "
+            f"рассчитано по графику выплат: {int(filled.sum())}."
+        )
+        return universe
+
+    def __process_candidate(
+        self,
+        candidate: dict[str, Any],
+        volume_data: dict[str, int] | None,
+        conditions: SearchByCriteriaConditions,
+    ) -> tuple[Bond | None, int]:
+        bond_instance, errors = self.__enrich_bond(candidate, volume_data, conditions)
+        # Результат сохраняется сразу, чтобы прерванный поиск можно было продолжить
+        if self.checkpoint and not errors:
+            self.checkpoint.save(candidate, conditions, bond_instance)
+        return bond_instance, errors
+
+    def __enrich_bond(
+        self,
+        candidate: dict[str, Any],
+        volume_data: dict[str, int] | None,
+        conditions: SearchByCriteriaConditions,
+    ) -> tuple[Bond | None, int]:
+        """
+        Проверка ликвидности и выплат одной облигации, прошедшей базовый фильтр.
+        Возвращает облигацию (или None, если она в выборку не попадает) и число ошибок (0 или 1).
+        Ошибка по одной бумаге не прерывает обработку остальных.
+        """
+        foo_name = "moex_search_bonds"
+        secid = candidate["secid"]
+        bond_name = candidate["name"]
+        # Временные ошибки сети повторяет клиент ISS, здесь ошибка означает отказ по этой бумаге
+        try:
+            if volume_data is None:
+                volume_data = self.search_volume(
+                    secid, conditions.volume_more, conditions
+                )
+            bond_volume = volume_data["value"]
+            self.log.debug(
+                "📊 %s. \\-> %s (%s): Совокупный объем сделок за n дней: %s, а условие %s шт.",
+                foo_name,
+                bond_name,
+                secid,
+                bond_volume,
+                conditions.bond_volume_more,
+                event="volume",
+                secid=secid,
+            )
+            # lowLiquid: 0 и 1 - переключатели.
+            # ❗ 0 - чтобы оборот был строго больше заданного
+            # ❗ 1 - фильтр оборота не учитывается, в выборку попадают все бумаги, подходящие по остальным параметрам
+            if not (
+                volume_data["low_liquid"] == 0
+                and bond_volume > conditions.bond_volume_more
+            ):
+                self.log.debug(
+                    "💧 %s. Облигация %s (%s) в выборку не попадает из-за малых оборотов или доступно мало торговых дней.\n",
+                    foo_name,
+                    bond_name,
+                    secid,
+                    event="rejected",
+                    secid=secid,
+                )
+                return None, 0
+
+            payments_data = self.search_months_of_payments(secid)
+            is_qualified_investors = self.search_is_qualified_investors(secid)
+            bond_instance = Bond(
+                name=bond_name,
+                secid=secid,
+                is_qualified_investors=is_qualified_investors,
+                price=candidate["price"],
+                volume=bond_volume,
+                yield_=candidate["yield_"],
+                duration=candidate["duration"],
+                payments_data=payments_data.months_payment_marks,  # XXX: похоже тут надо распаковать словарь
+            )
+            if conditions.offer_yes_no == "ДА" and payments_data.value_rub_null == 0:
+                self.log.debug(
+                    "🗓️ %s. Для %s (%s) все даты будущих платежей с известным значением выплат.",
+                    foo_name,
+                    bond_name,
+                    secid,
+                    event="payments",
+                    secid=secid,
+                )
+                return bond_instance, 0
+            if conditions.offer_yes_no == "НЕТ":
+                return bond_instance, 0
+            self.log.debug(
+                "🚫 %s. Облигация %s (%s) в выборку не попадает из-за того, что есть даты когда значения выплат неизвестны.\n",
+                foo_name,
+                bond_name,
+                secid,
+                event="rejected",
+                secid=secid,
+            )
+            return None, 0
+
+        except requests.exceptions.RequestException as e:
+            self.log.info(f"\n⚠️ Ошибка при обработке {secid}: {e}. Бумага пропущена.\n")
+            return None, 1
+        except Exception as e:
+            self.log.info(
+                f"\n🔥 Непредвиденная ошибка при обработке {secid}: {e}. Бумага пропущена.\n"
+            )
+            return None, 1
+
+    def search_volume(
+        self,
+        security_id: str,
+        threshold_value: int,
+        conditions: SearchByCriteriaConditions | None = None,
+    ) -> dict[str, Any]:
         """
         Объем сделок в каждый из n дней больше определенного порога.
         Получает данные об объемах торгов для заданной облигации за последние 15 дней.
         Возвращает словарь с информацией о ликвидности, суммарном объеме и сообщениями лога.
+        Если переданы условия поиска, метрики ликвидности считаются так же, как в
+        search_volume_batch, и бумага, не прошедшая дополнительные условия, получает low_liquid = 1.
+        Ошибки запросов пробрасываются: бумага с ошибкой не должна считаться неликвидной.
         """
         foo_name = "moex_search_volume"
         now = datetime.now()
-        date_request_previous = (now - timedelta(days=15)).strftime(
-            DATE_FORMAT
-        )  # этот день n дней назад
-        board_id = self.board_id(security_id)
+        dates = self.__liquidity_dates(now)
+        date_request_previous = dates[0]  # этот день n дней назад
+        board_id = self.board_id(security_id, raise_errors=True)
         if not board_id:
             self.log.info(
                 f"⚠️ Не удалось получить board_id для {security_id}. Поиск объема прерван."
             )
             return {"low_liquid": 1, "value": 0}
 
+        # Из сети догружаются дни, начиная с первого, история режима за который
+        # ещё не загружена целиком (в том числе день, загрузка которого прервалась)
+        date_from = date_request_previous
+        if self.history:
+            missing = self.history.missing_days(board_id, dates)
+            date_from = missing[0] if missing else dates[-1]
         url = (
-            f"https://iss.moex.com/iss/history/engines/stock/markets/bonds/boards/{board_id}/securities/{security_id}.json?"
-            f"iss.meta=off&iss.only=history&history.columns=SECID,TRADEDATE,VOLUME,NUMTRADES&limit=20&from={date_request_previous}"
+            f"{self.base_url}/iss/history/engines/stock/markets/bonds/boards/{board_id}/securities/{security_id}.json?"
+            f"iss.meta=off&iss.only=history&history.columns=SECID,TRADEDATE,VOLUME,NUMTRADES,VALUE&limit=20&from={date_from}"
         )
         # numtrades - Минимальное количество сделок с бумагой
         # VOLUME - оборот в количестве бумаг (Объем сделок, шт)
-        self.log.info(
-            f"🔗 {foo_name}. Ссылка для поиска объёма сделок {security_id}: {url}"
+        self.log.debug(
+            "🔗 %s. Ссылка для поиска объёма сделок %s: %s",
+            foo_name,
+            security_id,
+            url,
+            event="request",
+            secid=security_id,
         )
-        try:
-            time.sleep(self.API_DELAY)
-
-            response = requests.get(url)
-            response.raise_for_status()
-            json_data = response.json()
-            history_data = json_data["history"]["data"]
-
-            count = len(history_data)
-            volume_sum = 0
-            low_liquid = 0
-            for i in range(count):
-                volume = history_data[i][2]
-                volume_sum += volume
-                if threshold_value > volume:  # если оборот в конкретный день меньше
-                    low_liquid = 1
-                    self.log.info(
-                        f"📉 {foo_name}. На {i + 1}-й день ({history_data[i][1]}) из {count} "
-                        f"оборот по бумаге {security_id} меньше чем {threshold_value}: {volume} шт."
-                    )
-                if count < 6:  # если всего дней в апи на этом периоде очень мало
-                    low_liquid = 1
-                    self.log.info(
-                        f"⚠️ {foo_name}. Всего в АПИ Мосбиржи доступно {count} дней, "
-                        f"а надо хотя бы больше 6 торговых дней с {date_request_previous}!"
-                    )
-
-            if low_liquid != 1:
-                self.log.info(
-                    f"📈 {foo_name}. Во всех {count} днях оборот по бумаге {security_id} был больше, чем {threshold_value} шт каждый день."
+        json_data = self.client.get_json(url)
+        history_data = json_data["history"]["data"]
+        if self.history:
+            self.history.append([board_id, *row] for row in history_data)
+            history_data = [
+                row[1:]
+                for row in self.history.rows(
+                    {security_id: board_id},
+                    date_request_previous,
+                    now.strftime(DATE_FORMAT),
+                )
+            ]
+
+        count = len(history_data)
+        volume_sum = 0
+        low_liquid = 0
+        for i in range(count):
+            volume = history_data[i][2]
+            volume_sum += volume
+            if threshold_value > volume:  # если оборот в конкретный день меньше
+                low_liquid = 1
+                self.log.debug(
+                    "📉 %s. На %s-й день (%s) из %s оборот по бумаге %s меньше чем %s: %s шт.",
+                    foo_name,
+                    i + 1,
+                    history_data[i][1],
+                    count,
+                    security_id,
+                    threshold_value,
+                    volume,
+                    event="volume",
+                    secid=security_id,
+                )
+            if count < 6:  # если всего дней в апи на этом периоде очень мало
+                low_liquid = 1
+                self.log.debug(
+                    "⚠️ %s. Всего в АПИ Мосбиржи доступно %s дней, а надо хотя бы больше 6 торговых дней с %s!",
+                    foo_name,
+                    count,
+                    date_request_previous,
+                    event="volume",
+                    secid=security_id,
                 )
 
-            self.log.info(
-                f"📊 {foo_name}. Итоговый оборот в бумагах (объем сделок, шт) за {count} дней: {volume_sum} шт нарастающим итогом."
+        if low_liquid != 1:
+            self.log.debug(
+                "📈 %s. Во всех %s днях оборот по бумаге %s был больше, чем %s шт каждый день.",
+                foo_name,
+                count,
+                security_id,
+                threshold_value,
+                event="volume",
+                secid=security_id,
             )
+
+        self.log.debug(
+            "📊 %s. Итоговый оборот в бумагах (объем сделок, шт) за %s дней: %s шт нарастающим итогом.",
+            foo_name,
+            count,
+            volume_sum,
+            event="volume",
+            secid=security_id,
+        )
+        if conditions is None:
             return {"low_liquid": low_liquid, "value": volume_sum}
 
-        except requests.exceptions.RequestException as e:
-            self.log.info(f"⚠️ Ошибка c {security_id} в {foo_name}: {e}")
-            return {"low_liquid": 1, "value": 0}
-        except Exception as e:
-            self.log.info(f"🔥 Непредвиденная ошибка c {security_id} в {foo_name}: {e}")
-            return {"low_liquid": 1, "value": 0}
+        # Торговые дни окна - так же, как в search_volume_batch: дни истории бумаги
+        # и дни, за которые в локальной истории есть торги режима
+        history_rows = [[board_id, *row] for row in history_data]
+        days = trading_days(history_rows, [board_id])
+        if self.history:
+            days = sorted(
+                set(days)
+                | set(self.history.trading_days([board_id], dates[0], dates[-1]))
+            )
+        matrices = build_history_matrices(history_rows, {security_id: board_id}, days)
+        metrics = liquidity_metrics(matrices)
+        if not liquidity_conditions_mask(metrics, conditions).iloc[0]:
+            low_liquid = 1
+            self.log.debug(
+                "💧 %s. Бумага %s не проходит дополнительные условия ликвидности.",
+                foo_name,
+                security_id,
+                event="volume",
+                secid=security_id,
+            )
+        return {
+            "low_liquid": low_liquid,
+            "value": volume_sum,
+            **metrics.iloc[0].to_dict(),
+        }
 
-    def board_id(self, security_id: str) -> None | str:
+    def search_volume_batch(
+        self,
+        securities: dict[str, str],
+        threshold_value: int,
+        conditions: SearchByCriteriaConditions | None = None,
+    ) -> dict[str, dict[str, Any]]:
         """
-        Узнаем boardid любой бумаги по тикеру.
-        Получает board_id для заданной облигации.
-        Возвращает board_id или None в случае ошибки.
+        Объем сделок сразу для всех бумаг по истории торгов режимов за каждый день.
+        securities - словарь secid -> boardid. Для каждого режима и дня загружаются все
+        страницы истории, из них строится матрица объёмов (secid × дата).
+        Возвращает словарь secid -> {"low_liquid", "value", "days"} и метрики liquidity_metrics.
+        Если переданы условия поиска, бумаги, не прошедшие дополнительные условия ликвидности,
+        тоже получают low_liquid = 1. Бумаги режимов, история которых загрузилась
+        не полностью, в словарь не попадают.
         """
-        foo_name = "moex_board_id"
-        url = f"https://iss.moex.com/iss/securities/{security_id}.json?iss.meta=off&iss.only=boards&boards.columns=secid,boardid,is_primary"
-        try:
-            time.sleep(self.API_DELAY)
+        foo_name = "moex_search_volume_batch"
+        dates = self.__liquidity_dates(datetime.now())
+        boards = sorted(set(securities.values()))
+        self.log.info(
+            f"📦 {foo_name}. Загрузка истории торгов режимов {', '.join(boards)} "
+            f"за {len(dates)} дней для {len(securities)} бумаг."
+        )
 
-            response = requests.get(url)
-            response.raise_for_status()
-            json_data = response.json()
+        # Строки по режимам и дням: день, хотя бы одна страница которого не загрузилась,
+        # не учитывается и не сохраняется, чтобы его загрузили заново
+        day_rows: dict[tuple[str, str], list] = {}
+        failed_boards = set()
+        failed_days = set()
+        # Дни, история режима за которые уже есть в локальном хранилище, повторно не загружаются
+        pages = [
+            (board, date, 0)
+            for board in boards
+            for date in (
+                self.history.missing_days(board, dates) if self.history else dates
+            )
+        ]
+        fetched_days = [(board, date) for board, date, _ in pages]
+        if self.history:
+            self.log.info(
+                f"🗄️ {foo_name}. В локальной истории уже есть "
+                f"{len(boards) * len(dates) - len(pages)} из {len(boards) * len(dates)} дней режимов."
+            )
+        while pages:
+            responses = self.client.fetch_all_json(
+                self.__board_history_url(*page) for page in pages
+            )
+            next_pages = []
+            for (board, date, start), json_data in zip(pages, responses):
+                if isinstance(json_data, Exception):
+                    failed_boards.add(board)
+                    failed_days.add((board, date))
+                    self.log.info(
+                        f"⚠️ {foo_name}. Ошибка загрузки истории {board} за {date}: {json_data}"
+                    )
+                    continue
+                day_rows.setdefault((board, date), []).extend(
+                    json_data["history"]["data"]
+                )
+                if start == 0:
+                    # Первая страница сообщает общее число строк, остальные страницы грузим следующим проходом
+                    _, total, page_size = json_data["history.cursor"]["data"][0]
+                    next_pages.extend(
+                        (board, date, next_start)
+                        for next_start in range(page_size, total, page_size)
+                    )
+            pages = next_pages
+
+        history_rows = [
+            row
+            for day, rows in day_rows.items()
+            if day not in failed_days
+            for row in rows
+        ]
+        if self.history:
+            self.history.append(
+                history_rows,
+                complete_days=[day for day in fetched_days if day not in failed_days],
+            )
 
-            board_id_data = json_data["boards"]["data"]
-            primary_board = next(
-                (board[1] for board in board_id_data if board[2] == 1), None
-            )  # Находим board_id где is_primary = 1
+        loaded = {
+            secid: board
+            for secid, board in securities.items()
+            if board not in failed_boards
+        }
+        if failed_boards:
+            self.log.info(
+                f"⚠️ {foo_name}. Для режимов {', '.join(sorted(failed_boards))} объём будет запрошен по каждой бумаге отдельно."
+            )
+        if not loaded:
+            return {}
+        # Торговые дни окна - по истории всего режима, а не только кандидатов
+        boards = set(loaded.values())
+        if self.history:
+            days = self.history.trading_days(boards, dates[0], dates[-1])
+            history_rows = self.history.rows(loaded, dates[0], dates[-1])
+        else:
+            days = trading_days(history_rows, boards)
+
+        # Все метрики - одной операцией над матрицами (secid × дата)
+        matrices = build_history_matrices(history_rows, loaded, days)
+        flags = liquidity_flags(matrices["VOLUME"], threshold_value).join(
+            liquidity_metrics(matrices)
+        )
+        if conditions is not None:
+            flags["low_liquid"] |= (
+                ~liquidity_conditions_mask(flags, conditions)
+            ).astype(int)
+        self.log.info(
+            f"📊 {foo_name}. Достаточная ликвидность у {int((flags['low_liquid'] == 0).sum())} из {len(flags)} бумаг."
+        )
+        return flags.to_dict("index")
+
+    def __liquidity_dates(self, now: datetime) -> list[str]:
+        """Календарные дни окна проверки ликвидности, от n дней назад до сегодня."""
+        return [
+            (now - timedelta(days=days_ago)).strftime(DATE_FORMAT)
+            for days_ago in range(self.LIQUIDITY_DAYS, -1, -1)
+        ]
+
+    def __board_history_url(self, board: str, date: str, start: int) -> str:
+        return (
+            f"{self.base_url}/iss/history/engines/stock/markets/bonds/boards/{board}/securities.json?"
+            f"iss.meta=off&iss.only=history,history.cursor&history.columns={','.join(HISTORY_COLUMNS)}"
+            f"&date={date}&start={start}"
+        )
 
-            if primary_board:
-                return primary_board
-            else:
-                self.log.info(f"⚠️ Не найден primary board_id для {security_id}.")
-                return None
+    def security_info(
+        self, security_id: str, raise_errors: bool = False
+    ) -> None | SecurityInfo:
+        """
+        Описание бумаги и её режимы торгов одним запросом.
+        Из одной записи берутся board_id, признак квалификации, эмитент, номинал и ISIN.
+        Возвращает SecurityInfo или None в случае ошибки, успешные ответы запоминаются.
+        С raise_errors ошибка пробрасывается, чтобы вызывающий мог отличить её от пустого ответа.
+        """
+        if security_id in self._security_info:
+            return self._security_info[security_id]
 
+        foo_name = "moex_security_info"
+        url = (
+            f"{self.base_url}/iss/securities/{security_id}.json?iss.meta=off&iss.only=boards,description"
+            "&boards.columns=secid,boardid,is_primary&description.columns=name,title,value"
+        )
+        self.log.debug(
+            "🔗 %s. Ссылка для поиска общей информации по %s: %s",
+            foo_name,
+            security_id,
+            url,
+            event="request",
+            secid=security_id,
+        )
+        try:
+            json_data = self.client.get_json(url)
+            board_id_data = json_data["boards"]["data"]
+            description = {
+                item[0]: item[2] for item in json_data["description"]["data"]
+            }
         except requests.exceptions.RequestException as e:
+            if raise_errors:
+                raise
             self.log.info(f"⚠️ Ошибка c {security_id} в {foo_name}: {e}")
             return None
         except Exception as e:
+            if raise_errors:
+                raise
             self.log.info(f"🔥 Непредвиденная ошибка c {security_id} в {foo_name}: {e}")
             return None
 
+        face_value = description.get("FACEVALUE")
+        info = SecurityInfo(
+            secid=security_id,
+            # Находим board_id где is_primary = 1
+            board_id=next((board[1] for board in board_id_data if board[2] == 1), None),
+            # По умолчанию 0, если не найдено
+            is_qualified_investors=bool(
+                int(description.get("ISQUALIFIEDINVESTORS") or 0)
+            ),
+            qual_investor_group=description.get("QUALINVESTORGROUP") or None,
+            issuer=next(
+                (description[name] for name in ISSUER_FIELDS if description.get(name)),
+                None,
+            ),
+            face_value=float(face_value) if face_value else None,
+            isin=description.get("ISIN") or None,
+        )
+        self._security_info[security_id] = info
+        return info
+
+    def board_id(self, security_id: str, raise_errors: bool = False) -> None | str:
+        """
+        Узнаем boardid любой бумаги по тикеру.
+        Получает board_id для заданной облигации.
+        Возвращает board_id или None в случае ошибки (с raise_errors ошибка пробрасывается).
+        """
+        info = self.security_info(security_id, raise_errors)
+        if info is None:
+            return None
+        if not info.board_id:
+            self.log.info(f"⚠️ Не найден primary board_id для {security_id}.")
+        return info.board_id
+
     def search_months_of_payments(self, security_id: str) -> MonthsOfPayments:
         """
         Узнаём месяцы, когда происходят выплаты.
         Получает данные о купонных выплатах для заданной облигации.
         Возвращает словарь с информацией о месяцах выплат, наличии неизвестных выплат и months_payment_marks.
+        Ошибки запроса пробрасываются и учитываются при обработке бумаги.
         """
         foo_name = "moex_search_months_of_payments"
-        url = f"https://iss.moex.com/iss/statistics/engines/stock/markets/bonds/bondization/{security_id}.json?iss.meta=off&iss.only=coupons&start=0&limit=100"
-        self.log.info(
-            f"🔗 {foo_name}. Ссылка для поиска месяцев выплат для {security_id}: {url}."
-        )
-        try:
-            time.sleep(self.API_DELAY)
-
-            response = requests.get(url)
-            response.raise_for_status()
-            json_data = response.json()
-
-            coupon_data = json_data["coupons"]["data"]
-
-            coupon_dates = []
-            value_rub_null = 0
-            for i in range(len(coupon_data)):
-                coupondate = coupon_data[i][3]  # даты купона
-                value_rub = coupon_data[i][9]  # сумма выплаты купона
-                in_future = datetime.strptime(coupondate, DATE_FORMAT) > datetime.now()
-                if in_future:
-                    coupon_dates.append(
-                        int(coupondate.split("-")[1])
-                    )  # Добавляем номер месяца
-                    if value_rub is None:
-                        value_rub_null += 1
-
-            if value_rub_null > 0:
-                self.log.info(
-                    f"⚠️ {foo_name}. Для {security_id} есть {value_rub_null} дат(ы) будущих платежей с неизвестным значением выплат."
-                )
-
-            unique_dates = sorted(
-                list(set(coupon_dates))
-            )  # уникальные значения месяцев и сортировка
-            self.log.info(
-                f"🗓️ {foo_name}. Купоны для {security_id} выплачиваются в {unique_dates} месяцы."
+        coupon_data = []
+        start = 0
+        while True:
+            url = self.__bondization_url(security_id, "coupons", start)
+            self.log.debug(
+                "🔗 %s. Ссылка для поиска месяцев выплат для %s: %s.",
+                foo_name,
+                security_id,
+                url,
+                event="request",
+                secid=security_id,
+            )
+            page = self.client.get_json(url)["coupons"]["data"]
+            coupon_data.extend(page)
+            # Неполная страница - последняя
+            if len(page) < self.BONDIZATION_PAGE:
+                break
+            start += self.BONDIZATION_PAGE
+
+        coupon_dates = []
+        value_rub_null = 0
+        for i in range(len(coupon_data)):
+            coupondate = coupon_data[i][3]  # даты купона
+            value_rub = coupon_data[i][9]  # сумма выплаты купона
+            in_future = datetime.strptime(coupondate, DATE_FORMAT) > datetime.now()
+            if in_future:
+                coupon_dates.append(
+                    int(coupondate.split("-")[1])
+                )  # Добавляем номер месяца
+                if value_rub is None:
+                    value_rub_null += 1
+
+        if value_rub_null > 0:
+            self.log.debug(
+                "⚠️ %s. Для %s есть %s дат(ы) будущих платежей с неизвестным значением выплат.",
+                foo_name,
+                security_id,
+                value_rub_null,
+                event="payments",
+                secid=security_id,
             )
 
-            months_payment_marks = {}  # Словарь для отметок месяцев
-            for month_num in range(1, 13):
-                months_payment_marks[MONTH_NAMES_RU_SHORT[month_num - 1]] = (
-                    "✅" if month_num in unique_dates else ""
-                )  # Отмечаем месяцы с выплатами
+        unique_dates = sorted(
+            set(coupon_dates)
+        )  # уникальные значения месяцев и сортировка
+        self.log.debug(
+            "🗓️ %s. Купоны для %s выплачиваются в %s месяцы.",
+            foo_name,
+            security_id,
+            unique_dates,
+            event="payments",
+            secid=security_id,
+        )
 
-            return MonthsOfPayments(
-                value_rub_null=value_rub_null, months_payment_marks=months_payment_marks
-            )
+        months_payment_marks = {}  # Словарь для отметок месяцев
+        for month_num in range(1, 13):
+            months_payment_marks[MONTH_NAMES_RU_SHORT[month_num - 1]] = (
+                "✅" if month_num in unique_dates else ""
+            )  # Отмечаем месяцы с выплатами
 
-        except requests.exceptions.RequestException as e:
-            self.log.info(f"⚠️ Ошибка c {security_id} в {foo_name}: {e}")
-            return MonthsOfPayments(value_rub_null=0, months_payment_marks={})
-        except Exception as e:
-            self.log.info(f"🔥 Непредвиденная ошибка c {security_id} в {foo_name}: {e}")
-            return MonthsOfPayments(value_rub_null=0, months_payment_marks={})
+        return MonthsOfPayments(
+            value_rub_null=value_rub_null, months_payment_marks=months_payment_marks
+        )
 
     def search_is_qualified_investors(self, security_id: str) -> str:
         """
         Определяем это бумага для квалифицированных инвесторов или нет.
         Получает информацию о необходимости квалификации для покупки облигации.
-        Возвращает 'да' или 'нет'.
+        Возвращает 'да' или 'нет', ошибка запроса описания бумаги пробрасывается.
         """
         foo_name = "moex_search_is_qualified_investors"
-        url = f"https://iss.moex.com/iss/securities/{security_id}.json?iss.meta=off&iss.only=description&description.columns=name,title,value"
-        self.log.info(
-            f"🔗 {foo_name}. Ссылка для поиска общей информации по {security_id}: {url}"
-        )
-        try:
-            time.sleep(self.API_DELAY)
-
-            response = requests.get(url)
-            response.raise_for_status()
-            json_data = response.json()
-            description_data = json_data["description"]["data"]
-
-            is_qualified_investors_data = next(
-                (
-                    item
-                    for item in description_data
-                    if item[0] == "ISQUALIFIEDINVESTORS"
-                ),
-                None,
+        info = self.security_info(security_id, raise_errors=True)
+
+        if not info.is_qualified_investors:
+            self.log.debug(
+                "👤 %s. Для %s квалификация для покупки НЕ нужна.",
+                foo_name,
+                security_id,
+                event="qualification",
+                secid=security_id,
             )
-            qual_investor_group_data = next(
-                (item for item in description_data if item[0] == "QUALINVESTORGROUP"),
-                None,
+            return "нет"
+        else:
+            # Текст по умолчанию, если не найден
+            qual_investor_group = info.qual_investor_group or "не определена"
+            self.log.debug(
+                '👨‍💼 %s. %s это бумага для квалифицированных инвесторов категории: "%s"',
+                foo_name,
+                security_id,
+                qual_investor_group,
+                event="qualification",
+                secid=security_id,
             )
-
-            is_qualified_investors = (
-                int(is_qualified_investors_data[2])
-                if is_qualified_investors_data and is_qualified_investors_data[2]
-                else 0
-            )  # По умолчанию 0, если не найдено
-            qual_investor_group = (
-                qual_investor_group_data[2]
-                if qual_investor_group_data and qual_investor_group_data[2]
-                else "не определена"
-            )  # Текст по умолчанию, если не найден
-
-            if is_qualified_investors == 0:
-                self.log.info(
-                    f"👤 {foo_name}. Для {security_id} квалификация для покупки НЕ нужна."
-                )
-                return "нет"
-            else:
-                self.log.info(
-                    f'👨‍💼 {foo_name}. {security_id} это бумага для квалифицированных инвесторов категории: "{qual_investor_group}"'
-                )
-                return "да"
-
-        except requests.exceptions.RequestException as e:
-            self.log.info(f"⚠️ Ошибка c {security_id} в {foo_name}: {e}")
-            return "ошибка"  # Return some error indicator
-        except Exception as e:
-            self.log.info(f"🔥 Непредвиденная ошибка c {security_id} в {foo_name}: {e}")
-            return "ошибка"  # Return some error indicator
+            return "да"
 
     def process_bonds(
         self, bonds: list[tuple[str | float | datetime | None, ...]]
     ) -> list[list[str]]:
-        cash_flow = []
-        # Обрабатываем каждую облигацию
+        """
+        Денежный поток портфеля: будущие купоны и выплаты номинала по всем бумагам.
+        Выплаты всех бумаг загружаются параллельно в пределах общего лимита запросов,
+        а будущие платежи считаются сразу по общей таблице.
+        """
+        foo_name = "moex_process_bonds"
+        urls = []
         for ID, number in bonds:
-            self.log.info("")
+            assert isinstance(number, (float, int))
             self.log.info(f"Обрабатываем {ID}, количество: {number} шт.")
-            url = f"https://iss.moex.com/iss/statistics/engines/stock/markets/bonds/bondization/{ID}.json?iss.meta=off"
-            self.log.info(f"Запрос к {url}")
-
-            response = requests.get(url)
-            json_data = response.json()
+            url = f"{self.base_url}/iss/statistics/engines/stock/markets/bonds/bondization/{ID}.json?iss.meta=off"
+            self.log.debug("Запрос к %s", url, event="request", secid=ID)
+            urls.append(url)
 
-            assert isinstance(number, (float, int))
+        flows = []
+        for (ID, number), json_data in zip(bonds, self.client.fetch_all_json(urls)):
+            if isinstance(json_data, requests.exceptions.RequestException):
+                self.log.info(
+                    f"⚠️ Ошибка c {ID} в {foo_name}: {json_data}. Бумага пропущена."
+                )
+                continue
+            if isinstance(json_data, Exception):
+                raise json_data
             coupons = json_data.get("coupons", {})
             amortizations = json_data.get("amortizations", {})
-            cash_flow.extend(
-                self.process_coupons(
-                    coupons.get("data", []), coupons.get("columns", []), number
-                )
-            )
-            cash_flow.extend(
-                self.process_payment(
-                    amortizations.get("data", []),
-                    amortizations.get("columns", []),
-                    number,
-                )
+            flows.extend(payment_flows(coupons, "coupondate", COUPON_KIND, number))
+            flows.extend(
+                payment_flows(amortizations, "amortdate", PAYMENT_KIND, number)
             )
 
+        cash_flow = future_cash_flow(flows)
+        self.log.info(
+            f"🗓️ {foo_name}. Будущих выплат по {len(bonds)} бумагам: {len(cash_flow)}."
+        )
         return cash_flow
 
+    def bond_schedules(
+        self, security_ids: list[str], to_offer: bool = True
+    ) -> CashFlowSchedule:
+        """
+        График будущих выплат бумаг для расчёта доходности и дюрации (pricing).
+        Купоны, амортизации и оферты всех бумаг загружаются параллельно. ISS отдаёт не больше
+        BONDIZATION_PAGE строк за запрос: если страница бумаги заполнена целиком, следующая
+        загружается следующим проходом, как страницы истории в search_volume_batch.
+        Бумаги с ошибкой запроса любой страницы в график не попадают.
+        """
+        foo_name = "moex_bond_schedules"
+        bondization: dict[str, dict[str, Any]] = {}
+        pages = [(ID, 0) for ID in security_ids]
+        while pages:
+            responses = self.client.fetch_all_json(
+                self.__bondization_url(ID, "coupons,amortizations,offers", start)
+                for ID, start in pages
+            )
+            next_pages = []
+            for (ID, start), json_data in zip(pages, responses):
+                if isinstance(json_data, requests.exceptions.RequestException):
+                    bondization.pop(ID, None)
+                    self.log.info(
+                        f"⚠️ Ошибка c {ID} в {foo_name}: {json_data}. Бумага пропущена."
+                    )
+                    continue
+                if isinstance(json_data, Exception):
+                    raise json_data
+                tables = bondization.setdefault(ID, {})
+                for name, table in json_data.items():
+                    tables.setdefault(
+                        name, {"columns": table.get("columns", []), "data": []}
+                    )["data"].extend(table.get("data") or [])
+                if any(
+                    len(table.get("data") or []) >= self.BONDIZATION_PAGE
+                    for table in json_data.values()
+                ):
+                    next_pages.append((ID, start + self.BONDIZATION_PAGE))
+            pages = next_pages
+        return build_schedule(bond_flows(bondization), to_offer=to_offer)
+
+    def __bondization_url(self, security_id: str, only: str, start: int) -> str:
+        return (
+            f"{self.base_url}/iss/statistics/engines/stock/markets/bonds/bondization/{security_id}.json?"
+            f"iss.meta=off&iss.only={only}&start={start}&limit={self.BONDIZATION_PAGE}"
+        )
+
     def process_coupons(
         self,
         coupons: list[tuple[str | int | float, ...]],
@@ -479,33 +916,8 @@ class MOEX:
         number: float | int,
     ) -> list[list[str]]:
         # Обработка купонов
-        cash_flow = []
-
-        isin_idx = columns.index("isin")
-        name_idx = columns.index("name")
-        coupondate_idx = columns.index("coupondate")
-        value_rub_idx = columns.index("value_rub")
-
-        for coupon in coupons:
-            name = (
-                str(coupon[name_idx])
-                .replace('"', "")
-                .replace("'", "")
-                .replace("\\", "")
-            )
-            isin = coupon[isin_idx]
-            coupon_date = coupon[coupondate_idx]
-
-            # Преобразуем дату в объект datetime
-            coupon_datetime = datetime.strptime(str(coupon_date), "%Y-%m-%d")
-
-            if coupon_datetime > datetime.now():
-                value_rub = float(coupon[value_rub_idx] or 0) * number
-                flow = [f"{name} (купон 🏷️)", isin, coupon_datetime, value_rub]
-                cash_flow.append(flow)
-                self.log.info(f"Добавлен купон: {flow}")
-
-        return cash_flow
+        table = {"columns": columns, "data": coupons}
+        return future_cash_flow(payment_flows(table, "coupondate", COUPON_KIND, number))
 
     def process_payment(
         self,
@@ -514,49 +926,43 @@ class MOEX:
         number: float | int,
     ) -> list[list[str]]:
         # Обработка выплат номинала
-        cash_flow = []
-
-        isin_idx = columns.index("isin")
-        name_idx = columns.index("name")
-        amortdate_idx = columns.index("amortdate")
-        value_rub_idx = columns.index("value_rub")
-
-        for amort in amortizations:
-            name = (
-                str(amort[name_idx]).replace('"', "").replace("'", "").replace("\\", "")
-            )
-            isin = amort[isin_idx]
-            amort_date = amort[amortdate_idx]
+        table = {"columns": columns, "data": amortizations}
+        return future_cash_flow(payment_flows(table, "amortdate", PAYMENT_KIND, number))
 
-            # Преобразуем дату в объект datetime
-            amort_datetime = datetime.strptime(str(amort_date), "%Y-%m-%d")
-
-            if amort_datetime > datetime.now():
-                value_rub = float(amort[value_rub_idx] or 0) * number
-                flow = [f"{name} (номинал 💯)", isin, amort_datetime, value_rub]
-                cash_flow.append(flow)
-                self.log.info(f"Добавлена выплата номинала: {flow}")
-
-        return cash_flow
+    def issuers(self, security_ids: list[str]) -> dict[str, str]:
+        """
+        Эмитенты бумаг из их описания (security_info, запросы идут параллельно):
+        словарь ISIN -> эмитент, как ISIN указан в листе "Ден.поток".
+        Бумаги без описания или без эмитента в словарь не попадают.
+        """
+        with ThreadPoolExecutor(max_workers=self.ENRICH_WORKERS) as executor:
+            infos = list(executor.map(self.security_info, security_ids))
+        return {
+            info.isin or info.secid: info.issuer
+            for info in infos
+            if info and info.issuer
+        }
 
     def fetch_company_names(self, df: pd.DataFrame) -> list[str]:
         """🔄 Получает названия компаний по тикерам облигаций."""
         company_names = []
-        delay_between_calls = 0.5  # секунды
         for ticker in df.iloc[:, 0]:
-            url = f"https://iss.moex.com/iss/securities.json?q={ticker}&iss.meta=off"
             self.log.info(f"\n🔍 Обрабатываем тикер: {ticker}")
 
             try:
-                response = requests.get(url)
-                response.raise_for_status()
-                data = response.json()
-
-                if not data["securities"]["data"]:
-                    self.log.info(f"⚠️ Данные не найдены для {ticker}")
-                    continue
-
-                emitent_title = data["securities"]["data"][0][8]
+                info = self.security_info(ticker)
+                if info and info.issuer:
+                    emitent_title = info.issuer
+                else:
+                    # Эмитента нет в описании бумаги - ищем через общий поиск
+                    url = f"{self.base_url}/iss/securities.json?q={ticker}&iss.meta=off"
+                    data = self.client.get_json(url)
+
+                    if not data["securities"]["data"]:
+                        self.log.info(f"⚠️ Данные не найдены для {ticker}")
+                        continue
+
+                    emitent_title = data["securities"]["data"][0][8]
                 match = re.search(r'"([^"]+)"', emitent_title)
                 company_name = match.group(1) if match else emitent_title
 
@@ -566,8 +972,6 @@ class MOEX:
             except (requests.RequestException, IndexError, KeyError) as e:
                 self.log.info(f"❌ Ошибка при обработке {ticker}: {e}")
 
-            time.sleep(delay_between_calls)
-
         # 🔄 Удаляем дубликаты, сохраняя порядок
         company_names = list(dict.fromkeys(company_names))
         return company_names
@@ -577,34 +981,125 @@ class MOEX:
     ) -> tuple[None | float, None | float, None | str]:
         """
         # Получение текущей цены облигации и накопленного купонного дохода
-        # С попытками получить данные за предыдущие дни при отсутствии текущих данных
+        # Цена - последняя цена закрытия за PRICE_DAYS дней
         """
-        current_date = datetime.now()
-
-        for attempt in range(10):
-            try_date = current_date - timedelta(days=attempt)
-            date_str = try_date.strftime("%Y-%m-%d")
-
-            self.log.info(f"🔄 Попытка {attempt + 1}: запрос данных за {date_str}")
-
-            price_url = f"https://iss.moex.com/iss/history/engines/stock/markets/bonds/boards/TQCB/securities/{security_code}.json?iss.meta=off&iss.json=extended&callback=JSON_CALLBACK&lang=ru&from={date_str}"
-            response = requests.get(price_url)
-            data = json.loads(response.text.replace("JSON_CALLBACK(", "").rstrip(")"))
-
-            if data[1]["history"]:
-                self.log.info(f"✅ Найдены данные за {date_str}")
-                close_price = data[1]["history"][0]["CLOSE"]
-                face_value = data[1]["history"][0]["FACEVALUE"]
-                current_price = close_price * face_value / 100
+        return self.get_bond_prices([security_code])[security_code]
 
-                nkd_url = f"https://iss.moex.com/iss/engines/stock/markets/bonds/boards/TQCB/securities/{security_code}.json?iss.meta=off&iss.only=securities&lang=ru"
-                response = requests.get(nkd_url)
-                data = json.loads(response.text)
-                accrued_interest = data["securities"]["data"][0][7]
+    def get_bond_prices(
+        self, security_codes: list[str]
+    ) -> dict[str, tuple[None | float, None | float, None | str]]:
+        """
+        Цена, НКД и дата цены сразу для списка облигаций.
+        Цена ищется в основном режиме торгов бумаги (board_id, описание бумаги запоминается).
+        Цена последней сделки предыдущего дня (PREVPRICE) и НКД приходят одним запросом
+        на каждые SECURITIES_BATCH бумаг одного режима. История за окно PRICE_DAYS
+        (по запросу на бумагу, запросы идут параллельно) нужна только бумагам без PREVPRICE:
+        отфильтровать историю режима по списку бумаг ISS не позволяет, а история режима
+        за каждый день окна - это десятки страниц на каждый день.
+        Для бумаг без данных возвращается (None, None, None).
+        """
+        foo_name = "moex_get_bond_prices"
+        security_codes = list(dict.fromkeys(security_codes))
+        prices = {security_code: (None, None, None) for security_code in security_codes}
 
-                return current_price, accrued_interest, date_str
+        with ThreadPoolExecutor(max_workers=self.ENRICH_WORKERS) as executor:
+            boards = dict(
+                zip(security_codes, executor.map(self.board_id, security_codes))
+            )
+        by_board: dict[str, list[str]] = {}
+        for security_code, board in boards.items():
+            if board is None:
+                self.log.info(f"❌ Не удалось определить режим торгов {security_code}")
+                continue
+            by_board.setdefault(board, []).append(security_code)
+
+        quotes = {}
+        for board, codes in by_board.items():
+            quotes.update(self.__board_quotes(board, codes))
+        accrued_interest = {code: quote[0] for code, quote in quotes.items()}
+
+        security_codes = []
+        for codes in by_board.values():
+            for security_code in codes:
+                _, price, trade_date, face_value = quotes.get(
+                    security_code, (None, None, None, None)
+                )
+                if not (price and trade_date and face_value):
+                    security_codes.append(security_code)
+                    continue
+                self.log.info(f"✅ Найдены данные для {security_code} за {trade_date}")
+                prices[security_code] = (
+                    price * face_value / 100,
+                    accrued_interest.get(security_code),
+                    trade_date,
+                )
 
-        self.log.info(
-            f"❌ Не удалось найти данные для {security_code} за последние 10 дней"
+        date_from = (datetime.now() - timedelta(days=self.PRICE_DAYS)).strftime(
+            DATE_FORMAT
         )
-        return None, None, None
+        urls = [
+            f"{self.base_url}/iss/history/engines/stock/markets/bonds/boards/{boards[security_code]}/securities/{security_code}.json?"
+            f"iss.meta=off&iss.only=history&history.columns=TRADEDATE,CLOSE,FACEVALUE&from={date_from}"
+            for security_code in security_codes
+        ]
+        histories = self.client.fetch_all_json(urls) if urls else []
+
+        for security_code, json_data in zip(security_codes, histories):
+            if isinstance(json_data, requests.exceptions.RequestException):
+                self.log.info(f"⚠️ Ошибка c {security_code} в {foo_name}: {json_data}")
+                continue
+            if isinstance(json_data, Exception):
+                raise json_data
+
+            # Последний день окна, в который была цена закрытия
+            history = [
+                row for row in json_data["history"]["data"] if row[1] is not None
+            ]
+            if not history:
+                self.log.info(
+                    f"❌ Не удалось найти данные для {security_code} за последние {self.PRICE_DAYS} дней"
+                )
+                continue
+            trade_date, close_price, face_value = history[-1]
+            self.log.info(f"✅ Найдены данные для {security_code} за {trade_date}")
+            prices[security_code] = (
+                close_price * face_value / 100,
+                accrued_interest.get(security_code),
+                trade_date,
+            )
+        return prices
+
+    def __board_quotes(
+        self, board: str, security_codes: list[str]
+    ) -> dict[str, tuple[Any, ...]]:
+        """
+        НКД, цена последней сделки предыдущего дня (% от номинала), её дата и номинал бумаг
+        режима торгов: по одному запросу на SECURITIES_BATCH бумаг.
+        Размер лота из того же ответа запоминается для lot_size.
+        """
+        batches = [
+            security_codes[i : i + self.SECURITIES_BATCH]
+            for i in range(0, len(security_codes), self.SECURITIES_BATCH)
+        ]
+        urls = [
+            f"{self.base_url}/iss/engines/stock/markets/bonds/boards/{board}/securities.json?"
+            "iss.meta=off&iss.only=securities&securities.columns=SECID,ACCRUEDINT,LOTSIZE,PREVPRICE,PREVDATE,FACEVALUE"
+            f"&securities={','.join(batch)}"
+            for batch in batches
+        ]
+        quotes = {}
+        for json_data in self.client.fetch_all_json(urls):
+            if isinstance(json_data, requests.exceptions.RequestException):
+                self.log.info(f"⚠️ Ошибка при запросе НКД режима {board}: {json_data}")
+                continue
+            if isinstance(json_data, Exception):
+                raise json_data
+            for security_code, nkd, lot_size, *quote in json_data["securities"]["data"]:
+                quotes[security_code] = (nkd, *quote)
+                if lot_size:
+                    self._lot_sizes[security_code] = int(lot_size)
+        return quotes
+
+    def lot_size(self, security_code: str) -> int:
+        """Количество бумаг в лоте, известно после get_bond_prices. По умолчанию 1."""
+        return self._lot_sizes.get(security_code, 1)
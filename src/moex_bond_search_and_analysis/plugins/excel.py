@@ -1,16 +1,20 @@
 from datetime import datetime
-from typing import cast
+from typing import Any
 
 import openpyxl
 import openpyxl.utils
+import pandas as pd
 from openpyxl.styles import Alignment
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.cell.cell import Cell
-from openpyxl.worksheet.worksheet import Worksheet
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
 
+from moex_bond_search_and_analysis.cashflow import summarize_cash_flow
 from moex_bond_search_and_analysis.consts import DATETIME_FORMAT, MONTH_NAMES_RU_FULL
 from moex_bond_search_and_analysis.logger import Logger
 from moex_bond_search_and_analysis.schemas import (
     Bond,
+    CashFlowSummary,
     ExcelSheets,
     SearchByCriteriaConditions,
 )
@@ -37,7 +41,11 @@ class ExcelSource:
         return bonds
 
     def write_bonds(
-        self, sheets: ExcelSheets, cache_flow: list[list[str]], log: Logger
+        self,
+        sheets: ExcelSheets,
+        cache_flow: list[list[str]],
+        log: Logger,
+        issuers: dict[str, str] | None = None,
     ):
         for row in cache_flow:
             sheets.result.append(row)
@@ -49,6 +57,11 @@ class ExcelSource:
         for cell in sheets.result["D"][1:]:
             cell.number_format = "# ##0,00 ₽"
 
+        # Сводки по месяцам, годам и эмитентам - готовые таблицы вместо пересчёта в Excel
+        self.__write_cash_flow_summary(
+            sheets.workbook, summarize_cash_flow(cache_flow, issuers)
+        )
+
         # Добавляем запись об обновлении
         update_message = f"Данные автоматически обновлены {datetime.now().strftime('%d.%m.%Y в %H:%M:%S')}"
         sheets.result.append(["", update_message])
@@ -58,14 +71,57 @@ class ExcelSource:
         sheets.workbook.save(self.filename)
         log.info(f"Файл {self.filename} успешно обновлён.")
 
+    def __write_cash_flow_summary(
+        self, workbook: openpyxl.Workbook, summary: CashFlowSummary
+    ) -> None:
+        money_format = "# ##0,00 ₽"
+        month_format = "MM.YYYY"
+        money_headers = ["Купоны, ₽", "Погашения, ₽", "Итого, ₽"]
+        summary_sheets = [
+            ("По месяцам", summary.monthly, ["Месяц", *money_headers], month_format),
+            ("По годам", summary.yearly, ["Год", *money_headers], None),
+            ("По эмитентам", summary.issuers, ["Эмитент", *money_headers], None),
+            (
+                "Нарастающий итог",
+                summary.cumulative,
+                ["Месяц", "Итого за месяц, ₽", "Нарастающим итогом, ₽"],
+                month_format,
+            ),
+        ]
+        for title, frame, headers, key_format in summary_sheets:
+            # Листы сводок пересоздаются при каждом обновлении
+            if title in workbook.sheetnames:
+                del workbook[title]
+            sheet = workbook.create_sheet(title)
+            sheet.append(headers)
+            for row in frame.itertuples(index=False):
+                key, *values = row
+                if isinstance(key, pd.Timestamp):
+                    key = key.to_pydatetime()
+                elif hasattr(key, "item"):
+                    key = key.item()  # numpy -> int для openpyxl
+                sheet.append([key, *(float(value) for value in values)])
+
+            if key_format:
+                for cell in sheet["A"][1:]:
+                    cell.number_format = key_format
+            for column in sheet.iter_cols(min_col=2, min_row=2):
+                for cell in column:
+                    cell.number_format = money_format
+            sheet.column_dimensions["A"].width = 40 if title == "По эмитентам" else 12
+            for column_letter in "BCD"[: len(headers) - 1]:
+                sheet.column_dimensions[column_letter].width = 22
+            sheet.freeze_panes = "A2"
+
     def write_search_by_criteria(
         self, data: list[Bond], conditions: SearchByCriteriaConditions, log: Logger
     ) -> None:
-        wb = openpyxl.Workbook()
+        # Потоковая запись (write-only): строки сразу уходят в файл, ширина колонок
+        # и стили вычисляются заранее по данным, без повторных проходов по листу
+        wb = openpyxl.Workbook(write_only=True)
 
         # Лист 'Результаты поиска'
-        sheet_bonds = cast(Worksheet, wb.active)
-        sheet_bonds.title = "Результаты поиска"
+        sheet_bonds = wb.create_sheet("Результаты поиска")
 
         headers_bonds = [
             "Полное наименование",
@@ -77,88 +133,115 @@ class ExcelSource:
             "Дюрация, месяцев",
         ]
         headers_bonds.extend(MONTH_NAMES_RU_FULL)
-        sheet_bonds.append(headers_bonds)
-
-        # Форматирование столбца E как "# ##0"
-        for cell in sheet_bonds["E"][1:]:
-            cell.number_format = "# ##0"
+        rows = [bond.as_list for bond in data]
 
-        for bond in data:
-            sheet_bonds.append(bond.as_list)
-
-        # Центрирование данных на листе 'Результаты поиска'
-        center_alignment = Alignment(horizontal="center")
-        for row in sheet_bonds.iter_rows(
-            min_row=1,
-            max_row=sheet_bonds.max_row,
-            min_col=1,
-            max_col=sheet_bonds.max_column,
+        # Автоподбор ширины колонок по заголовкам и данным
+        for column_index, width in enumerate(
+            self.__column_widths([headers_bonds, *rows]), start=1
         ):
-            for cell in row:
-                cell.alignment = center_alignment
-
-        # Автоподбор ширины колонок для первого листа
-        for column_cells in sheet_bonds.columns:
-            length = max(len(str(cell.value)) for cell in column_cells if cell.value)
             sheet_bonds.column_dimensions[
-                openpyxl.utils.get_column_letter(column_cells[0].col_idx)
-            ].width = length + 2
+                openpyxl.utils.get_column_letter(column_index)
+            ].width = width
 
         # Фиксируем первую строку (заголовки)
         sheet_bonds.freeze_panes = "A2"
 
+        # Центрирование данных на листе 'Результаты поиска'
+        center_alignment = Alignment(horizontal="center")
+        sheet_bonds.append(
+            [
+                self.__cell(sheet_bonds, value, center_alignment)
+                for value in headers_bonds
+            ]
+        )
+        # Форматирование столбца E (объем сделок) как "# ##0"
+        volume_column = headers_bonds.index("Объем сделок с 15 дней, шт.")
+        for row in rows:
+            sheet_bonds.append(
+                [
+                    self.__cell(
+                        sheet_bonds,
+                        value,
+                        center_alignment,
+                        "# ##0" if column == volume_column else None,
+                    )
+                    for column, value in enumerate(row)
+                ]
+            )
+
         # Добавляем информацию об условиях поиска после таблицы
-        last_row = sheet_bonds.max_row + 2  # Две строки после последней записи
-        sheet_bonds.cell(
-            row=last_row,
-            column=1,
-            value=f"Выборка сгенерирована {datetime.now().strftime(DATETIME_FORMAT)} по условиям:",
+        last_row = len(rows) + 3  # Две строки после последней записи
+        sheet_bonds.append([])
+        sheet_bonds.append(
+            [
+                f"Выборка сгенерирована {datetime.now().strftime(DATETIME_FORMAT)} по условиям:"
+            ]
         )
 
         # Объединяем диапазон A:D для условий
-        merge_range = f"A{last_row + 1}:D{last_row + 1}"
-        sheet_bonds.merge_cells(merge_range)
+        sheet_bonds.merged_cells.add(f"A{last_row + 1}:D{last_row + 1}")
         # Устанавливаем высоту строки (100)
         sheet_bonds.row_dimensions[last_row + 1].height = 100
 
         # Добавляем условия и настраиваем форматирование
-        cell = sheet_bonds.cell(row=last_row + 1, column=1, value=conditions.as_string)
-        cell.alignment = Alignment(
-            wrap_text=True, vertical="top"
+        conditions_cell = self.__cell(
+            sheet_bonds,
+            conditions.as_string,
+            Alignment(wrap_text=True, vertical="top"),
         )  # Перенос текста и выравнивание по верху
-        self.__add_hiperlinks(sheet_bonds, last_row + 3)
+        sheet_bonds.append([conditions_cell])
+        sheet_bonds.append([])
+        self.__add_hiperlinks(sheet_bonds)
 
         # Лист 'Лог'
-        if log.messages:
+        messages = log.messages
+        if messages:
             sheet_log = wb.create_sheet("Лог")
-            sheet_log.title = "Лог"
             sheet_log.column_dimensions["A"].width = 150
             headers_log = ["Событие"]
             sheet_log.append(headers_log)
-            for log_entry in log.messages:
+            for log_entry in messages:
                 sheet_log.append([log_entry])
 
         wb.save(self.filename)
 
-    def __add_hiperlinks(self, sheet: Worksheet, row_index: int) -> None:
+    @staticmethod
+    def __cell(
+        sheet: WriteOnlyWorksheet,
+        value: Any,
+        alignment: Alignment,
+        number_format: str | None = None,
+    ) -> Cell:
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.alignment = alignment
+        if number_format:
+            cell.number_format = number_format
+        return cell
+
+    @staticmethod
+    def __column_widths(rows: list[list[Any]]) -> list[int]:
+        widths: list[int] = []
+        for row in rows:
+            for column, value in enumerate(row):
+                if column == len(widths):
+                    widths.append(0)
+                if value:
+                    widths[column] = max(widths[column], len(str(value)))
+        return [width + 2 for width in widths]
+
+    def __add_hiperlinks(self, sheet: WriteOnlyWorksheet) -> None:
         # Добавляем гиперссылки
-        column = 1
-        hyperlink_cell_author = cast(
-            Cell,
-            sheet.cell(row=row_index, column=column, value="Составил Михаил Шардин"),
-        )
+        hyperlink_cell_author = WriteOnlyCell(sheet, value="Составил Михаил Шардин")
         hyperlink_cell_author.hyperlink = "https://shardin.name/"
         hyperlink_cell_author.style = "Hyperlink"
+        sheet.append([hyperlink_cell_author])
 
-        hyperlink_cell_script = cast(
-            Cell,
-            sheet.cell(
-                row=row_index + 1,
-                column=column,
-                value="Подробнее про скрипт поиска ликвидных облигаций в статье на GitHub",
-            ),
+        hyperlink_cell_script = WriteOnlyCell(
+            sheet,
+            value="Подробнее про скрипт поиска ликвидных облигаций в статье на GitHub",
         )
         hyperlink_cell_script.hyperlink = (
             "https://github.com/empenoso/moex-bond-search-and-analysis"
         )
         hyperlink_cell_script.style = "Hyperlink"
+        sheet.append([hyperlink_cell_script])
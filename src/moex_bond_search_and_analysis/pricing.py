@@ -0,0 +1,227 @@
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from moex_bond_search_and_analysis.cashflow import (
+    COUPON_KIND,
+    FLOW_COLUMNS,
+    PAYMENT_KIND,
+    payment_flows,
+)
+from moex_bond_search_and_analysis.consts import DATE_FORMAT
+from moex_bond_search_and_analysis.schemas import CashFlowSchedule
+
+# Подпись даты оферты в таблице выплат (сумма не известна, важна только дата)
+OFFER_KIND = "оферта"
+# Доходность считается эффективной годовой, как YIELD в ISS, время - в годах по 365 дней
+DAYS_IN_YEAR = 365
+# Дюрация в ISS - в днях, в поиске - в месяцах по 30 дней
+DAYS_IN_MONTH = 30
+NEWTON_ITERATIONS = 50
+# Точность доходности (в долях), после которой итерации прекращаются
+NEWTON_TOLERANCE = 1e-10
+# Начальное приближение и нижняя граница доходности, в долях
+YIELD_GUESS = 0.1
+YIELD_FLOOR = -0.99
+PRICING_COLUMNS = [
+    "secid",
+    "face_value",
+    "accrued_interest",
+    "dirty_price",
+    "yield_",
+    "macaulay_duration",
+    "modified_duration",
+    "duration",
+    "current_yield",
+    "horizon",
+]
+
+
+def bond_flows(bondization: dict[str, dict[str, Any]]) -> pd.DataFrame:
+    """
+    Выплаты бумаг из ответов bondization (secid -> ответ) одной таблицей:
+    купоны и амортизации - теми же строками, что и в денежном потоке (payment_flows,
+    на одну бумагу), оферты - только датой. Даты разбираются сразу для всей таблицы,
+    неизвестные даты ("0000-00-00") отбрасываются.
+    """
+    rows = []
+    for secid, json_data in bondization.items():
+        for table, date_column, kind in (
+            ("coupons", "coupondate", COUPON_KIND),
+            ("amortizations", "amortdate", PAYMENT_KIND),
+        ):
+            flows = payment_flows(json_data.get(table, {}), date_column, kind, 1)
+            rows.extend((secid, *flow) for flow in flows)
+        offers = json_data.get("offers") or {}
+        if offers.get("data"):
+            offer_date = offers["columns"].index("offerdate")
+            rows.extend(
+                (secid, None, None, row[offer_date], None, 1, OFFER_KIND)
+                for row in offers["data"]
+            )
+    flows = pd.DataFrame(rows, columns=["secid", *FLOW_COLUMNS])
+    flows["date"] = pd.to_datetime(
+        flows["date"].astype(str), format=DATE_FORMAT, errors="coerce"
+    )
+    flows["value_rub"] = pd.to_numeric(flows["value_rub"], errors="coerce")
+    return flows.dropna(subset=["date"]).loc[:, ["secid", "date", "kind", "value_rub"]]
+
+
+def build_schedule(
+    flows: pd.DataFrame, settle: datetime | None = None, to_offer: bool = True
+) -> CashFlowSchedule:
+    """
+    Будущие выплаты всех бумаг в матрицах (бумага × выплата) на дату расчёта settle.
+    Неизвестные будущие купоны (плавающая ставка) принимаются равными последнему известному.
+    С to_offer поток обрывается на ближайшей оферте: купоны после неё не учитываются,
+    а весь непогашенный номинал выплачивается в дату оферты.
+    В расписание попадают только бумаги с непогашенным номиналом.
+    """
+    settle = pd.Timestamp(settle or datetime.now()).normalize()
+    flows = flows.sort_values(["secid", "date"], kind="stable")
+
+    coupons = flows[flows["kind"] == COUPON_KIND].copy()
+    by_secid = coupons.groupby("secid")
+    coupons["value_rub"] = (
+        coupons["value_rub"]
+        .where(coupons["value_rub"] > 0)
+        .groupby(coupons["secid"])
+        .ffill()
+    ).fillna(0)
+    # Купонный период - от предыдущей даты купона, у первого купона - как у следующего
+    coupons["period"] = by_secid["date"].diff().dt.days
+    coupons["period"] = coupons["period"].groupby(coupons["secid"]).bfill()
+    coupons = coupons[coupons["date"] > settle]
+    current = coupons.groupby("secid").first()
+    elapsed = (
+        settle - (current["date"] - pd.to_timedelta(current["period"], "D"))
+    ).dt.days
+    accrued_interest = current["value_rub"] * (elapsed / current["period"]).clip(0, 1)
+    annual_coupon = current["value_rub"] * DAYS_IN_YEAR / current["period"]
+
+    payments = flows[(flows["kind"] == PAYMENT_KIND) & (flows["date"] > settle)]
+    face_value = payments.groupby("secid")["value_rub"].sum()
+    face_value = face_value[face_value > 0]
+    horizon = payments.groupby("secid")["date"].max()
+    if to_offer:
+        offers = flows[(flows["kind"] == OFFER_KIND) & (flows["date"] > settle)]
+        horizon = np.minimum(
+            horizon, offers.groupby("secid")["date"].min().reindex(horizon.index)
+        ).fillna(horizon)
+
+    cash = pd.concat(
+        [
+            coupons.loc[:, ["secid", "date", "value_rub"]].assign(principal=False),
+            payments.loc[:, ["secid", "date", "value_rub"]].assign(principal=True),
+        ]
+    )
+    cash = cash[cash["secid"].isin(face_value.index)]
+    beyond = cash["date"] > cash["secid"].map(horizon)
+    # Номинал, который гасился бы после оферты, выплачивается в дату оферты
+    redemption = (
+        cash[beyond & cash["principal"]]
+        .groupby("secid", as_index=False)["value_rub"]
+        .sum()
+    )
+    redemption["date"] = redemption["secid"].map(horizon)
+    cash = (
+        pd.concat([cash[~beyond], redemption])
+        .groupby(["secid", "date"], as_index=False)["value_rub"]
+        .sum()
+    )
+
+    secids = face_value.index.tolist()
+    row = cash["secid"].map({secid: i for i, secid in enumerate(secids)}).to_numpy()
+    column = cash.groupby("secid").cumcount().to_numpy()
+    width = column.max() + 1 if len(column) else 0
+    times = np.zeros((len(secids), width))
+    amounts = np.zeros((len(secids), width))
+    times[row, column] = (cash["date"] - settle).dt.days.to_numpy() / DAYS_IN_YEAR
+    amounts[row, column] = cash["value_rub"].to_numpy()
+    return CashFlowSchedule(
+        secids=secids,
+        times=times,
+        amounts=amounts,
+        face_value=face_value.to_numpy(dtype=float),
+        accrued_interest=accrued_interest.reindex(secids).fillna(0).to_numpy(),
+        annual_coupon=annual_coupon.reindex(secids).fillna(0).to_numpy(),
+        horizon=horizon.reindex(secids).to_numpy(),
+    )
+
+
+def dirty_prices(schedule: CashFlowSchedule, yields: Sequence[float]) -> np.ndarray:
+    """Цена с НКД, руб., при заданных доходностях (в долях) - для сценариев «что если»."""
+    discount = (1 + np.asarray(yields, dtype=float))[:, None] ** -schedule.times
+    return (schedule.amounts * discount).sum(axis=1)
+
+
+def yield_to_maturity(
+    schedule: CashFlowSchedule, prices: Sequence[float]
+) -> np.ndarray:
+    """
+    Эффективная доходность (в долях) к погашению или оферте по цене с НКД, руб.
+    Метод Ньютона сразу для всех бумаг: на каждой итерации - одна операция над матрицами.
+    Для бумаг без положительной цены или без сходимости - NaN.
+    """
+    prices = np.asarray(prices, dtype=float)
+    valid = (prices > 0) & (schedule.amounts.sum(axis=1) > 0)
+    yields = np.full(len(prices), YIELD_GUESS)
+    step = np.zeros(len(prices))
+    for _ in range(NEWTON_ITERATIONS):
+        discount = (1 + yields)[:, None] ** -schedule.times
+        value = (schedule.amounts * discount).sum(axis=1) - prices
+        slope = -(schedule.times * schedule.amounts * discount).sum(axis=1) / (
+            1 + yields
+        )
+        step = np.divide(value, slope, out=np.zeros_like(value), where=slope < 0)
+        yields = np.maximum(yields - step, YIELD_FLOOR)
+        if np.all(np.abs(step[valid]) < NEWTON_TOLERANCE):
+            break
+    return np.where(valid & (np.abs(step) < NEWTON_TOLERANCE), yields, np.nan)
+
+
+def price_bonds(
+    schedule: CashFlowSchedule, clean_prices: Sequence[float]
+) -> pd.DataFrame:
+    """
+    Доходность и дюрация бумаг расписания по чистой цене в % от непогашенного номинала
+    (как PREVLEGALCLOSEPRICE в ISS): доходность к погашению или оферте и текущая доходность - в %,
+    дюрация Маколея и модифицированная - в годах, duration - дюрация Маколея в месяцах,
+    как в поиске облигаций.
+    """
+    clean_prices = np.asarray(clean_prices, dtype=float)
+    prices = np.where(
+        clean_prices > 0,
+        clean_prices * schedule.face_value / 100 + schedule.accrued_interest,
+        np.nan,
+    )
+    yields = yield_to_maturity(schedule, prices)
+    discounted = (
+        schedule.amounts * (1 + np.nan_to_num(yields))[:, None] ** -schedule.times
+    )
+    macaulay = (schedule.times * discounted).sum(axis=1) / discounted.sum(axis=1)
+    macaulay = np.where(np.isnan(yields), np.nan, macaulay)
+    current_yield = np.divide(
+        schedule.annual_coupon * 100,
+        clean_prices * schedule.face_value / 100,
+        out=np.full(len(prices), np.nan),
+        where=clean_prices > 0,
+    )
+    return pd.DataFrame(
+        {
+            "secid": schedule.secids,
+            "face_value": schedule.face_value,
+            "accrued_interest": schedule.accrued_interest,
+            "dirty_price": prices,
+            "yield_": yields * 100,
+            "macaulay_duration": macaulay,
+            "modified_duration": macaulay / (1 + yields),
+            "duration": macaulay * DAYS_IN_YEAR / DAYS_IN_MONTH,
+            "current_yield": current_yield,
+            "horizon": schedule.horizon,
+        },
+        columns=PRICING_COLUMNS,
+    )
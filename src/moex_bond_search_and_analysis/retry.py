@@ -0,0 +1,154 @@
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+
+import requests
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """API Мосбиржи недоступна продолжительное время, запросы временно не отправляются."""
+
+
+@dataclass
+class ErrorStats:
+    """Счётчики ошибок запросов к API по видам."""
+
+    retries: int = 0  # повторные попытки после временных ошибок
+    rate_limited: int = 0  # ответы 429 Too Many Requests
+    timeouts: int = 0
+    connection_errors: int = 0
+    server_errors: int = 0  # ответы 5xx
+    client_errors: int = 0  # ответы 4xx, кроме 429 - не повторяются
+    invalid_responses: int = 0  # ответ не удалось разобрать
+    circuit_open: int = 0  # запросы, отклонённые при разомкнутом предохранителе
+    failed: int = 0  # запросы, так и не выполненные после всех попыток
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+
+    def add(self, counter: str, value: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + value)
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class RetryPolicy:
+    """
+    Повтор запросов при временных ошибках: экспоненциальная задержка со случайным разбросом.
+    Ответ 429 и заголовок Retry-After учитываются, ошибки 4xx и ошибки в данных не повторяются.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def classify(self, error: Exception) -> str:
+        """Имя счётчика ErrorStats для ошибки."""
+        if isinstance(error, CircuitOpenError):
+            return "circuit_open"
+        if isinstance(error, requests.exceptions.HTTPError):
+            status_code = _status_code(error)
+            if status_code == 429:
+                return "rate_limited"
+            if status_code is not None and status_code >= 500:
+                return "server_errors"
+            return "client_errors"
+        if isinstance(error, requests.exceptions.Timeout):
+            return "timeouts"
+        if isinstance(
+            error,
+            (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.ChunkedEncodingError,
+            ),
+        ):
+            return "connection_errors"
+        return "invalid_responses"
+
+    def is_retryable(self, error: Exception) -> bool:
+        return self.classify(error) in (
+            "rate_limited",
+            "server_errors",
+            "timeouts",
+            "connection_errors",
+        )
+
+    def delay(self, attempt: int, error: Exception) -> float:
+        """Пауза перед попыткой attempt + 1 (нумерация с 1)."""
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return backoff * random.uniform(0.5, 1.0)
+
+
+class CircuitBreaker:
+    """
+    Предохранитель: после failure_threshold временных ошибок подряд запросы отклоняются
+    на reset_timeout секунд, затем пропускается одна пробная попытка.
+    """
+
+    def __init__(self, failure_threshold: int = 10, reset_timeout: float = 120.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def before_request(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                raise CircuitOpenError(
+                    f"API Мосбиржи недоступна, повтор не раньше чем через {self.reset_timeout:.0f} сек."
+                )
+            # Полуоткрытое состояние: пропускаем одну пробную попытку, остальные снова ждут reset_timeout
+            self._opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+def _status_code(error: Exception) -> int | None:
+    response = getattr(error, "response", None)
+    return response.status_code if response is not None else None
+
+
+def _retry_after(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    if response is None or not response.headers.get("Retry-After"):
+        return None
+    value = response.headers["Retry-After"]
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(UTC)).total_seconds())
@@ -2,6 +2,8 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from typing import Literal
 
+import numpy as np
+import pandas as pd
 from openpyxl.workbook import Workbook
 from openpyxl.worksheet.worksheet import Worksheet
 
@@ -82,6 +84,40 @@ class SearchByCriteriaConditions:
             )
         },
     )
+    # Дополнительные условия ликвидности (liquidity.liquidity_metrics) за те же n дней.
+    # Значения по умолчанию ничего не отсекают
+    numtrades_more: int = field(
+        default=0,
+        metadata={"description": "Число сделок за n дней не меньше этой цифры"},
+    )
+    median_volume_more: int = field(
+        default=0,
+        metadata={
+            "description": "Медианный дневной объем сделок, шт. не меньше этой цифры"
+        },
+    )
+    percentile_volume_more: int = field(
+        default=0,
+        metadata={
+            "description": "25-й перцентиль дневного объема сделок, шт. не меньше этой цифры"
+        },
+    )
+    rolling_volume_more: int = field(
+        default=0,
+        metadata={
+            "description": "Объем сделок за любые 5 торговых дней подряд, шт. не меньше этой цифры"
+        },
+    )
+    zero_volume_days_max: int | None = field(
+        default=None,
+        metadata={
+            "description": "Торговых дней без сделок не больше этой цифры, None - не учитывать"
+        },
+    )
+    turnover_more: int = field(
+        default=0,
+        metadata={"description": "Оборот за n дней, руб. не меньше этой цифры"},
+    )
 
     @property
     def as_string(self):
@@ -94,8 +130,33 @@ class SearchByCriteriaConditions:
             f"(c {(datetime.now() - timedelta(days=15)).strftime('%d.%m.%Y')}) > {self.volume_more} шт.\n"
             f"Совокупный объем сделок за 15 дней больше {self.bond_volume_more} шт.\n"
             "Поиск в Т0, Т+, Т+ (USD) - Основной режим - безадрес."
+            + self.__liquidity_string()
         )
 
+    def __liquidity_string(self) -> str:
+        # Дополнительные условия ликвидности выводятся, только если заданы
+        lines = [
+            (self.numtrades_more, f"Число сделок за 15 дней >= {self.numtrades_more}."),
+            (
+                self.median_volume_more,
+                f"Медианный дневной объем >= {self.median_volume_more} шт.",
+            ),
+            (
+                self.percentile_volume_more,
+                f"25-й перцентиль дневного объема >= {self.percentile_volume_more} шт.",
+            ),
+            (
+                self.rolling_volume_more,
+                f"Объем за любые 5 торговых дней подряд >= {self.rolling_volume_more} шт.",
+            ),
+            (
+                self.zero_volume_days_max is not None,
+                f"Дней без сделок <= {self.zero_volume_days_max}.",
+            ),
+            (self.turnover_more, f"Оборот за 15 дней >= {self.turnover_more} руб."),
+        ]
+        return "".join(f"\n{line}" for enabled, line in lines if enabled)
+
 
 @dataclass
 class MonthsOfPayments:
@@ -103,6 +164,17 @@ class MonthsOfPayments:
     months_payment_marks: dict[str, str]
 
 
+@dataclass
+class SecurityInfo:
+    secid: str
+    board_id: str | None
+    is_qualified_investors: bool
+    qual_investor_group: str | None
+    issuer: str | None
+    face_value: float | None
+    isin: str | None = None
+
+
 @dataclass
 class ExcelSheets:
     workbook: Workbook
@@ -110,6 +182,56 @@ class ExcelSheets:
     result: Worksheet
 
 
+@dataclass
+class CashFlowSummary:
+    monthly: pd.DataFrame  # month, coupons, payments, total
+    yearly: pd.DataFrame  # year, coupons, payments, total
+    issuers: pd.DataFrame  # issuer, coupons, payments, total
+    cumulative: pd.DataFrame  # month, total, cumulative
+
+
+@dataclass
+class Allocation:
+    budgets: np.ndarray  # бюджеты, руб.
+    quantities: np.ndarray  # бюджет × облигация, шт.
+    spent: np.ndarray  # бюджет × облигация, руб.
+    remainder: np.ndarray  # остаток по каждому бюджету, руб.
+    tracking_error: np.ndarray  # доля бюджета, вложенная не по целевым весам
+
+
+@dataclass
+class CashFlowSchedule:
+    secids: list[str]
+    times: np.ndarray  # бумага × выплата, лет от даты расчёта (в пустых ячейках 0)
+    amounts: np.ndarray  # бумага × выплата, руб. на одну бумагу (в пустых ячейках 0)
+    face_value: np.ndarray  # непогашенный номинал, руб.
+    accrued_interest: np.ndarray  # НКД на дату расчёта, руб.
+    annual_coupon: np.ndarray  # текущий купон в пересчёте на год, руб.
+    horizon: np.ndarray  # дата погашения или ближайшей оферты
+
+
+@dataclass
+class SnapshotDiff:
+    previous_date: str
+    current_date: str
+    added: pd.DataFrame  # вошли в результаты поиска
+    removed: pd.DataFrame  # выпали из результатов поиска
+    changed: pd.DataFrame  # secid, name, field, old, new
+
+    @property
+    def as_dict(self) -> dict:
+        def records(frame: pd.DataFrame) -> list[dict]:
+            return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+        return {
+            "previous_date": self.previous_date,
+            "current_date": self.current_date,
+            "added": records(self.added),
+            "removed": records(self.removed),
+            "changed": records(self.changed),
+        }
+
+
 @dataclass
 class NewsItem:
     source: str
@@ -0,0 +1,69 @@
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from moex_bond_search_and_analysis.schemas import SearchByCriteriaConditions
+
+SECURITIES_COLUMNS = ["SECID", "SECNAME", "PREVLEGALCLOSEPRICE", "BOARDID"]
+MARKETDATA_COLUMNS = ["SECID", "YIELD", "DURATION"]
+UNIVERSE_COLUMNS = {
+    "SECID": "secid",
+    "SECNAME": "name",
+    "PREVLEGALCLOSEPRICE": "price",
+    "BOARDID": "board_id",
+    "YIELD": "yield_",
+}
+
+
+def build_universe(payloads: list[dict[str, Any]]) -> pd.DataFrame:
+    """
+    Одна таблица всех облигаций из ответов по группам режимов торгов.
+    securities и marketdata соединяются по SECID, дюрация переводится в месяцы.
+    Бумага, встречающаяся в нескольких группах, остаётся в первой из них.
+    """
+    groups = []
+    for json_data in payloads:
+        securities = pd.DataFrame(
+            json_data["securities"]["data"], columns=SECURITIES_COLUMNS
+        )
+        market_data = pd.DataFrame(
+            json_data["marketdata"]["data"], columns=MARKETDATA_COLUMNS
+        ).drop_duplicates("SECID", keep="last")
+        groups.append(
+            securities.merge(market_data, on="SECID", how="left", indicator=True)
+        )
+    if not groups:
+        return pd.DataFrame(
+            columns=[*UNIVERSE_COLUMNS.values(), "duration", "has_market_data"]
+        )
+
+    universe = pd.concat(groups, ignore_index=True).drop_duplicates("SECID")
+    universe["SECNAME"] = universe["SECNAME"].str.replace(r"[\"']", "", regex=True)
+    # кол-во оставшихся месяцев, делим на 30 если есть значение, иначе 0
+    duration = pd.to_numeric(universe["DURATION"], errors="coerce").fillna(0) / 30
+    universe["duration"] = np.round(duration * 100) / 100
+    universe["has_market_data"] = universe["_merge"] == "both"
+    universe["PREVLEGALCLOSEPRICE"] = pd.to_numeric(
+        universe["PREVLEGALCLOSEPRICE"], errors="coerce"
+    )
+    universe["YIELD"] = pd.to_numeric(universe["YIELD"], errors="coerce")
+    return (
+        universe.rename(columns=UNIVERSE_COLUMNS)
+        .loc[:, [*UNIVERSE_COLUMNS.values(), "duration", "has_market_data"]]
+        .reset_index(drop=True)
+    )
+
+
+def base_conditions_mask(
+    universe: pd.DataFrame, conditions: SearchByCriteriaConditions
+) -> pd.Series:
+    """Условия доходности, цены и дюрации сразу для всех бумаг (NaN условие не проходит)."""
+    return (
+        universe["has_market_data"]
+        & universe["yield_"].between(conditions.yield_more, conditions.yield_less)
+        & universe["price"].between(conditions.price_more, conditions.price_less)
+        & universe["duration"].between(
+            conditions.duration_more, conditions.duration_less, inclusive="neither"
+        )
+    )
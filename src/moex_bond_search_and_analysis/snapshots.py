@@ -0,0 +1,260 @@
+import re
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+
+from moex_bond_search_and_analysis.consts import DATE_FORMAT
+from moex_bond_search_and_analysis.schemas import SnapshotDiff
+from moex_bond_search_and_analysis.storage import SQLiteStore
+
+# Колонки снимка: вся выборка поиска и результат проверки каждой бумаги
+SNAPSHOT_COLUMNS = {
+    "secid": "TEXT NOT NULL",
+    "name": "TEXT",
+    "board_id": "TEXT",
+    "price": "REAL",
+    "yield_": "REAL",
+    "duration": "REAL",
+    "has_market_data": "INTEGER",
+    "candidate": "INTEGER",  # прошла условия доходности, цены и дюрации
+    "volume": "INTEGER",  # совокупный объём сделок за LIQUIDITY_DAYS, если проверялся
+    "passed": "INTEGER",  # попала в результаты поиска
+}
+# Колонки листа "Результаты поиска" старых файлов bond_search_YYYY-MM-DD.xlsx
+XLSX_COLUMNS = {
+    "Полное наименование": "name",
+    "Код ценной бумаги": "secid",
+    "Цена, %": "price",
+    "Объем сделок с 15 дней, шт.": "volume",
+    "Доходность": "yield_",
+    "Дюрация, месяцев": "duration",
+}
+XLSX_DATE = re.compile(r"bond_search_(\d{4}-\d{2}-\d{2})\.xlsx$")
+# Изменение, начиная с которого бумага попадает в список изменившихся:
+# цена и доходность - в процентных пунктах, дюрация - в месяцах, объём - в долях
+DIFF_THRESHOLDS = {"price": 1.0, "yield_": 1.0, "duration": 1.0, "volume": 0.5}
+DIFF_COLUMNS = ["secid", "name", "price", "yield_", "duration", "volume"]
+
+
+class SnapshotStore(SQLiteStore):
+    """
+    История снимков поиска облигаций (SQLite).
+    Каждый запуск search_by_criteria сохраняет всю выборку за дату поиска: одна дата - один
+    раздел таблицы, повторный запуск в тот же день заменяет его. Строки хранятся в порядке
+    (scan_date, secid), поэтому выборка за дату или период читается одним проходом по индексу.
+    """
+
+    def __init__(self, path: str = ".moex_snapshots.sqlite"):
+        super().__init__(path)
+
+    def _create_schema(self, connection: sqlite3.Connection) -> None:
+        columns = ", ".join(
+            f"{name} {definition}" for name, definition in SNAPSHOT_COLUMNS.items()
+        )
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS snapshots (scan_date TEXT NOT NULL, {columns}, "
+            "PRIMARY KEY (scan_date, secid)) WITHOUT ROWID"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS snapshots_secid ON snapshots (secid, scan_date)"
+        )
+
+    def save(self, universe: pd.DataFrame, scan_date: str | None = None) -> int:
+        """Снимок выборки за дату (по умолчанию - сегодня). Возвращает число бумаг."""
+        scan_date = scan_date or datetime.now().strftime(DATE_FORMAT)
+        snapshot = (
+            universe.reindex(columns=list(SNAPSHOT_COLUMNS))
+            .drop_duplicates("secid")
+            .astype(object)
+        )
+        snapshot = snapshot.where(snapshot.notna(), None)
+        placeholders = ", ".join("?" * (len(SNAPSHOT_COLUMNS) + 1))
+        with self._lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM snapshots WHERE scan_date = ?", (scan_date,)
+            )
+            self.connection.executemany(
+                f"INSERT INTO snapshots (scan_date, {', '.join(SNAPSHOT_COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                ((scan_date, *row) for row in snapshot.itertuples(index=False)),
+            )
+        return len(snapshot)
+
+    def dates(self) -> list[str]:
+        """Даты сохранённых снимков по возрастанию."""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT DISTINCT scan_date FROM snapshots ORDER BY scan_date"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def load(self, scan_date: str | None = None) -> pd.DataFrame:
+        """Снимок за дату, по умолчанию - последний."""
+        if scan_date is None:
+            dates = self.dates()
+            if not dates:
+                return pd.DataFrame(columns=["scan_date", *SNAPSHOT_COLUMNS])
+            scan_date = dates[-1]
+        return self.history(date_from=scan_date, date_till=scan_date)
+
+    def history(
+        self,
+        secids: list[str] | None = None,
+        date_from: str | None = None,
+        date_till: str | None = None,
+        columns: list[str] | None = None,
+        passed_only: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Снимки за период в длинном формате (scan_date, secid, колонки).
+        Все фильтры выполняются в SQLite, в pandas попадают только нужные строки и колонки.
+        """
+        selected = columns or list(SNAPSHOT_COLUMNS)
+        unknown = set(selected) - set(SNAPSHOT_COLUMNS)
+        if unknown:
+            raise ValueError(
+                f"Неизвестные колонки снимка: {', '.join(sorted(unknown))}"
+            )
+        if "secid" not in selected:
+            selected = ["secid", *selected]
+
+        where, params = [], []
+        if date_from:
+            where.append("scan_date >= ?")
+            params.append(date_from)
+        if date_till:
+            where.append("scan_date <= ?")
+            params.append(date_till)
+        if secids is not None:
+            where.append(f"secid IN ({', '.join('?' * len(secids))})")
+            params.extend(secids)
+        if passed_only:
+            where.append("passed = 1")
+        query = f"SELECT scan_date, {', '.join(selected)} FROM snapshots"
+        if where:
+            query += f" WHERE {' AND '.join(where)}"
+        query += " ORDER BY scan_date, secid"
+        with self._lock:
+            return pd.read_sql_query(query, self.connection, params=params)
+
+    def diff(
+        self,
+        current_date: str | None = None,
+        previous_date: str | None = None,
+        thresholds: dict[str, float] | None = None,
+    ) -> SnapshotDiff | None:
+        """
+        Сравнение снимка с предыдущим (по умолчанию - два последних снимка).
+        None, если сравнивать не с чем.
+        """
+        dates = self.dates()
+        current_date = current_date or (dates[-1] if dates else None)
+        if previous_date is None:
+            earlier = [date for date in dates if current_date and date < current_date]
+            previous_date = earlier[-1] if earlier else None
+        if current_date is None or previous_date is None:
+            return None
+        return diff_snapshots(
+            self.load(previous_date), self.load(current_date), thresholds
+        )
+
+    def import_xlsx(self, paths: list[str | Path]) -> dict[str, int]:
+        """
+        Загрузка старых файлов bond_search_YYYY-MM-DD.xlsx (дата берётся из имени файла).
+        В таких файлах есть только бумаги, прошедшие поиск, они и попадают в снимок.
+        Возвращает дата -> число загруженных бумаг.
+        """
+        imported = {}
+        for path in sorted(Path(p) for p in paths):
+            match = XLSX_DATE.search(path.name)
+            if not match:
+                continue
+            workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+            try:
+                rows = workbook["Результаты поиска"].iter_rows(values_only=True)
+                headers = next(rows)
+                bonds = []
+                for row in rows:
+                    # Таблица заканчивается первой пустой строкой, дальше условия поиска
+                    if not row or not row[headers.index("Код ценной бумаги")]:
+                        break
+                    bonds.append(row)
+            finally:
+                workbook.close()
+            snapshot = (
+                pd.DataFrame(bonds, columns=headers)
+                .loc[:, list(XLSX_COLUMNS)]
+                .rename(columns=XLSX_COLUMNS)
+                .assign(has_market_data=1, candidate=1, passed=1)
+            )
+            imported[match.group(1)] = self.save(snapshot, scan_date=match.group(1))
+        return imported
+
+
+def diff_snapshots(
+    previous: pd.DataFrame,
+    current: pd.DataFrame,
+    thresholds: dict[str, float] | None = None,
+) -> SnapshotDiff:
+    """
+    Что изменилось в результатах поиска между двумя снимками: бумаги, которые вошли и выпали,
+    и бумаги, оставшиеся в результатах, у которых цена, доходность, дюрация или объём
+    изменились больше порога (DIFF_THRESHOLDS). Снимки соединяются по secid одним merge.
+    """
+    thresholds = {**DIFF_THRESHOLDS, **(thresholds or {})}
+    previous_passed = previous.loc[previous["passed"] == 1, DIFF_COLUMNS]
+    current_passed = current.loc[current["passed"] == 1, DIFF_COLUMNS]
+    joined = previous_passed.merge(
+        current_passed,
+        on="secid",
+        how="outer",
+        suffixes=("_old", ""),
+        indicator=True,
+        sort=True,
+    )
+    joined["name"] = joined["name"].fillna(joined["name_old"])
+
+    changes = []
+    both = joined[joined["_merge"] == "both"]
+    for field, threshold in thresholds.items():
+        old = pd.to_numeric(both[f"{field}_old"], errors="coerce")
+        new = pd.to_numeric(both[field], errors="coerce")
+        change = (new - old).abs()
+        # Объём сравнивается относительно прошлого значения
+        if field == "volume":
+            change = change / old.where(old > 0)
+        mask = change > threshold
+        changes.append(
+            pd.DataFrame(
+                {
+                    "secid": both.loc[mask, "secid"],
+                    "name": both.loc[mask, "name"],
+                    "field": field,
+                    "old": old[mask],
+                    "new": new[mask],
+                }
+            )
+        )
+
+    # У выпавших бумаг данные - из предыдущего снимка
+    old_columns = ["secid", "name", *(f"{c}_old" for c in DIFF_COLUMNS[2:])]
+    added = joined.loc[joined["_merge"] == "right_only", DIFF_COLUMNS]
+    removed = joined.loc[joined["_merge"] == "left_only", old_columns]
+    return SnapshotDiff(
+        previous_date=_snapshot_date(previous),
+        current_date=_snapshot_date(current),
+        added=added.reset_index(drop=True),
+        removed=removed.set_axis(DIFF_COLUMNS, axis=1).reset_index(drop=True),
+        changed=pd.concat(changes)
+        .sort_values(["secid", "field"])
+        .reset_index(drop=True),
+    )
+
+
+def _snapshot_date(snapshot: pd.DataFrame) -> str:
+    if "scan_date" in snapshot and not snapshot.empty:
+        return str(snapshot["scan_date"].iloc[0])
+    return ""
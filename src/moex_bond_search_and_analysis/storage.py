@@ -0,0 +1,31 @@
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """
+    Основа локальных хранилищ на SQLite (кэш ответов, контрольная точка, снимки, история).
+    Файл открывается и схема создаётся только при первом обращении к connection.
+    Соединение общее для всех потоков, доступ к нему разделяется блокировкой _lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._create_schema(self._connection)
+            self._connection.commit()
+        return self._connection
+
+    def _create_schema(self, connection: sqlite3.Connection) -> None:
+        """Таблицы и индексы хранилища (CREATE ... IF NOT EXISTS) и миграции."""
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
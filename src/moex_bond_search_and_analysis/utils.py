@@ -17,13 +17,15 @@ def setup_encoding() -> None:
 
 def measure_method_duration(foo: Callable) -> Callable:
     def wrapper(self, *args, **kwargs):
-        start_time = int(time.monotonic())
+        start_time = time.monotonic_ns()
         self.log.info(
             f"🚀 Функция {foo.__name__} начала работу в {datetime.now().strftime(DATETIME_FORMAT)}."
         )
         result = foo(self, *args, **kwargs)
         duration = humanize.precisedelta(
-            int(time.monotonic()) - start_time, minimum_unit="seconds", format="%0.0f"
+            (time.monotonic_ns() - start_time) / 1e9,
+            minimum_unit="seconds",
+            format="%0.3f",
         )
         self.log.info(
             f"✅ Функция {foo.__name__} закончила работу в {datetime.now().strftime(DATETIME_FORMAT)}."
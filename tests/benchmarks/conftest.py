@@ -0,0 +1,53 @@
+"""
+Бенчмарки на синтетических ответах ISS, без обращения к сети.
+По умолчанию не запускаются (addopts: -m "not benchmark"), запуск:
+    pytest tests/benchmarks -m benchmark --no-cov
+Сравнение с сохранённым прогоном:
+    pytest tests/benchmarks -m benchmark --no-cov --benchmark-autosave
+    pytest tests/benchmarks -m benchmark --no-cov --benchmark-compare --benchmark-compare-fail=mean:10%
+Быстрая проверка без замеров (каждый тест - один прогон, пороги не проверяются):
+    pytest tests/benchmarks -m benchmark --no-cov --benchmark-disable
+"""
+
+import pytest
+
+from moex_bond_search_and_analysis.iss import ISSClient, RateLimiter
+from moex_bond_search_and_analysis.logger import Logger
+from moex_bond_search_and_analysis.mock_iss import ISSCorpus
+from moex_bond_search_and_analysis.moex import MOEX
+from tests.benchmarks.iss_fixtures import ISSFixtureAdapter
+
+# Размеры, близкие к реальным: ~3 тыс. облигаций на Мосбирже
+CORPUS_BONDS = 3000
+
+
+@pytest.fixture(autouse=True, scope="session")
+def mock_moex():
+    # Запросы обслуживает ISSFixtureAdapter, общая заглушка requests.Session.get не нужна
+    yield
+
+
+@pytest.fixture(scope="session")
+def iss_corpus() -> ISSCorpus:
+    return ISSCorpus(bonds=CORPUS_BONDS)
+
+
+@pytest.fixture(scope="session")
+def bench_log() -> Logger:
+    return Logger(name="benchmark", format="%(message)s")
+
+
+@pytest.fixture
+def make_moex(iss_corpus, bench_log):
+    """Новый MOEX с пустыми кэшами и клиентом без лимита запросов."""
+    clients = []
+
+    def factory() -> MOEX:
+        client = ISSClient(limiter=RateLimiter(rate=1e9, capacity=1000))
+        client.session.mount("https://iss.moex.com/", ISSFixtureAdapter(iss_corpus))
+        clients.append(client)
+        return MOEX(log=bench_log, client=client)
+
+    yield factory
+    for client in clients:
+        client.close()
@@ -0,0 +1,28 @@
+import requests
+import requests.adapters
+
+from moex_bond_search_and_analysis.mock_iss import ISSCorpus
+
+
+class ISSFixtureAdapter(requests.adapters.BaseAdapter):
+    """Транспорт requests, отвечающий из ISSCorpus без сети и без HTTP сервера."""
+
+    def __init__(self, corpus: ISSCorpus):
+        super().__init__()
+        self.corpus = corpus
+        self.requests = 0
+
+    def send(self, request, **kwargs) -> requests.Response:
+        self.requests += 1
+        status_code, body = self.corpus.respond(request.url)
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = body.encode()
+        response.encoding = "utf-8"
+        response.headers["Content-Type"] = "application/json"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,226 @@
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+from moex_bond_search_and_analysis.allocation import allocate
+from moex_bond_search_and_analysis.app import App
+from moex_bond_search_and_analysis.consts import MONTH_NAMES_RU_SHORT
+from moex_bond_search_and_analysis.iss import ISSClient, RateLimiter
+from moex_bond_search_and_analysis.mock_iss import MockISSServer
+from moex_bond_search_and_analysis.moex import MOEX
+from moex_bond_search_and_analysis.plugins.excel import ExcelSource
+from moex_bond_search_and_analysis.pricing import (
+    bond_flows,
+    build_schedule,
+    price_bonds,
+)
+from moex_bond_search_and_analysis.schemas import Bond, SearchByCriteriaConditions
+from moex_bond_search_and_analysis.snapshots import SnapshotStore
+
+pytestmark = pytest.mark.benchmark
+
+# Допустимое среднее время одного прогона, секунды. Грубая защита от регрессий,
+# точное сравнение - через --benchmark-compare-fail (см. conftest.py)
+THRESHOLDS = {
+    "search_bonds": 10.0,
+    "search_bonds_mock_server": 30.0,
+    "process_bonds": 8.0,
+    "get_bond_price": 5.0,
+    "calculate_bonds_distribution": 5.0,
+    "allocate_budget_sweep": 2.0,
+    "diff_snapshots": 1.0,
+    "price_bonds": 2.0,
+    "write_search_by_criteria": 15.0,
+    "write_bonds": 8.0,
+}
+PORTFOLIO_BONDS = 500  # 500 бумаг по 20 купонов - 10 тыс. выплат
+
+
+def check_threshold(benchmark, name: str) -> None:
+    # С --benchmark-disable замеров нет: тесты выполняются один раз как smoke-проверка
+    if benchmark.stats is None:
+        return
+    assert benchmark.stats.stats.mean < THRESHOLDS[name]
+
+
+def test_search_bonds(benchmark, make_moex):
+    conditions = SearchByCriteriaConditions()
+    bonds = benchmark.pedantic(
+        lambda moex: moex.search_bonds(conditions),
+        setup=lambda: ((make_moex(),), {}),
+        rounds=3,
+    )
+    assert bonds
+    check_threshold(benchmark, "search_bonds")
+
+
+def test_process_bonds(benchmark, make_moex, iss_corpus):
+    moex = make_moex()
+    portfolio = [(secid, 10) for secid in list(iss_corpus.bonds)[:PORTFOLIO_BONDS]]
+    cash_flow = benchmark.pedantic(moex.process_bonds, args=(portfolio,), rounds=3)
+    assert len(cash_flow) > PORTFOLIO_BONDS * 10
+    check_threshold(benchmark, "process_bonds")
+
+
+def test_get_bond_price(benchmark, make_moex, iss_corpus):
+    moex = make_moex()
+    secids = [bond.secid for bond in iss_corpus.bonds.values()][:200]
+    prices = benchmark.pedantic(
+        lambda: [moex.get_bond_price(secid) for secid in secids], rounds=3
+    )
+    assert all(price is not None for price, _, _ in prices)
+    check_threshold(benchmark, "get_bond_price")
+
+
+def test_calculate_bonds_distribution(
+    benchmark, make_moex, iss_corpus, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    sheet.title = "Исходные данные"
+    sheet.append(["Код ценной бумаги"])
+    for bond in list(iss_corpus.bonds.values())[:200]:
+        sheet.append([bond.secid])
+    wb.save("bonds.xlsx")
+
+    app = App()
+    app.moex = make_moex()
+    results = benchmark.pedantic(
+        app._calculate_bonds_distribution, args=(10_000_000,), rounds=3
+    )
+    assert len(results) == 200
+    check_threshold(benchmark, "calculate_bonds_distribution")
+
+
+def test_allocate_budget_sweep(benchmark):
+    # 400 бумаг у 80 эмитентов, 100 сумм от 100 тыс. до 10 млн руб.
+    rng = np.random.default_rng(1)
+    costs = rng.uniform(500, 1200, 400)
+    issuers = rng.integers(0, 80, 400).astype(str)
+    budgets = np.arange(100_000, 10_000_001, 100_000)
+    allocation = benchmark.pedantic(
+        allocate,
+        args=(costs, budgets),
+        kwargs={"issuers": issuers, "issuer_max": 0.05},
+        rounds=3,
+    )
+    assert np.all(allocation.remainder < costs.min())
+    check_threshold(benchmark, "allocate_budget_sweep")
+
+
+def test_diff_snapshots(benchmark, iss_corpus, tmp_path):
+    # Два дня по всей выборке: у части бумаг меняются цена и результат поиска
+    rng = np.random.default_rng(1)
+    store = SnapshotStore(str(tmp_path / "snapshots.sqlite"))
+    for scan_date in ("2025-03-01", "2025-03-02"):
+        bonds = list(iss_corpus.bonds.values())
+        store.save(
+            pd.DataFrame(
+                {
+                    "secid": [b.secid for b in bonds],
+                    "name": [b.name for b in bonds],
+                    "price": [b.price + rng.normal(0, 1) for b in bonds],
+                    "yield_": [b.yield_ for b in bonds],
+                    "duration": [b.duration_days / 30 for b in bonds],
+                    "volume": [b.daily_volume * 15 for b in bonds],
+                    "passed": rng.random(len(bonds)) < 0.3,
+                }
+            ),
+            scan_date=scan_date,
+        )
+    diff = benchmark.pedantic(store.diff, rounds=5)
+    assert len(diff.added) and len(diff.removed) and len(diff.changed)
+    check_threshold(benchmark, "diff_snapshots")
+    store.close()
+
+
+def test_price_bonds(benchmark, iss_corpus):
+    # Доходность и дюрация всей выборки по графикам выплат, без запросов к ISS
+    flows = bond_flows(
+        {secid: iss_corpus.bondization({}, secid) for secid in iss_corpus.bonds}
+    )
+    prices = [bond.price for bond in iss_corpus.bonds.values()]
+    priced = benchmark.pedantic(
+        lambda: price_bonds(build_schedule(flows), prices), rounds=3
+    )
+    assert priced["yield_"].notna().mean() > 0.99
+    check_threshold(benchmark, "price_bonds")
+
+
+def test_write_search_by_criteria(benchmark, bench_log, tmp_path):
+    rng = random.Random(1)
+    bonds = [
+        Bond(
+            name=f"Облигация {i}",
+            secid=f"RU000A{i:06d}",
+            is_qualified_investors=rng.choice(["да", "нет"]),
+            price=rng.uniform(60, 125),
+            volume=rng.randint(60_000, 10_000_000),
+            yield_=rng.uniform(15, 40),
+            duration=rng.uniform(3, 18),
+            payments_data={
+                month: "✅" if rng.random() < 0.4 else ""
+                for month in MONTH_NAMES_RU_SHORT
+            },
+        )
+        for i in range(3000)
+    ]
+    output = ExcelSource(filename=str(tmp_path / "bond_search.xlsx"))
+    benchmark.pedantic(
+        output.write_search_by_criteria,
+        args=(bonds, SearchByCriteriaConditions(), bench_log),
+        rounds=3,
+    )
+    check_threshold(benchmark, "write_search_by_criteria")
+
+
+def test_write_bonds(benchmark, bench_log, tmp_path):
+    filename = str(tmp_path / "bonds.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.title = "Исходные данные"
+    wb.create_sheet("Ден.поток")
+    wb.save(filename)
+
+    rng = random.Random(1)
+    start = datetime.now()
+    cash_flow = [
+        [
+            f"Облигация {i % PORTFOLIO_BONDS} (купон 🏷️)",
+            f"RU000A{i % PORTFOLIO_BONDS:06d}",
+            start + timedelta(days=rng.randint(1, 1800)),
+            rng.uniform(10, 600),
+        ]
+        for i in range(10_000)
+    ]
+    source = ExcelSource(filename=filename)
+    benchmark.pedantic(
+        lambda sheets: source.write_bonds(sheets, cash_flow, bench_log),
+        setup=lambda: ((source.load_bonds(),), {}),
+        rounds=3,
+    )
+    check_threshold(benchmark, "write_bonds")
+
+
+def test_search_bonds_mock_server(benchmark, iss_corpus, bench_log):
+    # Через HTTP: задержка ответа и 429 на каждый 50-й запрос
+    with MockISSServer(
+        corpus=iss_corpus, latency=0.005, rate_limit_every=50, retry_after=0
+    ) as server:
+        client = ISSClient(limiter=RateLimiter(rate=1e9, capacity=1000))
+        bonds = benchmark.pedantic(
+            lambda moex: moex.search_bonds(SearchByCriteriaConditions()),
+            setup=lambda: (
+                (MOEX(log=bench_log, client=client, base_url=server.url),),
+                {},
+            ),
+            rounds=1,
+        )
+        client.close()
+    assert bonds
+    assert client.errors.rate_limited > 0
+    check_threshold(benchmark, "search_bonds_mock_server")
@@ -5,8 +5,8 @@ import pytest
 
 @pytest.fixture(autouse=True, scope="session")
 def mock_moex():
-    with patch.object(requests, "get") as mock_requests_get:
-        def side_effect(url: str):
+    with patch.object(requests.Session, "get") as mock_requests_get:
+        def side_effect(url: str, **kwargs):
             response = None
             if url.startswith("https://iss.moex.com/iss/engines/stock/markets/bonds/boardgroups/58/securities.json"):
                 raise requests.exceptions.RequestException()
@@ -14,4 +14,45 @@ def mock_moex():
             return response
 
         mock_requests_get.side_effect = side_effect
-        yield
\ No newline at end of file
+        yield
+
+@pytest.fixture
+def iss_with_failing_candidate(mocker):
+    """
+    ISS для search_bonds в режиме TQCB: бумаги с заданными объёмами торгов,
+    запрос описания бумаги B падает с ошибкой соединения.
+    """
+
+    def patch_client(moex_client, volumes: dict[str, int]):
+        moex_client.BOARD_GROUPS = [58]
+        mocker.patch.object(
+            moex_client.client,
+            "fetch_all_json",
+            return_value=[
+                {
+                    "securities": {
+                        "data": [[secid, secid, 100.0, "TQCB"] for secid in volumes]
+                    },
+                    "marketdata": {"data": [[secid, 20.0, 300] for secid in volumes]},
+                }
+            ],
+        )
+        mocker.patch.object(
+            moex_client,
+            "search_volume_batch",
+            return_value={
+                secid: {"value": volume, "low_liquid": 0}
+                for secid, volume in volumes.items()
+            },
+        )
+
+        def get_json(url):
+            if "/securities/B.json" in url:
+                raise requests.exceptions.ConnectionError("нет соединения")
+            if "/bondization/" in url:
+                return {"coupons": {"data": []}}
+            return {"boards": {"data": [["A", "TQCB", 1]]}, "description": {"data": []}}
+
+        mocker.patch.object(moex_client.client, "get_json", side_effect=get_json)
+
+    return patch_client
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from moex_bond_search_and_analysis.allocation import allocate
+
+
+def test_allocate_spends_down_to_cheapest_lot():
+    costs = [1010.5, 987.3, 1040.2, 512.0]
+
+    allocation = allocate(costs, 700_000)
+
+    # Поровну с округлением вниз оставалось 1085.80 руб.
+    assert allocation.quantities.tolist() == [[173, 177, 168, 343]]
+    assert allocation.remainder[0] == pytest.approx(61.8)
+    assert allocation.remainder[0] < min(costs)
+    assert allocation.tracking_error[0] < 0.001
+
+
+def test_allocate_lots_issuer_limits_and_budget_sweep():
+    allocation = allocate(
+        costs=[1000.0, 1000.0, 1000.0],
+        budgets=[10_000, 20_000, 35_500],
+        lots=[1, 1, 2],
+        weights=[0.8, 0.1, 0.1],
+        issuers=["А", "Б", "Б"],
+        issuer_max={"А": 0.3},
+    )
+
+    assert allocation.quantities.tolist() == [[3, 3, 4], [6, 8, 6], [10, 13, 12]]
+    # Лот третьей бумаги - 2 штуки, на эмитента А не больше 30% бюджета
+    assert np.all(allocation.quantities[:, 2] % 2 == 0)
+    assert np.all(allocation.spent[:, 0] <= 0.3 * allocation.budgets)
+    assert allocation.remainder.tolist() == [0.0, 0.0, 500.0]
+
+    with pytest.raises(ValueError):
+        allocate([1000.0], 10_000, issuers=["А"], issuer_max=0.5)
@@ -0,0 +1,64 @@
+import openpyxl
+import pytest
+
+from moex_bond_search_and_analysis.app import App
+from moex_bond_search_and_analysis.schemas import SecurityInfo
+
+
+def test_calc_purchase_volume_sweep(mocker, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    sheet.title = "Исходные данные"
+    sheet.append(["Код ценной бумаги"])
+    for secid in ("A", "B", "C"):
+        sheet.append([secid])
+    wb.save("bonds.xlsx")
+
+    app = App()
+    get_bond_prices = mocker.patch.object(
+        app.moex,
+        "get_bond_prices",
+        return_value={
+            "A": (1000.0, 10.5, "2025-03-04"),
+            "B": (985.0, 3.2, "2025-03-04"),
+            "C": (None, None, None),  # нет цены - не покупается
+        },
+    )
+    mocker.patch.object(
+        app.moex,
+        "security_info",
+        side_effect=lambda secid: SecurityInfo(
+            secid=secid,
+            board_id="TQCB",
+            is_qualified_investors=False,
+            qual_investor_group=None,
+            issuer=f"Эмитент {secid}",
+            face_value=1000.0,
+        ),
+    )
+
+    comparison = app.calc_purchase_volume_sweep(
+        budget_from=10_000, budget_to=50_000, budget_step=20_000
+    )
+
+    get_bond_prices.assert_called_once_with(["A", "B", "C"])
+    assert comparison.columns.tolist() == [
+        "Сумма, руб.",
+        "Всего потрачено, руб.",
+        "Остаток, руб.",
+        "Вложено, %",
+        "Отклонение от целевых весов, %",
+        "A, шт.",
+        "B, шт.",
+    ]
+    assert comparison["Сумма, руб."].tolist() == [10_000, 30_000, 50_000]
+    spent = comparison["A, шт."] * 1010.5 + comparison["B, шт."] * 988.2
+    assert (spent + comparison["Остаток, руб."]).tolist() == pytest.approx(
+        comparison["Сумма, руб."].tolist()
+    )
+    assert comparison["Всего потрачено, руб."].tolist() == pytest.approx(spent.tolist())
+    saved = openpyxl.load_workbook(App.SWEEP_FILENAME)["Сравнение сумм"]
+    assert saved.max_row == 4  # заголовок и по строке на каждую сумму
+    app.moex.close()
+    app.snapshots.close()
@@ -0,0 +1,58 @@
+from moex_bond_search_and_analysis.cache import ResponseCache, normalize_url
+from moex_bond_search_and_analysis.iss import endpoint_family
+
+BONDIZATION_URL = "https://iss.moex.com/iss/statistics/engines/stock/markets/bonds/bondization/RU000A10ATB6.json?iss.meta=off&iss.only=coupons"
+
+
+def test_normalize_url_sorts_query():
+    assert normalize_url("HTTPS://ISS.moex.com/iss/a.json?b=2&a=1") == normalize_url(
+        "https://iss.moex.com/iss/a.json?a=1&b=2"
+    )
+
+
+def test_endpoint_family():
+    assert endpoint_family(BONDIZATION_URL) == "bondization"
+    assert (
+        endpoint_family("https://iss.moex.com/iss/securities/RU000A10ATB6.json")
+        == "securities"
+    )
+    assert (
+        endpoint_family(
+            "https://iss.moex.com/iss/history/engines/stock/markets/bonds/securities.json"
+        )
+        == "history"
+    )
+
+
+def test_cache_stores_only_static_endpoints(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"))
+    cache.store(BONDIZATION_URL, "bondization", "{}", etag='"v1"')
+    cache.store("https://iss.moex.com/iss/engines/x.json", "boardgroups", "{}")
+
+    cached = cache.lookup(BONDIZATION_URL, "bondization")
+    assert cached is not None and cached.fresh
+    assert cached.validators == {"If-None-Match": '"v1"'}
+    assert (
+        cache.lookup("https://iss.moex.com/iss/engines/x.json", "boardgroups") is None
+    )
+
+
+def test_cache_modes(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    ResponseCache(path=path).store(BONDIZATION_URL, "bondization", "{}")
+    assert (
+        ResponseCache(path=path, mode="warm").lookup(BONDIZATION_URL, "bondization")
+        is None
+    )
+    assert (
+        ResponseCache(path=path, mode="bypass").lookup(BONDIZATION_URL, "bondization")
+        is None
+    )
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"), max_bytes=10)
+    cache.store(BONDIZATION_URL + "&start=0", "bondization", "123456")
+    cache.store(BONDIZATION_URL + "&start=1", "bondization", "654321")
+    assert cache.lookup(BONDIZATION_URL + "&start=0", "bondization") is None
+    assert cache.lookup(BONDIZATION_URL + "&start=1", "bondization") is not None
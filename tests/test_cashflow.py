@@ -0,0 +1,77 @@
+from datetime import datetime
+
+from moex_bond_search_and_analysis.cashflow import (
+    COUPON_KIND,
+    PAYMENT_KIND,
+    future_cash_flow,
+    payment_flows,
+    summarize_cash_flow,
+)
+
+
+def test_future_cash_flow_for_portfolio():
+    coupons = {
+        "columns": ["isin", "name", "coupondate", "value_rub"],
+        "data": [
+            ["RU1", 'ООО "Один"', "2025-01-10", 30.0],  # уже выплачен
+            ["RU1", 'ООО "Один"', "2025-07-10", 30.0],
+            ["RU1", 'ООО "Один"', "2026-01-10", None],  # сумма пока неизвестна
+        ],
+    }
+    amortizations = {
+        "columns": ["isin", "name", "amortdate", "value_rub"],
+        "data": [["RU1", 'ООО "Один"', "2026-01-10", 1000.0]],
+    }
+
+    cash_flow = future_cash_flow(
+        [
+            *payment_flows(coupons, "coupondate", COUPON_KIND, 3),
+            *payment_flows({"columns": [], "data": []}, "coupondate", COUPON_KIND, 5),
+            *payment_flows(amortizations, "amortdate", PAYMENT_KIND, 3),
+        ],
+        now=datetime(2025, 3, 1),
+    )
+
+    assert cash_flow == [
+        ["ООО Один (купон 🏷️)", "RU1", datetime(2025, 7, 10), 90.0],
+        ["ООО Один (купон 🏷️)", "RU1", datetime(2026, 1, 10), 0.0],
+        ["ООО Один (номинал 💯)", "RU1", datetime(2026, 1, 10), 3000.0],
+    ]
+
+
+def test_summarize_cash_flow_by_month_year_and_issuer():
+    cash_flow = [
+        ["Интерскол КЛС БО-03 (купон 🏷️)", "RU1", datetime(2025, 11, 5), 100.0],
+        ["Селектел 001P-02R (купон 🏷️)", "RU2", datetime(2026, 1, 20), 50.0],
+        ["Интерскол КЛС БО-03 (номинал 💯)", "RU1", datetime(2026, 1, 5), 1000.0],
+    ]
+
+    summary = summarize_cash_flow(cash_flow)
+
+    # Месяц без выплат тоже есть в календаре
+    assert summary.monthly["total"].tolist() == [100.0, 0.0, 1050.0]
+    assert summary.cumulative["cumulative"].tolist() == [100.0, 100.0, 1150.0]
+    assert summary.yearly.set_index("year")["payments"].to_dict() == {
+        2025: 0.0,
+        2026: 1000.0,
+    }
+    assert summary.issuers["issuer"].tolist() == ["Интерскол КЛС", "Селектел"]
+    assert summary.issuers["coupons"].tolist() == [100.0, 50.0]
+
+
+def test_summarize_cash_flow_uses_issuer_from_security_description():
+    cash_flow = [
+        ["Газпром Капитал ООО БО-05 (купон 🏷️)", "RU1", datetime(2025, 11, 5), 100.0],
+        ["ГазпромКап 2Р1 (купон 🏷️)", "RU2", datetime(2025, 12, 5), 50.0],
+        ["Селектел 001P-02R (купон 🏷️)", "RU3", datetime(2026, 1, 20), 30.0],
+    ]
+    issuers = {"RU1": 'ООО "Газпром капитал"', "RU2": 'ООО "Газпром капитал"'}
+
+    summary = summarize_cash_flow(cash_flow, issuers)
+
+    # Выпуски одного эмитента с разными наименованиями - одна строка,
+    # без эмитента в описании - по наименованию выпуска
+    assert summary.issuers.set_index("issuer")["coupons"].to_dict() == {
+        'ООО "Газпром капитал"': 150.0,
+        "Селектел": 30.0,
+    }
@@ -0,0 +1,59 @@
+from moex_bond_search_and_analysis.checkpoint import ScanCheckpoint
+from moex_bond_search_and_analysis.logger import like_print_log
+from moex_bond_search_and_analysis.moex import MOEX
+from moex_bond_search_and_analysis.schemas import Bond, SearchByCriteriaConditions
+
+CANDIDATE = {
+    "secid": "A",
+    "name": "Облигация А",
+    "price": 100.0,
+    "yield_": 20.0,
+    "duration": 10.0,
+    "board_id": "TQCB",
+}
+BOND = Bond(
+    name="Облигация А",
+    secid="A",
+    is_qualified_investors="нет",
+    price=100.0,
+    volume=100_000,
+    yield_=20.0,
+    duration=10.0,
+    payments_data={"янв": "✅"},
+)
+
+
+def test_checkpoint_reuse_by_day_and_market_data(tmp_path):
+    checkpoint = ScanCheckpoint(str(tmp_path / "checkpoint.sqlite"))
+    conditions = SearchByCriteriaConditions()
+    checkpoint.save(CANDIDATE, conditions, BOND)
+    checkpoint.save({**CANDIDATE, "secid": "B"}, conditions, None)
+    moved = {**CANDIDATE, "price": 97.5}
+
+    # В тот же день результат берётся даже при изменившейся цене, отказ - тоже результат
+    assert checkpoint.load([moved, {**CANDIDATE, "secid": "B"}], conditions) == {
+        "A": BOND,
+        "B": None,
+    }
+
+    # В другой день - только если рыночные данные не изменились
+    checkpoint.connection.execute("UPDATE scan_results SET scan_date = '2000-01-01'")
+    assert checkpoint.load([CANDIDATE], conditions) == {"A": BOND}
+    assert checkpoint.load([moved], conditions) == {}
+
+    # Другие условия поиска - проверка заново
+    assert checkpoint.load([CANDIDATE], SearchByCriteriaConditions(yield_more=10)) == {}
+    checkpoint.close()
+
+
+def test_checkpoint_skips_failed_enrichment(iss_with_failing_candidate, tmp_path):
+    checkpoint = ScanCheckpoint(str(tmp_path / "checkpoint.sqlite"))
+    moex_client = MOEX(log=like_print_log, checkpoint=checkpoint)
+    iss_with_failing_candidate(moex_client, {"A": 100_000, "B": 100_000})
+    conditions = SearchByCriteriaConditions()
+    moex_client.search_bonds(conditions)
+
+    # Бумага с ошибкой не сохраняется и при повторном запуске проверяется заново
+    saved = checkpoint.load(moex_client.universe.to_dict("records"), conditions)
+    assert list(saved) == ["A"]
+    moex_client.close()
@@ -0,0 +1,62 @@
+import openpyxl
+
+from moex_bond_search_and_analysis.consts import MONTH_NAMES_RU_FULL
+from moex_bond_search_and_analysis.logger import Logger
+from moex_bond_search_and_analysis.plugins.excel import ExcelSource
+from moex_bond_search_and_analysis.schemas import Bond, SearchByCriteriaConditions
+
+
+def test_write_search_by_criteria_layout(tmp_path):
+    bonds = [
+        Bond(
+            name=f"Облигация {i}",
+            secid=f"RU000A00000{i}",
+            is_qualified_investors="нет",
+            price=99.8,
+            volume=530403 * i,
+            yield_=23.28,
+            duration=10.67,
+            payments_data={"Янв": "✅"},
+        )
+        for i in (1, 2)
+    ]
+    log = Logger(name="test_excel", format="%(message)s")
+    log.info("Поиск завершён")
+    conditions = SearchByCriteriaConditions()
+    path = tmp_path / "bond_search.xlsx"
+
+    ExcelSource(filename=str(path)).write_search_by_criteria(bonds, conditions, log)
+
+    wb = openpyxl.load_workbook(path)
+    sheet = wb["Результаты поиска"]
+    headers = [cell.value for cell in sheet[1]]
+    assert headers[:7] == [
+        "Полное наименование",
+        "Код ценной бумаги",
+        "Нужна квалификация?",
+        "Цена, %",
+        "Объем сделок с 15 дней, шт.",
+        "Доходность",
+        "Дюрация, месяцев",
+    ]
+    assert headers[7:] == MONTH_NAMES_RU_FULL
+    assert sheet.freeze_panes == "A2"
+    assert sheet["B3"].value == "RU000A000002"
+    assert sheet["E2"].number_format == "# ##0"
+    assert sheet["A2"].alignment.horizontal == "center"
+
+    # Две строки после таблицы - дата выборки и условия поиска, объединённые по A:D
+    conditions_row = len(bonds) + 4
+    assert sheet[f"A{conditions_row}"].value == conditions.as_string
+    assert f"A{conditions_row}:D{conditions_row}" in sheet.merged_cells
+    assert sheet.row_dimensions[conditions_row].height == 100
+    assert sheet[f"A{conditions_row}"].alignment.wrap_text
+    # Гиперссылки - через строку после условий
+    assert sheet[f"A{conditions_row + 2}"].hyperlink.target == "https://shardin.name/"
+    assert sheet[f"A{conditions_row + 3}"].hyperlink.target.startswith(
+        "https://github.com/"
+    )
+
+    log_sheet = wb["Лог"]
+    assert log_sheet["A1"].value == "Событие"
+    assert log_sheet["A2"].value == "Поиск завершён"
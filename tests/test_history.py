@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+from moex_bond_search_and_analysis.consts import DATE_FORMAT
+from moex_bond_search_and_analysis.history import HistoryStore
+from moex_bond_search_and_analysis.logger import like_print_log
+from moex_bond_search_and_analysis.moex import MOEX
+
+
+def test_search_volume_batch_fetches_only_missing_days(mocker, tmp_path):
+    moex_client = MOEX(
+        log=like_print_log, history=HistoryStore(str(tmp_path / "history.sqlite"))
+    )
+    requested = []
+
+    def fetch_all_json(urls):
+        responses = []
+        for url in urls:
+            date = parse_qs(urlsplit(url).query)["date"][0]
+            requested.append(date)
+            responses.append(
+                {
+                    "history": {"data": [["TQCB", "A", date, 3000, 10, 3_000_000.0]]},
+                    "history.cursor": {"data": [[0, 1, 100]]},
+                }
+            )
+        return responses
+
+    mocker.patch.object(
+        moex_client.client, "fetch_all_json", side_effect=fetch_all_json
+    )
+
+    first = moex_client.search_volume_batch({"A": "TQCB"}, threshold_value=2000)
+    assert len(requested) == moex_client.LIQUIDITY_DAYS + 1
+    requested.clear()
+
+    second = moex_client.search_volume_batch({"A": "TQCB"}, threshold_value=2000)
+    # Прошлые дни берутся из локальной истории, заново запрашивается только сегодняшний
+    assert len(requested) == 1
+    assert second == first
+    assert first["A"]["value"] == 3000 * (moex_client.LIQUIDITY_DAYS + 1)
+    moex_client.close()
+
+
+def test_search_volume_refetches_incomplete_board_day(mocker, tmp_path):
+    history = HistoryStore(str(tmp_path / "history.sqlite"))
+    moex_client = MOEX(log=like_print_log, history=history)
+    dates = [
+        (datetime.now() - timedelta(days=days_ago)).strftime(DATE_FORMAT)
+        for days_ago in range(moex_client.LIQUIDITY_DAYS, -1, -1)
+    ]
+    failed_date = dates[5]
+
+    def fetch_all_json(urls):
+        responses = []
+        for url in urls:
+            query = parse_qs(urlsplit(url).query)
+            date, start = query["date"][0], int(query["start"][0])
+            if date == failed_date and start == 1:
+                responses.append(requests.exceptions.ConnectionError("обрыв"))
+                continue
+            # По одной бумаге на странице: A на первой, X на второй
+            secid = "AX"[start]
+            responses.append(
+                {
+                    "history": {"data": [["TQCB", secid, date, 10_000, 5, 1e7]]},
+                    "history.cursor": {"data": [[start, 2, 1]]},
+                }
+            )
+        return responses
+
+    mocker.patch.object(
+        moex_client.client, "fetch_all_json", side_effect=fetch_all_json
+    )
+    # Режим с прерванной загрузкой дня проверяется по каждой бумаге отдельно,
+    # а первая страница этого дня не сохраняется
+    assert moex_client.search_volume_batch({"A": "TQCB"}, threshold_value=2000) == {}
+    assert history.missing_days("TQCB", dates) == [failed_date, dates[-1]]
+    stored = history.rows({"A": "TQCB"}, dates[0], dates[-1])
+    assert failed_date not in [row[2] for row in stored]
+
+    requested = []
+
+    def get_json(url):
+        date_from = parse_qs(urlsplit(url).query)["from"][0]
+        requested.append(date_from)
+        return {
+            "history": {
+                "data": [
+                    ["A", date, 10_000, 5, 1e7] for date in dates if date >= date_from
+                ]
+            }
+        }
+
+    mocker.patch.object(moex_client, "board_id", return_value="TQCB")
+    mocker.patch.object(moex_client.client, "get_json", side_effect=get_json)
+    result = moex_client.search_volume("A", 2000)
+    # История бумаги догружается с первого не загруженного целиком дня
+    assert requested == [failed_date]
+    assert result == {"low_liquid": 0, "value": 10_000 * len(dates)}
+    moex_client.close()
@@ -0,0 +1,107 @@
+import pytest
+import requests
+
+from moex_bond_search_and_analysis.cache import ResponseCache
+from moex_bond_search_and_analysis.iss import ISSClient, RateLimiter
+from moex_bond_search_and_analysis.retry import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+)
+
+
+def test_rate_limiter_spaces_requests_by_rate():
+    limiter = RateLimiter(rate=10, capacity=1)
+    assert limiter.reserve() == 0
+    # Второй токен выдаётся не раньше чем через 1 / rate секунд
+    assert 0.09 < limiter.reserve() <= 0.1
+    assert 0.19 < limiter.reserve() <= 0.2
+
+
+def make_response(status_code: int, text: str = "{}", headers: dict | None = None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = text.encode()
+    response.headers.update(headers or {})
+    return response
+
+
+def test_client_retries_rate_limited_request(mocker):
+    client = ISSClient(limiter=RateLimiter(rate=1000))
+    mocker.patch.object(
+        client.session,
+        "get",
+        side_effect=[
+            make_response(429, headers={"Retry-After": "0"}),
+            make_response(200, '{"ok": 1}'),
+        ],
+    )
+    assert client.get_json("https://iss.moex.com/iss/x.json") == {"ok": 1}
+    assert client.errors.rate_limited == 1
+    assert client.errors.retries == 1
+
+
+def test_client_does_not_retry_client_errors(mocker):
+    client = ISSClient(limiter=RateLimiter(rate=1000))
+    get = mocker.patch.object(client.session, "get", return_value=make_response(404))
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get_json("https://iss.moex.com/iss/x.json")
+    get.assert_called_once()
+    assert client.errors.as_dict()["client_errors"] == 1
+
+
+def test_circuit_breaker_opens_on_sustained_outage(mocker):
+    client = ISSClient(
+        limiter=RateLimiter(rate=1000),
+        retry_policy=RetryPolicy(max_attempts=2, base_delay=0),
+        circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+    )
+    get = mocker.patch.object(client.session, "get", return_value=make_response(503))
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get_json("https://iss.moex.com/iss/x.json")
+    with pytest.raises(CircuitOpenError):
+        client.get_json("https://iss.moex.com/iss/x.json")
+    assert get.call_count == 2
+
+
+SECURITY_URL = "https://iss.moex.com/iss/securities/RU000A10ATB6.json"
+
+
+def test_client_revalidates_stale_cache_with_etag(mocker, tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite"))
+    client = ISSClient(limiter=RateLimiter(rate=1000), cache=cache)
+    cache.store(SECURITY_URL, "securities", '{"v": 1}', etag='"v1"')
+    # Запись устарела - нужен условный запрос
+    cache.connection.execute("UPDATE responses SET stored_at = 0")
+    get = mocker.patch.object(
+        client.session, "get", return_value=make_response(304, "")
+    )
+
+    assert client.get_json(SECURITY_URL) == {"v": 1}
+    assert get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+    # После 304 запись снова свежая и берётся из кэша без запроса
+    assert client.get_json(SECURITY_URL) == {"v": 1}
+    get.assert_called_once()
+    client.close()
+
+
+def test_client_does_not_cache_invalid_response(mocker, tmp_path):
+    client = ISSClient(
+        limiter=RateLimiter(rate=1000),
+        cache=ResponseCache(path=str(tmp_path / "cache.sqlite")),
+    )
+    get = mocker.patch.object(
+        client.session,
+        "get",
+        side_effect=[
+            make_response(200, "<html>Технические работы</html>"),
+            make_response(200, '{"v": 2}'),
+        ],
+    )
+
+    with pytest.raises(requests.exceptions.JSONDecodeError):
+        client.get_json(SECURITY_URL)
+    assert client.get_json(SECURITY_URL) == {"v": 2}
+    assert get.call_count == 2
+    assert client.errors.invalid_responses == 1
+    client.close()
@@ -0,0 +1,54 @@
+from moex_bond_search_and_analysis.liquidity import (
+    build_history_matrices,
+    build_volume_matrix,
+    liquidity_conditions_mask,
+    liquidity_flags,
+    liquidity_metrics,
+)
+from moex_bond_search_and_analysis.schemas import SearchByCriteriaConditions
+
+DATES = [f"2025-11-{day:02d}" for day in range(3, 11)]
+
+
+def test_liquidity_flags_from_board_history():
+    history_rows = [("TQCB", "A", date, 3000, 10, 3e6) for date in DATES]
+    history_rows += [
+        ("TQCB", "B", date, 3000 if i else 100, 10, 3e6) for i, date in enumerate(DATES)
+    ]
+    # Строки другого режима торгов не учитываются
+    history_rows += [("PACT", "A", date, 1, 1, 1e3) for date in DATES]
+    history_rows += [("TQCB", "C", date, 3000, 10, 3e6) for date in DATES[:3]]
+
+    matrix = build_volume_matrix(
+        history_rows, {"A": "TQCB", "B": "TQCB", "C": "TQCB", "D": "TQOB"}
+    )
+    flags = liquidity_flags(matrix, threshold_value=2000)
+
+    assert flags.loc["A"].to_dict() == {"low_liquid": 0, "value": 24000, "days": 8}
+    assert flags.loc["B", "low_liquid"] == 1  # в один из дней объём меньше порога
+    assert flags.loc["C", "low_liquid"] == 1  # мало торговых дней
+    assert flags.loc["D"].to_dict() == {"low_liquid": 1, "value": 0, "days": 0}
+
+
+def test_liquidity_metrics_and_conditions():
+    history_rows = [("TQCB", "A", date, 1000, 5, 1e6) for date in DATES]
+    # B торгуется через день: медиана и скользящий объём ниже, есть дни без сделок
+    history_rows += [("TQCB", "B", date, 4000, 20, 4e6) for date in DATES[::2]]
+    matrices = build_history_matrices(history_rows, {"A": "TQCB", "B": "TQCB"})
+
+    metrics = liquidity_metrics(matrices)
+
+    assert metrics.loc["A"].to_dict() == {
+        "numtrades": 40,
+        "median_volume": 1000.0,
+        "percentile_volume": 1000.0,
+        "rolling_volume": 5000.0,
+        "zero_volume_days": 0,
+        "turnover": 8e6,
+    }
+    assert metrics.loc["B", "zero_volume_days"] == 4
+    assert metrics.loc["B", "rolling_volume"] == 8000.0
+    # Условия по умолчанию ничего не отсекают
+    assert liquidity_conditions_mask(metrics, SearchByCriteriaConditions()).all()
+    strict = SearchByCriteriaConditions(median_volume_more=1500, zero_volume_days_max=3)
+    assert not liquidity_conditions_mask(metrics, strict).any()
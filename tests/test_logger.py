@@ -0,0 +1,26 @@
+from moex_bond_search_and_analysis.logger import Logger
+
+
+def test_logger_keeps_debug_records_and_last_records(capsys):
+    log = Logger(name="test_logger", format="%(message)s", max_records=3)
+
+    log.debug("🔗 Ссылка для %s: %s", "B1", "url", event="request", secid="B1")
+    # Без verbose трассировка не выводится в консоль, но остаётся для листа "Лог"
+    assert capsys.readouterr().out == ""
+    assert log.messages == ["🔗 Ссылка для B1: url"]
+
+    log.verbose = True
+    for i in range(4):
+        log.debug("Бумага %s, цена=%s%%", f"B{i}", 100 + i, secid=f"B{i}")
+    log.info("Итог\n")
+    assert "Бумага B3, цена=103%" in capsys.readouterr().out
+
+    assert log.dropped == 3
+    assert log.records[0].secid == "B2"
+    assert log.messages == [
+        "... пропущено ранних записей: 3",
+        "Бумага B2, цена=102%",
+        "Бумага B3, цена=103%",
+        "Итог\n",
+        "",
+    ]
@@ -0,0 +1,46 @@
+from moex_bond_search_and_analysis.cache import ResponseCache
+from moex_bond_search_and_analysis.iss import ISSClient, RateLimiter
+from tests.test_iss import make_response
+
+
+def test_client_metrics_by_endpoint_family(mocker, tmp_path):
+    client = ISSClient(
+        limiter=RateLimiter(rate=1000),
+        cache=ResponseCache(path=str(tmp_path / "cache.sqlite")),
+    )
+    mocker.patch.object(
+        client.session,
+        "get",
+        side_effect=[
+            make_response(429, headers={"Retry-After": "0"}),
+            make_response(200, '{"coupons": []}'),
+            make_response(200, '{"history": []}'),
+        ],
+    )
+    url = "https://iss.moex.com/iss/statistics/engines/stock/markets/bonds/bondization/B1.json"
+    client.get_json(url)
+    client.get_json(url)  # второй раз - из кэша
+    # История торгов не кэшируется и в попадания и промахи кэша не попадает
+    client.get_json(
+        "https://iss.moex.com/iss/history/engines/stock/markets/bonds/securities.json"
+    )
+    with client.metrics.stage("export"):
+        pass
+
+    bondization = client.metrics.as_dict()["endpoints"]["bondization"]
+    assert bondization["requests"] == 2
+    assert bondization["retries"] == 1
+    assert bondization["bytes"] == len('{"coupons": []}') + len("{}")
+    assert bondization["cache_hit_rate"] == 0.5
+    assert sum(bondization["latency_buckets"].values()) == 2
+    history = client.metrics.as_dict()["endpoints"]["history"]
+    assert history["cache_hits"] == history["cache_misses"] == 0
+    assert history["cache_hit_rate"] is None
+
+    prometheus = client.metrics.to_prometheus()
+    assert 'moex_iss_requests_total{family="bondization"} 2' in prometheus
+    assert (
+        'moex_iss_request_duration_seconds_bucket{family="bondization",le="+Inf"} 2'
+        in prometheus
+    )
+    assert 'moex_stage_duration_seconds{stage="export"}' in prometheus
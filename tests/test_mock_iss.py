@@ -0,0 +1,45 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from moex_bond_search_and_analysis.mock_iss import ISSCorpus, MockISSServer
+
+HISTORY = "/iss/history/engines/stock/markets/bonds/boards/TQCB"
+
+
+def test_corpus_pagination_columns_and_callback():
+    corpus = ISSCorpus(bonds=1400)  # 200 бумаг в TQCB
+    date = corpus.trading_days[-1]
+
+    status_code, body = corpus.respond(
+        f"{HISTORY}/securities.json?iss.only=history,history.cursor"
+        f"&history.columns=SECID,VOLUME&date={date}&start=0"
+    )
+    page = json.loads(body)
+    assert status_code == 200
+    assert page["history"]["columns"] == ["SECID", "VOLUME"]
+    assert len(page["history"]["data"]) == 100
+    assert page["history.cursor"]["data"] == [[0, 200, 100]]
+
+    secid = corpus.by_board["TQCB"][0].secid
+    _, body = corpus.respond(
+        f"{HISTORY}/securities/{secid}.json?iss.json=extended"
+        f"&callback=JSON_CALLBACK&from={date}"
+    )
+    assert body.startswith("JSON_CALLBACK(")
+    data = json.loads(body.removeprefix("JSON_CALLBACK(").removesuffix(")"))
+    assert data[1]["history"][0]["SECID"] == secid
+    assert corpus.respond("/iss/unknown.json")[0] == 404
+
+
+def test_server_emulates_rate_limit():
+    with MockISSServer(corpus=ISSCorpus(bonds=10), rate_limit_every=2) as server:
+        url = f"{server.url}/iss/securities/RU000A000000.json?iss.only=boards"
+        with urllib.request.urlopen(url) as response:
+            assert "boards" in json.loads(response.read())
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(url)
+        assert error.value.code == 429
+        assert error.value.headers["Retry-After"] == "1"
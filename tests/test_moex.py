@@ -1,11 +1,287 @@
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from moex_bond_search_and_analysis.consts import DATE_FORMAT
 from moex_bond_search_and_analysis.moex import MOEX
 from moex_bond_search_and_analysis.logger import like_print_log
+from moex_bond_search_and_analysis.mock_iss import AMORTIZATION_COLUMNS, COUPON_COLUMNS
 from moex_bond_search_and_analysis.schemas import SearchByCriteriaConditions
 
 
 def test_moex_search_bonds_moex_api_error():
     moex_client = MOEX(log=like_print_log)
-    moex_client.API_DELAY = 0
     moex_client.BOARD_GROUPS = [58]
     result = moex_client.search_bonds(conditions=SearchByCriteriaConditions())
-    assert result is None
\ No newline at end of file
+    assert result is None
+
+
+def test_moex_security_info_single_request(mocker):
+    moex_client = MOEX(log=like_print_log)
+    get_json = mocker.patch.object(
+        moex_client.client,
+        "get_json",
+        return_value={
+            "boards": {"data": [["A", "TQCB", 1], ["A", "PACT", 0]]},
+            "description": {
+                "data": [
+                    ["ISQUALIFIEDINVESTORS", "", "1"],
+                    ["QUALINVESTORGROUP", "", "Облигации российских эмитентов"],
+                    ["FACEVALUE", "", "1000"],
+                    ["ISIN", "", "RU000A"],
+                    ["EMITTER_TITLE", "", 'ПАО "Эмитент"'],
+                ]
+            },
+        },
+    )
+    assert moex_client.board_id("A") == "TQCB"
+    assert moex_client.search_is_qualified_investors("A") == "да"
+    assert moex_client.security_info("A").face_value == 1000.0
+    assert moex_client.issuers(["A"]) == {"RU000A": 'ПАО "Эмитент"'}
+    get_json.assert_called_once()
+
+
+def test_moex_get_bond_prices_latest_close_and_batched_nkd(mocker):
+    moex_client = MOEX(log=like_print_log)
+    boards = {"A": "TQCB", "B": "TQOB", "C": None, "D": "TQOB"}
+    mocker.patch.object(moex_client, "board_id", side_effect=boards.get)
+    fetch_all_json = mocker.patch.object(
+        moex_client.client,
+        "fetch_all_json",
+        side_effect=[
+            [{"securities": {"data": [["A", 12.3, 10, None, None, 1000]]}}],
+            [
+                {
+                    "securities": {
+                        "data": [
+                            ["B", 4.5, 1, 98.0, "2025-03-05", 1000],
+                            ["D", 1.0, 1, None, None, 1000],
+                        ]
+                    }
+                }
+            ],
+            [
+                {
+                    "history": {
+                        "data": [
+                            ["2025-03-03", 99.5, 1000],
+                            ["2025-03-04", 100.5, 1000],
+                            ["2025-03-05", None, 1000],  # торгов не было
+                        ]
+                    }
+                },
+                {"history": {"data": []}},
+            ],
+        ],
+    )
+    prices = moex_client.get_bond_prices(["A", "B", "A", "C", "D"])
+    assert prices == {
+        "A": (1005.0, 12.3, "2025-03-04"),
+        "B": (980.0, 4.5, "2025-03-05"),
+        "C": (None, None, None),  # режим торгов не найден
+        "D": (None, None, None),
+    }
+    assert moex_client.lot_size("A") == 10
+    # Цена и НКД - одним запросом на режим, история - только для бумаг без цены
+    (quotes_url,) = fetch_all_json.call_args_list[1].args[0]
+    assert "/boards/TQOB/securities.json" in quotes_url
+    assert quotes_url.endswith("securities=B,D")
+    history_urls = fetch_all_json.call_args_list[2].args[0]
+    assert len(history_urls) == 2
+    assert "/boards/TQCB/securities/A.json" in history_urls[0]
+    assert "/boards/TQOB/securities/D.json" in history_urls[1]
+
+
+def test_moex_search_bonds_prices_bonds_without_iss_yield(mocker):
+    moex_client = MOEX(log=like_print_log)
+    moex_client.BOARD_GROUPS = [58]
+    moex_client.OWN_PRICING = True
+    maturity = (datetime.now() + timedelta(days=365)).strftime(DATE_FORMAT)
+    fetch_all_json = mocker.patch.object(
+        moex_client.client,
+        "fetch_all_json",
+        side_effect=[
+            [
+                {
+                    "securities": {
+                        "data": [
+                            ["A", "Облигация А", 100.0, "TQCB"],
+                            ["B", "Облигация Б", 101.0, "TQCB"],
+                        ]
+                    },
+                    "marketdata": {"data": [["B", 15.0, 300]]},
+                }
+            ],
+            [
+                {
+                    "coupons": {"columns": [], "data": []},
+                    "amortizations": {
+                        "columns": ["isin", "name", "amortdate", "value_rub"],
+                        "data": [["RUA", "А", maturity, 1000.0]],
+                    },
+                }
+            ],
+        ],
+    )
+    mocker.patch.object(
+        moex_client,
+        "search_volume_batch",
+        return_value={
+            "A": {"value": 0, "low_liquid": 1},
+            "B": {"value": 0, "low_liquid": 1},
+        },
+    )
+    conditions = SearchByCriteriaConditions(yield_more=-10)
+    moex_client.search_bonds(conditions)
+
+    universe = moex_client.universe.set_index("secid")
+    # Бескупонная бумага по номиналу: доходность 0, дюрация - срок до погашения
+    assert universe.loc["A", "yield_"] == 0
+    assert universe.loc["A", "duration"] == round(365 / 30, 2)
+    assert universe["candidate"].all()
+    (bondization_url,) = fetch_all_json.call_args_list[1].args[0]
+    assert "/bondization/A.json" in bondization_url
+
+
+def test_moex_bondization_is_paged(mocker):
+    moex_client = MOEX(log=like_print_log)
+    moex_client.BONDIZATION_PAGE = 2
+    coupon_dates = [
+        (datetime.now() + timedelta(days=31 * month)).strftime(DATE_FORMAT)
+        for month in range(1, 6)
+    ]
+    maturity = (datetime.now() + timedelta(days=200)).strftime(DATE_FORMAT)
+    coupons = [
+        ["RUA", "А", 1, day, day, day, 1000, 1000, "SUR", 50, 5, 50, "A", "TQCB"]
+        for day in coupon_dates
+    ]
+    amortizations = [
+        ["RUA", "А", 1, maturity, 1000, 1000, "SUR", 100, 1000, 1000, "", "A", "TQCB"]
+    ]
+    starts = []
+
+    def bondization(url):
+        query = parse_qs(urlsplit(url).query)
+        start, limit = int(query["start"][0]), int(query["limit"][0])
+        starts.append(start)
+        return {
+            "coupons": {
+                "columns": COUPON_COLUMNS,
+                "data": coupons[start : start + limit],
+            },
+            "amortizations": {
+                "columns": AMORTIZATION_COLUMNS,
+                "data": amortizations[start : start + limit],
+            },
+        }
+
+    mocker.patch.object(
+        moex_client.client,
+        "fetch_all_json",
+        side_effect=lambda urls: [bondization(url) for url in urls],
+    )
+    schedule = moex_client.bond_schedules(["A"])
+    # Пять купонов на трёх страницах по две строки и погашение
+    assert starts == [0, 2, 4]
+    assert (schedule.amounts > 0).sum() == 6
+    assert schedule.amounts.sum() == 5 * 50 + 1000
+
+    starts.clear()
+    mocker.patch.object(moex_client.client, "get_json", side_effect=bondization)
+    payments = moex_client.search_months_of_payments("A")
+    assert starts == [0, 2, 4]
+    months = {int(day.split("-")[1]) for day in coupon_dates}
+    assert list(payments.months_payment_marks.values()).count("✅") == len(months)
+
+
+def test_moex_search_bonds_counts_failed_candidate(mocker, iss_with_failing_candidate):
+    log = mocker.Mock()
+    moex_client = MOEX(log=log)
+    iss_with_failing_candidate(moex_client, {"A": 300_000, "B": 200_000, "C": 100_000})
+    bonds = moex_client.search_bonds(SearchByCriteriaConditions())
+
+    # Ошибка по одной бумаге не прерывает обработку остальных и учитывается в итоге
+    assert [bond.secid for bond in bonds] == ["A", "C"]
+    messages = [call.args[0] for call in log.info.call_args_list]
+    assert any("Количество ошибок" in m and ": 1, " in m for m in messages)
+
+
+def test_moex_search_volume_applies_liquidity_conditions(mocker):
+    moex_client = MOEX(log=like_print_log)
+    mocker.patch.object(moex_client, "board_id", return_value="TQCB")
+    weekdays = pd.bdate_range(
+        datetime.now() - timedelta(days=moex_client.LIQUIDITY_DAYS),
+        datetime.now(),
+        inclusive="left",
+    ).strftime(DATE_FORMAT)
+    # Во все будни окна, кроме двух, были сделки (ISS отдаёт строки и за дни без сделок)
+    history = [
+        ["A", day, 10_000 if i >= 2 else 0, 5, 1e7] for i, day in enumerate(weekdays)
+    ]
+    mocker.patch.object(
+        moex_client.client, "get_json", return_value={"history": {"data": history}}
+    )
+
+    classic = moex_client.search_volume("A", 0)
+    assert classic == {"low_liquid": 0, "value": 10_000 * (len(history) - 2)}
+    relaxed = moex_client.search_volume("A", 0, SearchByCriteriaConditions())
+    assert relaxed["low_liquid"] == 0
+    assert relaxed["zero_volume_days"] == 2
+    strict = moex_client.search_volume(
+        "A", 0, SearchByCriteriaConditions(zero_volume_days_max=1)
+    )
+    assert strict["low_liquid"] == 1
+
+
+def test_moex_batch_and_single_bond_liquidity_agree(mocker):
+    moex_client = MOEX(log=like_print_log)
+    mocker.patch.object(moex_client, "board_id", return_value="TQCB")
+    weekdays = list(
+        pd.bdate_range(
+            datetime.now() - timedelta(days=moex_client.LIQUIDITY_DAYS),
+            datetime.now(),
+            inclusive="left",
+        ).strftime(DATE_FORMAT)
+    )
+    # Один будний день - праздник без торгов, в другой день по A не было сделок,
+    # а X торговалась каждый торговый день
+    holiday, quiet_day = weekdays[3], weekdays[5]
+    board_history = {
+        day: [
+            ["TQCB", "A", day, 0 if day == quiet_day else 10_000, 5, 1e7],
+            ["TQCB", "X", day, 500, 1, 5e5],
+        ]
+        for day in weekdays
+        if day != holiday
+    }
+
+    def fetch_all_json(urls):
+        responses = []
+        for url in urls:
+            rows = board_history.get(parse_qs(urlsplit(url).query)["date"][0], [])
+            responses.append(
+                {
+                    "history": {"data": rows},
+                    "history.cursor": {"data": [[0, len(rows), 100]]},
+                }
+            )
+        return responses
+
+    single_history = [row[1:] for rows in board_history.values() for row in rows[:1]]
+    mocker.patch.object(
+        moex_client.client, "fetch_all_json", side_effect=fetch_all_json
+    )
+    mocker.patch.object(
+        moex_client.client,
+        "get_json",
+        return_value={"history": {"data": single_history}},
+    )
+    conditions = SearchByCriteriaConditions(zero_volume_days_max=1)
+
+    batch = moex_client.search_volume_batch({"A": "TQCB"}, 0, conditions)["A"]
+    single = moex_client.search_volume("A", 0, conditions)
+    # Праздник не считается днём без сделок ни в одном из способов проверки
+    assert batch["zero_volume_days"] == single["zero_volume_days"] == 1
+    assert batch["low_liquid"] == single["low_liquid"] == 0
+    assert {key: batch[key] for key in single} == single
@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from moex_bond_search_and_analysis.pricing import (
+    bond_flows,
+    build_schedule,
+    dirty_prices,
+    price_bonds,
+)
+
+COUPON_COLUMNS = ["isin", "name", "coupondate", "value_rub"]
+AMORTIZATION_COLUMNS = ["isin", "name", "amortdate", "value_rub"]
+BONDIZATION = {
+    # Годовой купон 10%, погашение через три года
+    "A": {
+        "coupons": {
+            "columns": COUPON_COLUMNS,
+            "data": [
+                ["RUA", "A", date, 100.0]
+                for date in ["2025-01-01", "2026-01-01", "2027-01-01", "2028-01-01"]
+            ],
+        },
+        "amortizations": {
+            "columns": AMORTIZATION_COLUMNS,
+            "data": [["RUA", "A", "2028-01-01", 1000.0]],
+        },
+    },
+    # Полугодовой купон, будущие купоны неизвестны, амортизация и оферта
+    "B": {
+        "coupons": {
+            "columns": COUPON_COLUMNS,
+            "data": [
+                ["RUB", "B", "2024-11-01", 40.0],
+                ["RUB", "B", "2025-05-01", 40.0],
+                ["RUB", "B", "2025-11-01", None],
+                ["RUB", "B", "2026-05-01", None],
+            ],
+        },
+        "amortizations": {
+            "columns": AMORTIZATION_COLUMNS,
+            "data": [
+                ["RUB", "B", "2025-11-01", 500.0],
+                ["RUB", "B", "2026-05-01", 500.0],
+            ],
+        },
+        "offers": {"columns": ["offerdate"], "data": [["2025-11-01"], ["0000-00-00"]]},
+    },
+    # Уже погашена
+    "C": {
+        "coupons": {"columns": COUPON_COLUMNS, "data": []},
+        "amortizations": {
+            "columns": AMORTIZATION_COLUMNS,
+            "data": [["RUC", "C", "2024-06-01", 1000.0]],
+        },
+    },
+}
+SETTLE = datetime(2025, 1, 1)
+
+
+def test_price_bonds_yield_duration_and_offer():
+    schedule = build_schedule(bond_flows(BONDIZATION), SETTLE)
+
+    assert schedule.secids == ["A", "B"]
+    # До оферты: два купона по 40 руб. и весь номинал в дату оферты
+    assert schedule.amounts[1, :2].tolist() == [40.0, 1040.0]
+    priced = price_bonds(schedule, [100.0, 100.0]).set_index("secid")
+
+    # Купить по номиналу в дату купона - доходность равна купону
+    assert priced.loc["A", "yield_"] == pytest.approx(10.0)
+    assert priced.loc["A", "current_yield"] == pytest.approx(10.0)
+    macaulay = (100 / 1.1 + 2 * 100 / 1.1**2 + 3 * 1100 / 1.1**3) / 1000
+    assert priced.loc["A", "macaulay_duration"] == pytest.approx(macaulay)
+    assert priced.loc["A", "modified_duration"] == pytest.approx(macaulay / 1.1)
+    assert priced.loc["A", "duration"] == pytest.approx(macaulay * 365 / 30)
+    # НКД за 61 день из 181 дня купонного периода
+    assert priced.loc["B", "accrued_interest"] == pytest.approx(40 * 61 / 181)
+    assert priced.loc["B", "horizon"] == np.datetime64("2025-11-01")
+    assert 7.9 < priced.loc["B", "yield_"] < 8.4
+
+
+def test_price_bonds_to_maturity_and_what_if_reprice():
+    schedule = build_schedule(bond_flows(BONDIZATION), SETTLE, to_offer=False)
+    priced = price_bonds(schedule, [95.0, 0.0])
+
+    # Неизвестные купоны - как последний известный, номинал гасится частями
+    assert schedule.amounts[1].tolist() == [40.0, 540.0, 540.0]
+    assert priced["yield_"].iloc[0] > 10
+    assert np.isnan(priced["yield_"].iloc[1])
+    # Цена по рассчитанной доходности совпадает с исходной, сдвиг доходности снижает цену
+    yields = priced["yield_"].to_numpy() / 100
+    assert dirty_prices(schedule, yields)[0] == pytest.approx(950.0)
+    assert dirty_prices(schedule, yields + 0.01)[0] < 950.0
@@ -0,0 +1,31 @@
+from moex_bond_search_and_analysis.schemas import SearchByCriteriaConditions
+from moex_bond_search_and_analysis.screening import base_conditions_mask, build_universe
+
+
+def test_base_conditions_mask():
+    payload = {
+        "securities": {
+            "data": [
+                ["A", 'ООО "Альфа" БО-01', 99.5, "TQCB"],
+                ["B", "Бета 01", 130.0, "TQCB"],  # цена выше границы
+                ["C", "Гамма 01", 99.0, "TQCB"],  # нет marketdata
+                ["D", "Дельта 01", 99.0, "TQCB"],  # дюрация на границе
+                ["E", "Эпсилон 01", 99.0, "TQCB"],  # доходность неизвестна
+            ]
+        },
+        "marketdata": {
+            "data": [
+                ["A", 20.0, 300],
+                ["B", 20.0, 300],
+                ["D", 20.0, 540],
+                ["E", None, 300],
+            ]
+        },
+    }
+    universe = build_universe([payload, payload])
+
+    assert len(universe) == 5
+    assert universe.loc[0, "name"] == "ООО Альфа БО-01"
+    assert universe.loc[0, "duration"] == 10.0
+    mask = base_conditions_mask(universe, SearchByCriteriaConditions())
+    assert universe[mask]["secid"].tolist() == ["A"]
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from moex_bond_search_and_analysis.logger import Logger
+from moex_bond_search_and_analysis.plugins.excel import ExcelSource
+from moex_bond_search_and_analysis.schemas import Bond, SearchByCriteriaConditions
+from moex_bond_search_and_analysis.snapshots import SnapshotStore, diff_snapshots
+
+
+def test_snapshot_store_save_replace_and_query(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.sqlite"))
+    universe = pd.DataFrame(
+        {
+            "secid": ["A", "B", "C"],
+            "name": ["Первая", "Вторая", "Третья"],
+            "board_id": ["TQCB", "TQOB", "TQCB"],
+            "price": [99.5, 101.2, np.nan],
+            "yield_": [21.0, 16.5, np.nan],
+            "duration": [12.0, 30.1, 0.0],
+            "has_market_data": [True, True, False],
+            "candidate": [True, False, False],
+            "volume": [150_000, np.nan, np.nan],
+            "passed": [True, False, False],
+        }
+    )
+    assert store.save(universe, scan_date="2025-03-01") == 3
+    assert store.save(universe.iloc[:2], scan_date="2025-03-02") == 2
+    # Повторный запуск в тот же день заменяет снимок
+    assert store.save(universe.iloc[:1], scan_date="2025-03-02") == 1
+
+    assert store.dates() == ["2025-03-01", "2025-03-02"]
+    assert store.load()["secid"].tolist() == ["A"]
+    history = store.history(secids=["A", "C"], columns=["price", "passed"])
+    assert history.fillna(0).to_dict("list") == {
+        "scan_date": ["2025-03-01", "2025-03-01", "2025-03-02"],
+        "secid": ["A", "C", "A"],
+        "price": [99.5, 0, 99.5],
+        "passed": [1, 0, 1],
+    }
+    store.close()
+
+
+def test_snapshot_store_imports_search_results_xlsx(tmp_path):
+    bonds = [
+        Bond(
+            name="Облигация",
+            secid="RU000A000001",
+            is_qualified_investors="нет",
+            price=99.8,
+            volume=530403,
+            yield_=23.28,
+            duration=10.67,
+            payments_data={"Янв": "✅"},
+        )
+    ]
+    path = tmp_path / "bond_search_2025-11-13.xlsx"
+    ExcelSource(filename=str(path)).write_search_by_criteria(
+        bonds, SearchByCriteriaConditions(), Logger(name="test", format="%(message)s")
+    )
+    store = SnapshotStore(str(tmp_path / "snapshots.sqlite"))
+
+    assert store.import_xlsx([path, tmp_path / "bonds.xlsx"]) == {"2025-11-13": 1}
+    snapshot = store.load("2025-11-13")
+    assert snapshot[["secid", "price", "volume", "passed"]].to_dict("records") == [
+        {"secid": "RU000A000001", "price": 99.8, "volume": 530403, "passed": 1}
+    ]
+
+
+def test_diff_snapshots_added_removed_and_changed():
+    columns = ["scan_date", "secid", "name", "price", "yield_", "duration"]
+    previous = pd.DataFrame(
+        [
+            ["2025-03-01", "A", "Первая", 99.0, 20.0, 12.0, 100_000, 1],
+            ["2025-03-01", "B", "Вторая", 100.0, 18.0, 6.0, 100_000, 1],
+            ["2025-03-01", "C", "Третья", 101.0, 17.0, 9.0, 100_000, 0],
+        ],
+        columns=[*columns, "volume", "passed"],
+    )
+    current = pd.DataFrame(
+        [
+            ["2025-03-02", "A", "Первая", 99.5, 21.5, 12.0, 300_000, 1],
+            ["2025-03-02", "B", "Вторая", 100.0, 18.0, 6.0, 100_000, 0],
+            ["2025-03-02", "C", "Третья", 101.0, 17.0, 9.0, 100_000, 1],
+        ],
+        columns=[*columns, "volume", "passed"],
+    )
+
+    diff = diff_snapshots(previous, current)
+
+    assert diff.as_dict["previous_date"] == "2025-03-01"
+    assert diff.added["secid"].tolist() == ["C"]
+    assert diff.removed["secid"].tolist() == ["B"]
+    # Цена изменилась меньше порога, доходность и объём - больше
+    assert diff.as_dict["changed"] == [
+        {
+            "secid": "A",
+            "name": "Первая",
+            "field": "volume",
+            "old": 100_000,
+            "new": 300_000,
+        },
+        {"secid": "A", "name": "Первая", "field": "yield_", "old": 20.0, "new": 21.5},
+    ]